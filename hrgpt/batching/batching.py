@@ -0,0 +1,404 @@
+import asyncio
+import collections
+import concurrent.futures
+import typing
+
+import polars as pl
+
+from hrgpt.extraction.extraction import (
+    parse_requirements_from_answer,
+    is_requirements_answer_accepted,
+)
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.matching.matching import (
+    AggregatedScore,
+    RequirementEntry,
+    get_requirement_batches,
+    get_requirement_entries,
+    get_requirement_type_of_batch,
+    parse_batched_score_choices,
+    parse_score_choices_or_minimum,
+    parse_promising_choices_or_not_promising,
+    create_requirement_matches,
+    create_applicant_match,
+    reduce_cv_chunk_scores,
+)
+from hrgpt.prompting.prompting import (
+    get_prompt_to_extract_requirements,
+    get_prompt_to_match_requirement,
+    get_prompt_to_match_requirements,
+    get_prompt_to_check_if_candidate_is_promising,
+    get_cv_chunks_to_match_requirement,
+    get_cv_chunks_to_match_requirements,
+)
+from hrgpt.scoring.scoring import create_score_result
+from hrgpt.utils.batch_utils import (
+    BatchEndpoint,
+    get_batch_endpoint,
+    run_batch,
+    create_custom_id,
+)
+from hrgpt.utils.cache_utils import CacheFactory
+from hrgpt.utils.chat_utils import get_routed_answer_message_async
+from hrgpt.utils.extraction_utils import get_document_text
+from hrgpt.utils.requirement_cache_utils import RequirementCache
+from hrgpt.utils.timing_utils import TimingClock, TaskType
+from hrgpt.utils.translation_utils import translate_applicant_match
+from hrgpt.utils.type_utils import (
+    ApplicantMatch,
+    ScoreWorkload,
+    PromptType,
+    JobRequirementType,
+    Requirement,
+    PromisingResult,
+)
+from hrgpt.utils.usage_utils import UsageTracker, UsageScope
+
+CvKey = tuple[int, int]
+RequirementKey = tuple[int, int, int, int]
+JobRequirements = dict[JobRequirementType, list[Requirement]]
+RequirementBatches = tuple[tuple[RequirementEntry, ...], ...]
+
+
+def parse_batch_score(custom_id: str, answer_text: str) -> AggregatedScore:
+    return parse_score_choices_or_minimum((answer_text,), f'request "{custom_id}"')
+
+
+def parse_batch_promising_choice(
+    custom_id: str, answer_text: str
+) -> tuple[PromisingResult, float]:
+    return parse_promising_choices_or_not_promising(
+        (answer_text,), f'request "{custom_id}"'
+    )
+
+
+def get_document_texts(
+    score_workloads: tuple[ScoreWorkload, ...]
+) -> tuple[tuple[str, ...], tuple[tuple[str, ...], ...]]:
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        job_texts = tuple(
+            executor.map(get_document_text, [x.job_file for x in score_workloads])
+        )
+        cv_texts = tuple(
+            [
+                tuple(executor.map(get_document_text, x.cv_files))
+                for x in score_workloads
+            ]
+        )
+    return job_texts, cv_texts
+
+
+def get_cv_keys(score_workloads: tuple[ScoreWorkload, ...]) -> tuple[CvKey, ...]:
+    return tuple(
+        [
+            (job_index, cv_index)
+            for job_index, score_workload in enumerate(score_workloads)
+            for cv_index in range(len(score_workload.cv_files))
+        ]
+    )
+
+
+def get_cv_usage_scope(
+    score_workloads: tuple[ScoreWorkload, ...],
+    cv_key: CvKey,
+    requirement_type: typing.Optional[str] = None,
+) -> UsageScope:
+    # the usage of every request is attributed to its job and cv
+    job_index, cv_index = cv_key
+    return UsageScope(
+        job_name=score_workloads[job_index].job_file.name,
+        cv_name=score_workloads[job_index].cv_files[cv_index].name,
+        requirement_type=requirement_type,
+    )
+
+
+def extract_requirements_in_realtime(job_text: str) -> JobRequirements:
+    answer = asyncio.run(
+        get_routed_answer_message_async(
+            get_prompt_to_extract_requirements(job_text),
+            PromptType.EXTRACT_REQUIREMENTS,
+            is_requirements_answer_accepted,
+        )
+    )
+    return parse_requirements_from_answer(answer.text)
+
+
+def parse_batch_requirements(
+    custom_id: str, answer_text: str, job_name: str, job_text: str
+) -> typing.Optional[JobRequirements]:
+    logger = LoggerFactory.get_logger()
+    try:
+        return parse_requirements_from_answer(answer_text)
+    except ValueError:
+        logger.warning(
+            f'The answer to request "{custom_id}" could not be parsed, extracting the requirements of job "{job_name}" in realtime'
+        )
+    try:
+        return UsageTracker.run_in_scope(
+            UsageScope(job_name=job_name),
+            lambda: extract_requirements_in_realtime(job_text),
+        )
+    except ValueError:
+        # a job without requirements cannot be scored, but the other jobs can
+        logger.error(
+            f'The requirements of job "{job_name}" could not be extracted, skipping the job'
+        )
+        return None
+
+
+def extract_job_requirements_in_batch(
+    endpoint: BatchEndpoint,
+    score_workloads: tuple[ScoreWorkload, ...],
+    job_texts: tuple[str, ...],
+) -> dict[int, JobRequirements]:
+    # extract the job requirements of all jobs without cached requirements in one batch
+    job_requirements: dict[int, JobRequirements] = {}
+    extraction_custom_ids: dict[str, int] = {}
+    for job_index, job_text in enumerate(job_texts):
+        cached_requirements = RequirementCache.get(job_text)
+        if cached_requirements is not None:
+            job_requirements[job_index] = cached_requirements
+            continue
+        extraction_custom_ids[
+            create_custom_id(PromptType.EXTRACT_REQUIREMENTS, (job_index,))
+        ] = job_index
+    extraction_answers = run_batch(
+        endpoint,
+        {
+            custom_id: get_prompt_to_extract_requirements(job_texts[job_index])
+            for custom_id, job_index in extraction_custom_ids.items()
+        },
+        {
+            custom_id: UsageScope(job_name=score_workloads[job_index].job_file.name)
+            for custom_id, job_index in extraction_custom_ids.items()
+        },
+    )
+    for custom_id, job_index in extraction_custom_ids.items():
+        job_name = score_workloads[job_index].job_file.name
+        requirements = parse_batch_requirements(
+            custom_id, extraction_answers[custom_id], job_name, job_texts[job_index]
+        )
+        if requirements is None:
+            continue
+        RequirementCache.set(job_texts[job_index], job_name, requirements)
+        job_requirements[job_index] = requirements
+    return job_requirements
+
+
+def score_requirement_batches_in_batch(
+    endpoint: BatchEndpoint,
+    score_workloads: tuple[ScoreWorkload, ...],
+    cv_texts: tuple[tuple[str, ...], ...],
+    requirement_batches: tuple[RequirementBatches, ...],
+) -> dict[RequirementKey, AggregatedScore]:
+    # score the requirements with the batched prompts first
+    scores: dict[RequirementKey, AggregatedScore] = {}
+    batched_prompt_keys: dict[str, tuple[int, int, int]] = {}
+    batched_prompts: dict[str, str] = {}
+    batched_usage_scopes: dict[str, UsageScope] = {}
+    for job_index, cv_index in get_cv_keys(score_workloads):
+        for batch_index, requirement_batch in enumerate(requirement_batches[job_index]):
+            if len(requirement_batch) < 2:
+                continue
+            if (
+                len(
+                    get_cv_chunks_to_match_requirements(
+                        cv_texts[job_index][cv_index], requirement_batch
+                    )
+                )
+                > 1
+            ):
+                # CVs that exceed the prompt token budget are scored in chunks later
+                continue
+            custom_id = create_custom_id(
+                PromptType.MATCH_REQUIREMENTS, (job_index, cv_index, batch_index)
+            )
+            batched_prompt_keys[custom_id] = (job_index, cv_index, batch_index)
+            batched_usage_scopes[custom_id] = get_cv_usage_scope(
+                score_workloads,
+                (job_index, cv_index),
+                get_requirement_type_of_batch(requirement_batch),
+            )
+            batched_prompts[custom_id] = get_prompt_to_match_requirements(
+                cv_texts[job_index][cv_index], requirement_batch
+            )
+    for custom_id, answer_text in run_batch(
+        endpoint, batched_prompts, batched_usage_scopes
+    ).items():
+        job_index, cv_index, batch_index = batched_prompt_keys[custom_id]
+        batch_scores = parse_batched_score_choices(
+            (answer_text,), len(requirement_batches[job_index][batch_index])
+        )
+        for requirement_index, requirement_score in batch_scores.items():
+            scores[(job_index, cv_index, batch_index, requirement_index)] = (
+                requirement_score
+            )
+    return scores
+
+
+def score_single_requirements_in_batch(
+    endpoint: BatchEndpoint,
+    score_workloads: tuple[ScoreWorkload, ...],
+    cv_texts: tuple[tuple[str, ...], ...],
+    requirement_batches: tuple[RequirementBatches, ...],
+    scored_requirement_keys: typing.Collection[RequirementKey],
+) -> dict[RequirementKey, AggregatedScore]:
+    # score the remaining requirements with single requirement prompts per CV chunk
+    single_prompt_keys: dict[str, RequirementKey] = {}
+    single_prompts: dict[str, str] = {}
+    single_usage_scopes: dict[str, UsageScope] = {}
+    for job_index, cv_index in get_cv_keys(score_workloads):
+        for batch_index, requirement_batch in enumerate(requirement_batches[job_index]):
+            for requirement_index, (requirement_type, requirement) in enumerate(
+                requirement_batch
+            ):
+                requirement_key = (job_index, cv_index, batch_index, requirement_index)
+                if requirement_key in scored_requirement_keys:
+                    continue
+                cv_chunks = get_cv_chunks_to_match_requirement(
+                    cv_texts[job_index][cv_index], requirement, requirement_type
+                )
+                for chunk_index, cv_chunk in enumerate(cv_chunks):
+                    custom_id = create_custom_id(
+                        PromptType.MATCH_REQUIREMENT, (*requirement_key, chunk_index)
+                    )
+                    single_prompt_keys[custom_id] = requirement_key
+                    single_usage_scopes[custom_id] = get_cv_usage_scope(
+                        score_workloads, (job_index, cv_index), requirement_type
+                    )
+                    single_prompts[custom_id] = get_prompt_to_match_requirement(
+                        cv_chunk, requirement, requirement_type
+                    )
+    chunk_scores: dict[RequirementKey, list[AggregatedScore]] = collections.defaultdict(
+        list
+    )
+    for custom_id, answer_text in run_batch(
+        endpoint, single_prompts, single_usage_scopes
+    ).items():
+        chunk_scores[single_prompt_keys[custom_id]].append(
+            parse_batch_score(custom_id, answer_text)
+        )
+    return {x: reduce_cv_chunk_scores(y) for x, y in chunk_scores.items()}
+
+
+def check_promising_candidates_in_batch(
+    endpoint: BatchEndpoint,
+    score_workloads: tuple[ScoreWorkload, ...],
+    requirement_batches: tuple[RequirementBatches, ...],
+    scores: dict[RequirementKey, AggregatedScore],
+) -> dict[CvKey, ApplicantMatch]:
+    # check if the candidates are promising in one batch
+    cv_keys = get_cv_keys(score_workloads)
+    requirement_matches = {
+        (job_index, cv_index): create_requirement_matches(
+            requirement_batches[job_index],
+            [
+                tuple(
+                    [
+                        scores[(job_index, cv_index, batch_index, requirement_index)]
+                        for requirement_index in range(len(requirement_batch))
+                    ]
+                )
+                for batch_index, requirement_batch in enumerate(
+                    requirement_batches[job_index]
+                )
+            ],
+        )
+        for job_index, cv_index in cv_keys
+    }
+    promising_answers = run_batch(
+        endpoint,
+        {
+            create_custom_id(PromptType.CHECK_IF_CANDIDATE_IS_PROMISING, cv_key): (
+                get_prompt_to_check_if_candidate_is_promising(
+                    requirement_matches[cv_key]
+                )
+            )
+            for cv_key in cv_keys
+        },
+        {
+            create_custom_id(
+                PromptType.CHECK_IF_CANDIDATE_IS_PROMISING, cv_key
+            ): get_cv_usage_scope(score_workloads, cv_key)
+            for cv_key in cv_keys
+        },
+    )
+    applicant_matches: dict[CvKey, ApplicantMatch] = {}
+    for cv_key in cv_keys:
+        custom_id = create_custom_id(PromptType.CHECK_IF_CANDIDATE_IS_PROMISING, cv_key)
+        applicant_matches[cv_key] = create_applicant_match(
+            requirement_matches[cv_key],
+            parse_batch_promising_choice(custom_id, promising_answers[custom_id]),
+        )
+    return applicant_matches
+
+
+def translate_applicant_matches(
+    applicant_matches: dict[CvKey, ApplicantMatch]
+) -> dict[CvKey, ApplicantMatch]:
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        return dict(
+            zip(
+                applicant_matches.keys(),
+                executor.map(translate_applicant_match, applicant_matches.values()),
+            )
+        )
+
+
+def score_applicants_in_batch_mode(
+    score_workloads: tuple[ScoreWorkload, ...]
+) -> dict[str, tuple[pl.DataFrame, dict[str, ApplicantMatch]]]:
+    TimingClock.start_timer(TaskType.COMPLETE_SCORING, TaskType.COMPLETE_SCORING.value)
+    UsageTracker.start_run()
+    for score_workload in score_workloads:
+        TimingClock.start_timer(TaskType.JOB_SCORING, score_workload.job_file.name)
+    endpoint = get_batch_endpoint()
+    job_texts, cv_texts = get_document_texts(score_workloads)
+    job_requirements = extract_job_requirements_in_batch(
+        endpoint, score_workloads, job_texts
+    )
+    for job_index, score_workload in enumerate(score_workloads):
+        if job_index not in job_requirements:
+            TimingClock.stop_timer(
+                TaskType.JOB_SCORING, score_workload.job_file.name, log_time=False
+            )
+    # only the jobs with requirements are scored
+    job_indices = sorted(job_requirements.keys())
+    score_workloads = tuple([score_workloads[x] for x in job_indices])
+    cv_texts = tuple([cv_texts[x] for x in job_indices])
+    requirement_batches = tuple(
+        [
+            get_requirement_batches(get_requirement_entries(job_requirements[x]))
+            for x in job_indices
+        ]
+    )
+    scores = score_requirement_batches_in_batch(
+        endpoint, score_workloads, cv_texts, requirement_batches
+    )
+    scores.update(
+        score_single_requirements_in_batch(
+            endpoint, score_workloads, cv_texts, requirement_batches, scores.keys()
+        )
+    )
+    translated_applicant_matches = translate_applicant_matches(
+        check_promising_candidates_in_batch(
+            endpoint, score_workloads, requirement_batches, scores
+        )
+    )
+    mapped_arguments = tuple(
+        [
+            tuple(
+                [
+                    translated_applicant_matches[(job_index, cv_index)]
+                    for cv_index in range(len(score_workload.cv_files))
+                ]
+            )
+            for job_index, score_workload in enumerate(score_workloads)
+        ]
+    )
+    for score_workload in score_workloads:
+        TimingClock.stop_timer(TaskType.JOB_SCORING, score_workload.job_file.name)
+    result_dict = create_score_result(score_workloads, mapped_arguments)
+    TimingClock.stop_timer(TaskType.COMPLETE_SCORING, TaskType.COMPLETE_SCORING.value)
+    CacheFactory.log_statistics()
+    return result_dict
@@ -0,0 +1,176 @@
+import datetime
+import json
+import pathlib
+
+import pytest
+
+import hrgpt.batching.batching
+import hrgpt.utils.requirement_cache_utils
+from hrgpt.batching.batching import (
+    check_promising_candidates_in_batch,
+    extract_job_requirements_in_batch,
+    get_document_texts,
+    score_requirement_batches_in_batch,
+    score_single_requirements_in_batch,
+)
+from hrgpt.config.config import RequirementBatchMode
+from hrgpt.matching.matching import get_requirement_batches, get_requirement_entries
+from hrgpt.utils.batch_utils import (
+    BatchRequestBody,
+    LocalBatchEndpoint,
+    get_last_user_message_content,
+    get_prompt_type_of_custom_id,
+)
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.type_utils import (
+    ChatMessage,
+    DocumentFileType,
+    File,
+    JobRequirementType,
+    PromptType,
+    Requirement,
+    RequirementType,
+    ScoreWorkload,
+)
+from hrgpt.utils.usage_utils import UsageTracker
+
+
+def create_answer(text: str) -> ChatMessage:
+    current_datetime = datetime.datetime.now(datetime.timezone.utc)
+    return generate_model_chat_message(
+        text, current_datetime, current_datetime, current_datetime
+    )
+
+
+def create_text_file(name: str, text: str) -> File:
+    return File(name=name, type=DocumentFileType.TEXT, content=text.encode("utf-8"))
+
+
+def create_requirements_answer_text() -> str:
+    return json.dumps(
+        {"hard_skills": [{"type": "mandatory", "specification": "Python"}]}
+    )
+
+
+def test_malformed_extraction_answers_fall_back_to_realtime_or_skip_the_job(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def respond(custom_id: str, body: BatchRequestBody) -> ChatMessage:
+        if "first job" in get_last_user_message_content(body):
+            return create_answer(create_requirements_answer_text())
+        return create_answer("I cannot answer this.")
+
+    async def get_routed_answer_message_async(
+        prompt: str, prompt_type: PromptType, *arguments: object
+    ) -> ChatMessage:
+        assert prompt_type == PromptType.EXTRACT_REQUIREMENTS
+        if "second job" in prompt:
+            return create_answer(create_requirements_answer_text())
+        return create_answer("I still cannot answer this.")
+
+    monkeypatch.setattr(
+        hrgpt.utils.requirement_cache_utils,
+        "get_generated_requirements_path",
+        lambda: str(tmp_path),
+    )
+    monkeypatch.setattr(
+        hrgpt.batching.batching,
+        "get_routed_answer_message_async",
+        get_routed_answer_message_async,
+    )
+    score_workloads = tuple(
+        [
+            ScoreWorkload(job_file=create_text_file(x, f"{x} description"), cv_files=())
+            for x in ("first job", "second job", "third job")
+        ]
+    )
+    job_texts, cv_texts = get_document_texts(score_workloads)
+    assert cv_texts == ((), (), ())
+    UsageTracker.start_run()
+    job_requirements = extract_job_requirements_in_batch(
+        LocalBatchEndpoint(str(tmp_path / "batches"), responder=respond),
+        score_workloads,
+        job_texts,
+    )
+    UsageTracker.finish_run()
+    # the second job is extracted in realtime and the third job is skipped
+    expected_requirements: dict[JobRequirementType, list[Requirement]] = {
+        "hard_skills": [
+            Requirement(type=RequirementType.MANDATORY, specification="Python")
+        ]
+    }
+    assert sorted(job_requirements.keys()) == [0, 1]
+    for job_index in (0, 1):
+        assert {
+            x: y for x, y in job_requirements[job_index].items() if len(y) > 0
+        } == expected_requirements
+
+
+def test_requirements_missing_in_batched_answers_are_scored_singly(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def respond(custom_id: str, body: BatchRequestBody) -> ChatMessage:
+        match get_prompt_type_of_custom_id(custom_id):
+            case PromptType.MATCH_REQUIREMENTS:
+                # the batched answer only contains the score of the first requirement
+                return create_answer(
+                    json.dumps([{"index": 0, "value": 80, "explanation": "Python"}])
+                )
+            case PromptType.MATCH_REQUIREMENT:
+                return create_answer(json.dumps({"value": 40, "explanation": "Other"}))
+            case PromptType.CHECK_IF_CANDIDATE_IS_PROMISING:
+                return create_answer("I cannot answer this.")
+            case _:
+                raise RuntimeError
+
+    config = AppConfigFactory.get_app_config()
+    monkeypatch.setattr(
+        config.generic_config.matching_config,
+        "requirement_batch_mode",
+        RequirementBatchMode.REQUIREMENT_TYPE,
+    )
+    job_requirements: dict[JobRequirementType, list[Requirement]] = {
+        "hard_skills": [
+            Requirement(type=RequirementType.MANDATORY, specification="Python"),
+            Requirement(type=RequirementType.MANDATORY, specification="SQL"),
+        ],
+        "soft_skills": [
+            Requirement(type=RequirementType.OPTIONAL, specification="Teamwork")
+        ],
+    }
+    requirement_batches = (
+        get_requirement_batches(get_requirement_entries(job_requirements)),
+    )
+    assert [len(x) for x in requirement_batches[0]] == [2, 1]
+    score_workloads = (
+        ScoreWorkload(
+            job_file=create_text_file("job", "job description"),
+            cv_files=(create_text_file("cv", "Python developer"),),
+        ),
+    )
+    cv_texts = (("Python developer",),)
+    endpoint = LocalBatchEndpoint(str(tmp_path / "batches"), responder=respond)
+    UsageTracker.start_run()
+    scores = score_requirement_batches_in_batch(
+        endpoint, score_workloads, cv_texts, requirement_batches
+    )
+    assert list(scores.keys()) == [(0, 0, 0, 0)]
+    scores.update(
+        score_single_requirements_in_batch(
+            endpoint, score_workloads, cv_texts, requirement_batches, scores.keys()
+        )
+    )
+    assert {x: y[0].value for x, y in scores.items()} == {
+        (0, 0, 0, 0): 80,
+        (0, 0, 0, 1): 40,
+        (0, 0, 1, 0): 40,
+    }
+    # an unparseable promising answer does not abort the scoring
+    applicant_matches = check_promising_candidates_in_batch(
+        endpoint, score_workloads, requirement_batches, scores
+    )
+    UsageTracker.finish_run()
+    assert list(applicant_matches.keys()) == [(0, 0)]
+    assert applicant_matches[(0, 0)].promising_result.promising is False
+    assert applicant_matches[(0, 0)].promising_agreement == 0.0
@@ -1,18 +1,110 @@
 import abc
+import datetime
 
-from hrgpt.utils.message_utils import generate_system_chat_message
-from hrgpt.utils.type_utils import StrippedString, ChatMessage, Author
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.config_utils import AppConfigFactory, get_model_for_model_enum
+from hrgpt.utils.message_utils import (
+    generate_system_chat_message,
+    generate_user_chat_message,
+    generate_model_chat_message,
+)
+from hrgpt.utils.rate_limit_utils import RateLimiter
+from hrgpt.utils.secret_utils import get_api_key_for_provider
+from hrgpt.utils.streaming_utils import AnswerStream
+from hrgpt.utils.token_utils import estimate_prompt_token_amount, estimate_token_amount
+from hrgpt.utils.type_utils import (
+    StrippedString,
+    ChatMessage,
+    Author,
+    AnswerFormat,
+    TokenUsage,
+)
 
 
 class Chat(abc.ABC):
-    def __init__(self, context: str) -> None:
+    def __init__(self, model: ModelEnum, context: str) -> None:
+        self.model = model
         self.chat_message_history: tuple[ChatMessage, ...] = ()
         self.set_context(context)
 
     @abc.abstractmethod
-    def send_prompt(self, prompt: str) -> ChatMessage:
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
         pass
 
+    @abc.abstractmethod
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        pass
+
+    def is_streaming_enabled(self) -> bool:
+        config = AppConfigFactory.get_app_config()
+        # only the first choice would be scanned while streaming
+        return config.llm_config.stream and config.llm_config.choices == 1
+
+    def estimate_token_usage(self, answer_text: str) -> TokenUsage:
+        # used if a stream is closed before the provider reports the usage
+        chat_message_history = self.get_chat_message_history(include_context=True)
+        return TokenUsage(
+            prompt_tokens=estimate_prompt_token_amount(
+                chat_message_history[:-1], chat_message_history[-1].text
+            ),
+            completion_tokens=estimate_token_amount(answer_text),
+        )
+
+    def get_api_key(self) -> str:
+        return get_api_key_for_provider(get_model_for_model_enum(self.model).provider)
+
+    def get_model_name(self) -> str:
+        return get_model_for_model_enum(self.model).name
+
+    def get_prompt_token_amount(self, prompt: str) -> int:
+        return estimate_prompt_token_amount(
+            self.get_chat_message_history(include_context=True), prompt
+        )
+
+    def wait_for_rate_limit(self, prompt: str) -> None:
+        RateLimiter.acquire(self.model, self.get_prompt_token_amount(prompt))
+
+    async def wait_for_rate_limit_async(self, prompt: str) -> None:
+        await RateLimiter.acquire_async(
+            self.model, self.get_prompt_token_amount(prompt)
+        )
+
+    def add_prompt_to_history(self, prompt: str) -> datetime.datetime:
+        before_datetime = datetime.datetime.now(datetime.timezone.utc)
+        user_chat_message = generate_user_chat_message(prompt, before_datetime)
+        self.add_chat_message_to_history(user_chat_message)
+        return before_datetime
+
+    def add_answer_stream_to_history(self, answer_stream: AnswerStream) -> ChatMessage:
+        after_datetime = datetime.datetime.now(datetime.timezone.utc)
+        if not answer_stream.stopped and not answer_stream.is_terminated_early():
+            raise RuntimeError
+        answer_text = answer_stream.get_text()
+        model_chat_message = generate_model_chat_message(
+            answer_text,
+            answer_stream.before_datetime,
+            (
+                answer_stream.creation_datetime
+                if answer_stream.creation_datetime is not None
+                else after_datetime
+            ),
+            after_datetime,
+            (
+                answer_stream.token_usage
+                if answer_stream.token_usage is not None
+                else self.estimate_token_usage(answer_text)
+            ),
+            answer_stream.time_to_first_token,
+            answer_stream.time_to_json,
+            self.model,
+        )
+        self.add_chat_message_to_history(model_chat_message)
+        return model_chat_message
+
     def get_chat_message_history(
         self, include_context: bool = False
     ) -> tuple[ChatMessage, ...]:
@@ -1,10 +1,12 @@
 import datetime
 import enum
+import typing
 
 import google.generativeai
 
 from hrgpt.chat.chat import Chat
-from hrgpt.config.config import Provider
+from hrgpt.config.config import Provider, ModelEnum
+from hrgpt.utils.client_utils import bind_google_client, cancel_google_response_stream
 from hrgpt.utils.config_utils import (
     get_temperature,
     get_top_probability,
@@ -12,12 +14,9 @@ from hrgpt.utils.config_utils import (
     AppConfigFactory,
     get_top_tokens,
 )
-from hrgpt.utils.message_utils import (
-    generate_user_chat_message,
-    generate_model_chat_message,
-)
-from hrgpt.utils.secret_utils import get_api_key_for_provider
-from hrgpt.utils.type_utils import ChatMessage, Author
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.streaming_utils import AnswerStream
+from hrgpt.utils.type_utils import ChatMessage, Author, TokenUsage, AnswerFormat
 
 
 class FinishReason(enum.Enum):
@@ -53,24 +52,32 @@ def transform_chat_message_history_to_google_chat_messages(
     return dict_list
 
 
+def get_token_usage_of_google_response(
+    model_response: google.generativeai.types.GenerateContentResponse,
+) -> TokenUsage:
+    usage_metadata = model_response.usage_metadata
+    if usage_metadata is None:
+        return TokenUsage()
+    return TokenUsage(
+        prompt_tokens=usage_metadata.prompt_token_count,
+        completion_tokens=usage_metadata.candidates_token_count,
+        cached_prompt_tokens=getattr(usage_metadata, "cached_content_token_count", 0),
+    )
+
+
 class GoogleChat(Chat):
-    def __init__(self) -> None:
+    def __init__(self, model: ModelEnum) -> None:
         config = AppConfigFactory.get_app_config()
-        if (
-            get_model_for_model_enum(config.llm_config.model).provider
-            != Provider.GOOGLE
-        ):
+        if get_model_for_model_enum(model).provider != Provider.GOOGLE:
             raise ValueError
-        super().__init__(config.llm_config.system_context)
-        google.generativeai.configure(api_key=get_api_key_for_provider())
+        super().__init__(model, config.llm_config.system_context)
 
-    def send_prompt(self, prompt: str) -> ChatMessage:
+    def get_generative_model(
+        self, asynchronous: bool, answer_format: AnswerFormat
+    ) -> google.generativeai.GenerativeModel:
         config = AppConfigFactory.get_app_config()
-        before_datetime = datetime.datetime.now(datetime.timezone.utc)
-        user_chat_message = generate_user_chat_message(prompt, before_datetime)
-        self.add_chat_message_to_history(user_chat_message)
         model = google.generativeai.GenerativeModel(
-            get_model_for_model_enum(config.llm_config.model).name,
+            self.get_model_name(),
             generation_config=google.generativeai.GenerationConfig(
                 candidate_count=config.llm_config.choices,
                 stop_sequences=config.llm_config.stop_sequences,
@@ -87,26 +94,122 @@ class GoogleChat(Chat):
                 top_k=get_top_tokens(
                     config.llm_config.deterministic, config.llm_config.top_tokens
                 ),
+                response_mime_type=(
+                    "application/json"
+                    if config.generic_config.decoding_config.native_json_mode
+                    and answer_format != AnswerFormat.TEXT
+                    else "text/plain"
+                ),
             ),
         )
-        google_chat_messages = transform_chat_message_history_to_google_chat_messages(
+        # use the pooled clients of the api key instead of the global configuration
+        return bind_google_client(model, self.get_api_key(), asynchronous)
+
+    def get_google_chat_messages(self) -> list[google.generativeai.types.ContentDict]:
+        return transform_chat_message_history_to_google_chat_messages(
             self.get_chat_message_history(include_context=True)
         )
-        chat = model.start_chat(history=google_chat_messages[:-1])
-        model_response = chat.send_message(google_chat_messages[-1])
+
+    def get_request_options(self) -> dict[str, typing.Any]:
+        config = AppConfigFactory.get_app_config()
+        # retries are done by the chat utilities with jittered backoff
+        return {
+            "retry": None,
+            "timeout": config.generic_config.network_config.attempt_timeout_seconds,
+        }
+
+    def add_model_response_to_history(
+        self,
+        model_response: google.generativeai.types.GenerateContentResponse,
+        before_datetime: datetime.datetime,
+    ) -> ChatMessage:
         after_datetime = datetime.datetime.now(datetime.timezone.utc)
-        model_response_choice = model_response.candidates[0]
-        if (
-            len(model_response_choice.content.parts) != 1
-            or model_response_choice.finish_reason.value != FinishReason.STOP.value
-        ):
+        # every completed candidate is kept for self-consistency scoring
+        choice_texts = tuple(
+            [
+                x.content.parts[0].text
+                for x in model_response.candidates
+                if len(x.content.parts) == 1
+                and x.finish_reason.value == FinishReason.STOP.value
+            ]
+        )
+        if len(choice_texts) == 0:
             raise RuntimeError
         creation_datetime = after_datetime
         model_chat_message = generate_model_chat_message(
-            model_response_choice.content.parts[0].text,
+            choice_texts[0],
             before_datetime,
             creation_datetime,
             after_datetime,
+            get_token_usage_of_google_response(model_response),
+            model=self.model,
+            choice_texts=choice_texts,
         )
         self.add_chat_message_to_history(model_chat_message)
         return model_chat_message
+
+    def add_model_chunk_to_answer_stream(
+        self,
+        model_chunk: (
+            google.generativeai.types.GenerateContentResponse
+            | google.generativeai.types.AsyncGenerateContentResponse
+        ),
+        answer_stream: AnswerStream,
+    ) -> bool:
+        answer_stream.token_usage = get_token_usage_of_google_response(model_chunk)
+        if len(model_chunk.candidates) == 0:
+            return False
+        model_chunk_choice = model_chunk.candidates[0]
+        if model_chunk_choice.finish_reason.value == FinishReason.STOP.value:
+            answer_stream.stopped = True
+        return answer_stream.add_text(
+            "".join([x.text for x in model_chunk_choice.content.parts])
+        )
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        model = self.get_generative_model(
+            asynchronous=False, answer_format=answer_format
+        )
+        if self.is_streaming_enabled():
+            answer_stream = AnswerStream(answer_format, before_datetime)
+            model_response = model.generate_content(
+                self.get_google_chat_messages(),
+                stream=True,
+                request_options=self.get_request_options(),
+            )
+            for model_chunk in model_response:
+                if self.add_model_chunk_to_answer_stream(model_chunk, answer_stream):
+                    cancel_google_response_stream(model_response)
+                    break
+            return self.add_answer_stream_to_history(answer_stream)
+        model_response = model.generate_content(
+            self.get_google_chat_messages(), request_options=self.get_request_options()
+        )
+        return self.add_model_response_to_history(model_response, before_datetime)
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        model = self.get_generative_model(
+            asynchronous=True, answer_format=answer_format
+        )
+        if self.is_streaming_enabled():
+            answer_stream = AnswerStream(answer_format, before_datetime)
+            model_stream_response = await model.generate_content_async(
+                self.get_google_chat_messages(),
+                stream=True,
+                request_options=self.get_request_options(),
+            )
+            async for model_chunk in model_stream_response:
+                if self.add_model_chunk_to_answer_stream(model_chunk, answer_stream):
+                    cancel_google_response_stream(model_stream_response)
+                    break
+            return self.add_answer_stream_to_history(answer_stream)
+        model_response = await model.generate_content_async(
+            self.get_google_chat_messages(), request_options=self.get_request_options()
+        )
+        return self.add_model_response_to_history(model_response, before_datetime)
@@ -5,7 +5,8 @@ import openai
 import openai.types.chat
 
 from hrgpt.chat.chat import Chat
-from hrgpt.config.config import Provider
+from hrgpt.config.config import Provider, ModelEnum, ResponseFormatDict
+from hrgpt.utils.client_utils import get_openai_client, get_async_openai_client
 from hrgpt.utils.config_utils import (
     get_temperature,
     get_seed,
@@ -13,12 +14,9 @@ from hrgpt.utils.config_utils import (
     get_model_for_model_enum,
     AppConfigFactory,
 )
-from hrgpt.utils.message_utils import (
-    generate_user_chat_message,
-    generate_model_chat_message,
-)
-from hrgpt.utils.secret_utils import get_api_key_for_provider
-from hrgpt.utils.type_utils import ChatMessage, Author
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.streaming_utils import AnswerStream
+from hrgpt.utils.type_utils import ChatMessage, Author, TokenUsage, AnswerFormat
 
 OpenaiChatMessageDict = typing.Union[
     openai.types.chat.ChatCompletionSystemMessageParam,
@@ -59,63 +57,162 @@ def transform_chat_message_history_to_openai_chat_messages(
     return dict_list
 
 
+def get_token_usage_of_openai_response(
+    model_response: (
+        openai.types.chat.ChatCompletion | openai.types.chat.ChatCompletionChunk
+    ),
+) -> TokenUsage:
+    if model_response.usage is None:
+        return TokenUsage()
+    # the details are only sent by the api and not yet typed in the client
+    prompt_tokens_details = getattr(model_response.usage, "prompt_tokens_details", None)
+    if isinstance(prompt_tokens_details, dict):
+        cached_prompt_tokens = prompt_tokens_details.get("cached_tokens")
+    else:
+        cached_prompt_tokens = getattr(prompt_tokens_details, "cached_tokens", None)
+    return TokenUsage(
+        prompt_tokens=model_response.usage.prompt_tokens,
+        completion_tokens=model_response.usage.completion_tokens,
+        cached_prompt_tokens=cached_prompt_tokens or 0,
+    )
+
+
 class OpenaiChat(Chat):
-    def __init__(self) -> None:
+    def __init__(self, model: ModelEnum) -> None:
+        config = AppConfigFactory.get_app_config()
+        if get_model_for_model_enum(model).provider != Provider.OPENAI:
+            raise ValueError
+        super().__init__(model, config.llm_config.system_context)
+
+    def get_response_format(self, answer_format: AnswerFormat) -> ResponseFormatDict:
         config = AppConfigFactory.get_app_config()
         if (
-            get_model_for_model_enum(config.llm_config.model).provider
-            != Provider.OPENAI
+            config.generic_config.decoding_config.native_json_mode
+            and answer_format == AnswerFormat.JSON_OBJECT
         ):
-            raise ValueError
-        super().__init__(config.llm_config.system_context)
-        self.openai = openai.OpenAI(
-            api_key=get_api_key_for_provider(),
-            max_retries=config.generic_config.network_config.retry_amount,
-        )
+            # the json mode only supports objects as the top level value
+            return {"type": "json_object"}
+        return config.llm_config.response_format
 
-    def send_prompt(self, prompt: str) -> ChatMessage:
+    def get_completion_arguments(
+        self, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> dict[str, typing.Any]:
         config = AppConfigFactory.get_app_config()
-        before_datetime = datetime.datetime.now(datetime.timezone.utc)
-        user_chat_message = generate_user_chat_message(prompt, before_datetime)
-        self.add_chat_message_to_history(user_chat_message)
-        model_response = self.openai.chat.completions.create(
-            model=get_model_for_model_enum(config.llm_config.model).name,
-            messages=transform_chat_message_history_to_openai_chat_messages(
+        return {
+            "model": self.get_model_name(),
+            "messages": transform_chat_message_history_to_openai_chat_messages(
                 self.get_chat_message_history(include_context=True)
             ),
-            temperature=min(
+            "temperature": min(
                 2.0,
                 get_temperature(
                     config.llm_config.deterministic, config.llm_config.temperature
                 ),
             ),
-            stop=list(config.llm_config.stop_sequences),
-            seed=get_seed(config.llm_config.deterministic),
-            top_p=get_top_probability(
+            "stop": list(config.llm_config.stop_sequences),
+            "seed": get_seed(config.llm_config.deterministic),
+            "top_p": get_top_probability(
                 config.llm_config.deterministic, config.llm_config.top_probability
             ),
-            max_tokens=config.llm_config.max_tokens,
-            n=config.llm_config.choices,
-            frequency_penalty=config.llm_config.frequency_penalty,
-            logit_bias=config.llm_config.logit_bias,
-            presence_penalty=config.llm_config.presence_penalty,
-            response_format=config.llm_config.response_format,
-        )
+            "max_tokens": config.llm_config.max_tokens,
+            "n": config.llm_config.choices,
+            "frequency_penalty": config.llm_config.frequency_penalty,
+            "logit_bias": config.llm_config.logit_bias,
+            "presence_penalty": config.llm_config.presence_penalty,
+            "response_format": self.get_response_format(answer_format),
+        }
+
+    def add_model_response_to_history(
+        self,
+        model_response: openai.types.chat.ChatCompletion,
+        before_datetime: datetime.datetime,
+    ) -> ChatMessage:
         after_datetime = datetime.datetime.now(datetime.timezone.utc)
-        model_response_choice = model_response.choices[0]
-        if (
-            model_response_choice.message.content is None
-            or model_response_choice.finish_reason != "stop"
-        ):
+        # every completed choice is kept for self-consistency scoring
+        choice_texts = tuple(
+            [
+                x.message.content
+                for x in model_response.choices
+                if x.message.content is not None and x.finish_reason == "stop"
+            ]
+        )
+        if len(choice_texts) == 0:
             raise RuntimeError
         creation_datetime = datetime.datetime.fromtimestamp(
             model_response.created, datetime.timezone.utc
         )
         model_chat_message = generate_model_chat_message(
-            model_response_choice.message.content,
+            choice_texts[0],
             before_datetime,
             creation_datetime,
             after_datetime,
+            get_token_usage_of_openai_response(model_response),
+            model=self.model,
+            choice_texts=choice_texts,
         )
         self.add_chat_message_to_history(model_chat_message)
         return model_chat_message
+
+    def add_model_chunk_to_answer_stream(
+        self,
+        model_chunk: openai.types.chat.ChatCompletionChunk,
+        answer_stream: AnswerStream,
+    ) -> bool:
+        answer_stream.creation_datetime = datetime.datetime.fromtimestamp(
+            model_chunk.created, datetime.timezone.utc
+        )
+        if model_chunk.usage is not None:
+            answer_stream.token_usage = get_token_usage_of_openai_response(model_chunk)
+        if len(model_chunk.choices) == 0:
+            return False
+        model_chunk_choice = model_chunk.choices[0]
+        if model_chunk_choice.finish_reason == "stop":
+            answer_stream.stopped = True
+        return answer_stream.add_text(model_chunk_choice.delta.content)
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        openai_client = get_openai_client(self.get_api_key())
+        if self.is_streaming_enabled():
+            answer_stream = AnswerStream(answer_format, before_datetime)
+            # leaving the context closes the connection and stops the generation
+            with openai_client.chat.completions.create(
+                **self.get_completion_arguments(answer_format),
+                stream=True,
+                stream_options={"include_usage": True},
+            ) as model_stream:
+                for model_chunk in model_stream:
+                    if self.add_model_chunk_to_answer_stream(
+                        model_chunk, answer_stream
+                    ):
+                        break
+            return self.add_answer_stream_to_history(answer_stream)
+        model_response = openai_client.chat.completions.create(
+            **self.get_completion_arguments(answer_format)
+        )
+        return self.add_model_response_to_history(model_response, before_datetime)
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        openai_client = get_async_openai_client(self.get_api_key())
+        if self.is_streaming_enabled():
+            answer_stream = AnswerStream(answer_format, before_datetime)
+            async with await openai_client.chat.completions.create(
+                **self.get_completion_arguments(answer_format),
+                stream=True,
+                stream_options={"include_usage": True},
+            ) as model_stream:
+                async for model_chunk in model_stream:
+                    if self.add_model_chunk_to_answer_stream(
+                        model_chunk, answer_stream
+                    ):
+                        break
+            return self.add_answer_stream_to_history(answer_stream)
+        model_response = await openai_client.chat.completions.create(
+            **self.get_completion_arguments(answer_format)
+        )
+        return self.add_model_response_to_history(model_response, before_datetime)
@@ -0,0 +1,72 @@
+import time
+import typing
+
+from hrgpt.chat.chat import Chat
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.replay_utils import (
+    CassetteFactory,
+    get_chat_cassette_key,
+    wait_for_recorded_latency,
+    wait_for_recorded_latency_async,
+)
+from hrgpt.utils.type_utils import ChatMessage, AnswerFormat
+
+
+class ReplayChat(Chat):
+    def __init__(
+        self, model: ModelEnum, recorded_chat: typing.Optional[Chat] = None
+    ) -> None:
+        # answers of the recorded chat are written to the cassette, otherwise they are replayed from it
+        config = AppConfigFactory.get_app_config()
+        super().__init__(model, config.llm_config.system_context)
+        self.recorded_chat = recorded_chat
+
+    def get_cassette_key(self, prompt: str, answer_format: AnswerFormat) -> str:
+        return get_chat_cassette_key(
+            self.model,
+            answer_format,
+            self.get_chat_message_history(include_context=True),
+            prompt,
+        )
+
+    def add_answer_to_history(self, prompt: str, answer: ChatMessage) -> ChatMessage:
+        self.add_prompt_to_history(prompt)
+        self.add_chat_message_to_history(answer)
+        return answer
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        cassette = CassetteFactory.get_cassette()
+        cassette_key = self.get_cassette_key(prompt, answer_format)
+        if self.recorded_chat is not None:
+            start_time = time.monotonic()
+            answer = self.recorded_chat.send_prompt(prompt, answer_format)
+            cassette.record(
+                cassette_key, answer.model_dump_json(), time.monotonic() - start_time
+            )
+            return self.add_answer_to_history(prompt, answer)
+        entry = cassette.replay(cassette_key)
+        wait_for_recorded_latency(entry)
+        return self.add_answer_to_history(
+            prompt, ChatMessage.model_validate_json(entry.value)
+        )
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        cassette = CassetteFactory.get_cassette()
+        cassette_key = self.get_cassette_key(prompt, answer_format)
+        if self.recorded_chat is not None:
+            start_time = time.monotonic()
+            answer = await self.recorded_chat.send_prompt_async(prompt, answer_format)
+            cassette.record(
+                cassette_key, answer.model_dump_json(), time.monotonic() - start_time
+            )
+            return self.add_answer_to_history(prompt, answer)
+        entry = cassette.replay(cassette_key)
+        await wait_for_recorded_latency_async(entry)
+        return self.add_answer_to_history(
+            prompt, ChatMessage.model_validate_json(entry.value)
+        )
@@ -1,10 +1,11 @@
 import datetime
+import typing
 
 import pydantic
-import replicate
 
 from hrgpt.chat.chat import Chat
-from hrgpt.config.config import Provider
+from hrgpt.config.config import Provider, ModelEnum
+from hrgpt.utils.client_utils import get_replicate_client, get_async_replicate_client
 from hrgpt.utils.config_utils import (
     get_top_tokens,
     get_top_probability,
@@ -13,12 +14,8 @@ from hrgpt.utils.config_utils import (
     get_model_for_model_enum,
     AppConfigFactory,
 )
-from hrgpt.utils.message_utils import (
-    generate_user_chat_message,
-    generate_model_chat_message,
-)
-from hrgpt.utils.secret_utils import get_api_key_for_provider
-from hrgpt.utils.type_utils import StrippedString, Author, ChatMessage
+from hrgpt.utils.streaming_utils import AnswerStream
+from hrgpt.utils.type_utils import StrippedString, Author, ChatMessage, AnswerFormat
 
 
 class ReplicateChatMessage(pydantic.BaseModel):
@@ -27,20 +24,11 @@ class ReplicateChatMessage(pydantic.BaseModel):
 
 
 class ReplicateChat(Chat):
-    def __init__(self) -> None:
+    def __init__(self, model: ModelEnum) -> None:
         config = AppConfigFactory.get_app_config()
-        if (
-            get_model_for_model_enum(config.llm_config.model).provider
-            != Provider.REPLICATE
-        ):
+        if get_model_for_model_enum(model).provider != Provider.REPLICATE:
             raise ValueError
-        super().__init__(config.llm_config.system_context)
-        self.replicate = replicate.Client(
-            api_token=get_api_key_for_provider(),
-        )
-        self.replicate._client._transport.max_attempts = (
-            config.generic_config.network_config.retry_amount
-        )
+        super().__init__(model, config.llm_config.system_context)
 
     def transform_chat_messages_to_replicate_chat_object(self) -> ReplicateChatMessage:
         prompts = []
@@ -55,42 +43,76 @@ class ReplicateChat(Chat):
             system_prompt=self.get_context(), prompt="\n".join(prompts)
         )
 
-    def send_prompt(self, prompt: str) -> ChatMessage:
+    def get_prediction_input(self) -> dict[str, typing.Any]:
         config = AppConfigFactory.get_app_config()
-        before_datetime = datetime.datetime.now(datetime.timezone.utc)
-        user_chat_message = generate_user_chat_message(prompt, before_datetime)
-        self.add_chat_message_to_history(user_chat_message)
-        output_parts = self.replicate.run(
-            get_model_for_model_enum(config.llm_config.model).name,
-            {
-                **self.transform_chat_messages_to_replicate_chat_object().model_dump(
-                    mode="json"
-                ),
-                "debug": config.llm_config.debug,
-                "top_k": get_top_tokens(
-                    config.llm_config.deterministic, config.llm_config.top_tokens
-                ),
-                "top_p": get_top_probability(
-                    config.llm_config.deterministic, config.llm_config.top_probability
+        return {
+            **self.transform_chat_messages_to_replicate_chat_object().model_dump(
+                mode="json"
+            ),
+            "debug": config.llm_config.debug,
+            "top_k": get_top_tokens(
+                config.llm_config.deterministic, config.llm_config.top_tokens
+            ),
+            "top_p": get_top_probability(
+                config.llm_config.deterministic, config.llm_config.top_probability
+            ),
+            "temperature": max(
+                0.01,
+                get_temperature(
+                    config.llm_config.deterministic, config.llm_config.temperature
                 ),
-                "temperature": max(
-                    0.01,
-                    get_temperature(
-                        config.llm_config.deterministic, config.llm_config.temperature
-                    ),
-                ),
-                "max_new_tokens": config.llm_config.max_tokens,
-                "min_new_tokens": config.llm_config.min_tokens,
-                "seed": get_seed(config.llm_config.deterministic),
-                "stop_sequences": ",".join(
-                    [f"<{x}>" for x in config.llm_config.stop_sequences]
-                ),
-                "repetition_penalty": config.llm_config.repetition_penalty,
-            },
+            ),
+            "max_new_tokens": config.llm_config.max_tokens,
+            "min_new_tokens": config.llm_config.min_tokens,
+            "seed": get_seed(config.llm_config.deterministic),
+            "stop_sequences": ",".join(
+                [f"<{x}>" for x in config.llm_config.stop_sequences]
+            ),
+            "repetition_penalty": config.llm_config.repetition_penalty,
+        }
+
+    def create_answer_stream(
+        self, answer_format: AnswerFormat, before_datetime: datetime.datetime
+    ) -> AnswerStream:
+        if not self.is_streaming_enabled():
+            answer_format = AnswerFormat.TEXT
+        return AnswerStream(answer_format, before_datetime)
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        replicate_client = get_replicate_client(self.get_api_key())
+        output = replicate_client.run(
+            self.get_model_name(),
+            self.get_prediction_input(),
         )
-        after_datetime = datetime.datetime.now(datetime.timezone.utc)
-        model_chat_message = generate_model_chat_message(
-            "".join(output_parts), before_datetime, after_datetime, after_datetime
+        answer_stream = self.create_answer_stream(answer_format, before_datetime)
+        # the output of language models is an iterator that polls the prediction
+        for output_part in output:
+            if answer_stream.add_text(output_part):
+                break
+        else:
+            answer_stream.stopped = True
+        return self.add_answer_stream_to_history(answer_stream)
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        replicate_client = get_async_replicate_client(self.get_api_key())
+        output = await replicate_client.async_run(
+            self.get_model_name(),
+            self.get_prediction_input(),
         )
-        self.add_chat_message_to_history(model_chat_message)
-        return model_chat_message
+        answer_stream = self.create_answer_stream(answer_format, before_datetime)
+        answer_stream.stopped = True
+        if hasattr(output, "__aiter__"):
+            async for output_part in output:
+                if answer_stream.add_text(output_part):
+                    break
+        else:
+            for output_part in output:
+                if answer_stream.add_text(output_part):
+                    break
+        return self.add_answer_stream_to_history(answer_stream)
@@ -10,6 +10,7 @@ from hrgpt.utils.type_utils import (
     NonNegativeIntWithDefault,
     JobRequirementType,
     ScoreValue,
+    PromptType,
 )
 
 WeightingInt = typing.Annotated[int, pydantic.Field(gt=0)]
@@ -29,11 +30,13 @@ class Provider(enum.StrEnum):
     OPENAI = enum.auto()
     REPLICATE = enum.auto()
     GOOGLE = enum.auto()
+    REPLAY = enum.auto()
 
 
 class Model(pydantic.BaseModel):
     provider: Provider
     name: StrippedString
+    context_window: PositiveInt
 
 
 class ModelEnum(enum.StrEnum):
@@ -76,16 +79,21 @@ class ModelConfiguration(pydantic.BaseModel):
     stop_sequences: tuple[StrippedString, ...]
     temperature: TemperatureFloat
     response_format: ResponseFormatDict
+    stream: bool
     repetition_penalty: RepetitionPenaltyFloat
 
 
 NonEmptyJobRequirementDict = typing.Annotated[
     JobRequirementDict, pydantic.Field(min_length=1)
 ]
+UtilizationFloat = typing.Annotated[float, pydantic.Field(gt=0.0, le=1.0)]
 
 
 class PrettifyConfiguration(pydantic.BaseModel):
     enable_llm_prettification: bool
+    enable_layout_normalization: bool
+    # the language model only prettifies normalized texts below this quality
+    min_layout_quality: UtilizationFloat
 
 
 class ScoreConfiguration(pydantic.BaseModel):
@@ -109,19 +117,163 @@ class LoggingConfiguration(pydantic.BaseModel):
     loggers_to_disable_propagation: tuple[str, ...]
 
 
+PositiveFloat = typing.Annotated[float, pydantic.Field(gt=0.0)]
+
+
+class RateLimitConfiguration(pydantic.BaseModel):
+    requests_per_minute: PositiveInt
+    tokens_per_minute: PositiveInt
+
+
+class HedgingConfiguration(pydantic.BaseModel):
+    enabled: bool
+    latency_percentile: UtilizationFloat
+    latency_window_size: PositiveInt
+    min_latency_samples: PositiveInt
+    min_delay_seconds: PositiveFloat
+    max_hedged_request_ratio: UtilizationFloat
+
+
 class NetworkConfiguration(pydantic.BaseModel):
     retry_amount: PositiveInt
+    attempt_timeout_seconds: PositiveFloat
+    retry_base_delay_seconds: PositiveFloat
+    retry_max_delay_seconds: PositiveFloat
+    hedging_config: HedgingConfiguration
+    max_concurrent_requests: PositiveInt
+    max_keepalive_connections: PositiveInt
+    keepalive_expiry_seconds: PositiveInt
+    rate_limit_utilization: UtilizationFloat
+    rate_limit_burst_seconds: PositiveFloat
+    provider_rate_limits: dict[Provider, RateLimitConfiguration]
+    model_rate_limits: dict[ModelEnum, RateLimitConfiguration]
+
+
+class PersistentCacheConfiguration(pydantic.BaseModel):
+    enabled: bool
+    max_entries: PositiveInt
+    time_to_live_seconds: PositiveInt
+
+
+class CacheConfiguration(pydantic.BaseModel):
+    response_cache: PersistentCacheConfiguration
+    document_text_cache: PersistentCacheConfiguration
+    translation_cache: PersistentCacheConfiguration
+    requirement_cache: PersistentCacheConfiguration
+
+
+class ParsingConfiguration(pydantic.BaseModel):
+    # documents are parsed in the calling thread without a process pool
+    use_process_pool: bool
+    # the amount of CPUs is used if not set
+    max_processes: typing.Optional[PositiveInt]
+    pdf_pages_per_task: PositiveInt
+    # smaller pdfs are sent to every task instead of being shared via a temporary file
+    min_shared_file_bytes: PositiveInt
+
+
+class PromptLayout(enum.StrEnum):
+    TEMPLATE = enum.auto()
+    CV_PREFIX = enum.auto()
 
 
 class PromptConfiguration(pydantic.BaseModel):
+    prompt_layout: PromptLayout
     prettify_text_prompt: StrippedString
     extract_requirements_prompt: StrippedString
     match_requirement_prompt: StrippedString
+    match_requirements_prompt: StrippedString
+    cv_prefix_prompt: StrippedString
+    match_requirement_after_cv_prompt: StrippedString
+    match_requirements_after_cv_prompt: StrippedString
     check_if_candidate_is_promising_prompt: StrippedString
 
 
+class RequirementBatchMode(enum.StrEnum):
+    NONE = enum.auto()
+    REQUIREMENT_TYPE = enum.auto()
+    JOB = enum.auto()
+
+
+class MatchingConfiguration(pydantic.BaseModel):
+    requirement_batch_mode: RequirementBatchMode
+
+
+class DecodingConfiguration(pydantic.BaseModel):
+    # request the native JSON mode of the provider for answers in JSON
+    native_json_mode: bool
+    # repair trailing commas and code fences if an answer is not valid JSON
+    repair_answers: bool
+
+
+class RetrievalConfiguration(pydantic.BaseModel):
+    # retrieval sends every requirement a different excerpt of the CV, which breaks the
+    # prompt prefix shared by the cv_prefix layout, so it only applies to the template layout
+    enabled: bool
+    top_sections: PositiveInt
+    # shorter CVs are always sent completely
+    min_cv_characters: PositiveInt
+    full_cv_requirement_types: tuple[JobRequirementType, ...]
+
+
+class RoutingPolicy(pydantic.BaseModel):
+    # the models are tried in order until an answer is accepted
+    models: typing.Annotated[tuple[ModelEnum, ...], pydantic.Field(min_length=1)]
+    uncertain_score_range: typing.Optional[tuple[ScoreValue, ScoreValue]]
+    # escalates if the choices of an answer disagree by more than this
+    max_score_spread: typing.Optional[ScoreValue]
+
+
+class TokenBudgetConfiguration(pydantic.BaseModel):
+    enabled: bool
+    # caps the prompt size below the context window to bound the cost of a prompt
+    max_prompt_tokens: typing.Optional[PositiveInt]
+    # covers the difference between the local token count and the provider
+    reserved_tokens: PositiveInt
+
+
+class RoutingConfiguration(pydantic.BaseModel):
+    policies: dict[PromptType, RoutingPolicy]
+
+
+class BatchEndpointType(enum.StrEnum):
+    OPENAI = enum.auto()
+    LOCAL = enum.auto()
+
+
+class BatchConfiguration(pydantic.BaseModel):
+    endpoint: BatchEndpointType
+    completion_window: typing.Literal["24h"]
+    poll_interval_seconds: PositiveFloat
+    max_requests_per_batch: PositiveInt
+    max_batch_file_bytes: PositiveInt
+
+
+class ReplayMode(enum.StrEnum):
+    OFF = enum.auto()
+    RECORD = enum.auto()
+    REPLAY = enum.auto()
+
+
+class ReplayConfiguration(pydantic.BaseModel):
+    mode: ReplayMode
+    cassette_name: StrippedString
+    # sleeps for the recorded latency of every replayed answer
+    inject_latency: bool
+
+
+class LanguageDetectionConfiguration(pydantic.BaseModel):
+    # ISO 639-1 codes of the languages to detect, all languages are detected if empty
+    candidate_languages: tuple[StrippedString, ...]
+    preload_language_models: bool
+    sample_length: PositiveInt
+    # below this confidence the language of the whole text is detected
+    min_sample_confidence: UtilizationFloat
+
+
 class LanguageConfiguration(pydantic.BaseModel):
     output_language: StrippedString
+    language_detection_config: LanguageDetectionConfiguration
 
 
 class GenericConfiguration(pydantic.BaseModel):
@@ -130,8 +282,17 @@ class GenericConfiguration(pydantic.BaseModel):
     polars_config: PolarsConfiguration
     logging_config: LoggingConfiguration
     network_config: NetworkConfiguration
+    cache_config: CacheConfiguration
+    parsing_config: ParsingConfiguration
     job_requirements_config: NonEmptyJobRequirementDict
     prompt_config: PromptConfiguration
+    matching_config: MatchingConfiguration
+    decoding_config: DecodingConfiguration
+    retrieval_config: RetrievalConfiguration
+    token_budget_config: TokenBudgetConfiguration
+    routing_config: RoutingConfiguration
+    batch_config: BatchConfiguration
+    replay_config: ReplayConfiguration
     language_config: LanguageConfiguration
 
 
@@ -1,11 +1,14 @@
+import asyncio
 import typing
 
+import pydantic
+
+from hrgpt.logger.logger import LoggerFactory
 from hrgpt.prompting.prompting import get_prompt_to_extract_requirements
-from hrgpt.utils.chat_utils import get_answer_message
-from hrgpt.utils.extraction_utils import (
-    extract_json_object_from_string,
-    get_document_text,
-)
+from hrgpt.utils.chat_utils import get_routed_answer_message_async
+from hrgpt.utils.decoding_utils import decode_json_answer, TypeAdapterFactory
+from hrgpt.utils.extraction_utils import get_document_text
+from hrgpt.utils.requirement_cache_utils import RequirementCache
 from hrgpt.utils.sample_utils import get_empty_requirements
 from hrgpt.utils.timing_utils import TimingClock, TaskType
 from hrgpt.utils.type_utils import (
@@ -13,20 +16,16 @@ from hrgpt.utils.type_utils import (
     VALID_JOB_REQUIREMENT_TYPES,
     JobRequirementType,
     File,
+    PromptType,
+    ChatMessage,
 )
 
 
-def get_requirements_from_job_description(
-    job_file: File,
+def parse_requirements_from_answer(
+    answer_text: str,
 ) -> dict[JobRequirementType, list[Requirement]]:
-    TimingClock.start_timer(TaskType.REQUIREMENT_EXTRACTION, job_file.name)
-    # generate the extraction prompt
-    job_description_text = get_document_text(job_file)
-    prompt = get_prompt_to_extract_requirements(job_description_text)
-    # send the prompt to the model
-    answer = get_answer_message(prompt)
     # extract the JSON object from the answer
-    extracted_json_object = extract_json_object_from_string(answer.text)
+    extracted_json_object = decode_json_answer(answer_text, dict[str, typing.Any])
     # validate the structure and transform the JSON object from the answer
     job_requirements = get_empty_requirements()
     for requirement_type, requirements in extracted_json_object.items():
@@ -44,8 +43,46 @@ def get_requirements_from_job_description(
                 # each requirement should be an object
                 continue
             # validate the requirement
-            requirement_object = Requirement.model_validate(requirement)
+            try:
+                requirement_object = TypeAdapterFactory.get_type_adapter(
+                    Requirement
+                ).validate_python(requirement)
+            except pydantic.ValidationError:
+                # a malformed requirement does not invalidate the others
+                continue
             # add the requirement
             job_requirements[job_requirement_type].append(requirement_object)
+    return job_requirements
+
+
+def is_requirements_answer_accepted(answer: ChatMessage) -> bool:
+    try:
+        parse_requirements_from_answer(answer.text)
+    except ValueError:
+        return False
+    return True
+
+
+async def get_requirements_from_job_description_async(
+    job_file: File,
+) -> dict[JobRequirementType, list[Requirement]]:
+    TimingClock.start_timer(TaskType.REQUIREMENT_EXTRACTION, job_file.name)
+    # generate the extraction prompt
+    job_description_text = await asyncio.to_thread(get_document_text, job_file)
+    cached_job_requirements = RequirementCache.get(job_description_text)
+    if cached_job_requirements is not None:
+        LoggerFactory.get_logger().debug(
+            f'The requirements of job "{job_file.name}" were taken from the requirement cache'
+        )
+        TimingClock.stop_timer(TaskType.REQUIREMENT_EXTRACTION, job_file.name)
+        return cached_job_requirements
+    prompt = get_prompt_to_extract_requirements(job_description_text)
+    # send the prompt to the model
+    answer = await get_routed_answer_message_async(
+        prompt, PromptType.EXTRACT_REQUIREMENTS, is_requirements_answer_accepted
+    )
+    # parse the job requirements from the answer
+    job_requirements = parse_requirements_from_answer(answer.text)
+    RequirementCache.set(job_description_text, job_file.name, job_requirements)
     TimingClock.stop_timer(TaskType.REQUIREMENT_EXTRACTION, job_file.name)
     return job_requirements
@@ -4,7 +4,9 @@ import os.path
 import sys
 
 from hrgpt.config.config import LoggingConfiguration
+from hrgpt.utils.config_utils import AppConfigFactory
 from hrgpt.utils.path_utils import get_repo_root_path
+from hrgpt.utils.testing_utils import is_test_running
 
 
 class LoggerType(enum.StrEnum):
@@ -50,6 +52,10 @@ class LoggerFactory:
     def get_logger(
         cls, logger_type: LoggerType = LoggerType.APPLICATION
     ) -> logging.Logger:
+        if logger_type not in cls.logger_dict and is_test_running():
+            cls.initialize_loggers(
+                AppConfigFactory.get_app_config().generic_config.logging_config
+            )
         if logger_type not in cls.logger_dict:
             raise RuntimeError
         return cls.logger_dict[logger_type]
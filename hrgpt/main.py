@@ -1,4 +1,5 @@
 from hrgpt.anonymization.anonymization import anonymize_applicant_documents
+from hrgpt.batching.batching import score_applicants_in_batch_mode
 from hrgpt.evaluation.evaluation import produce_evaluation_output
 from hrgpt.scoring.scoring import score_applicants
 from hrgpt.utils.argument_utils import get_args
@@ -12,7 +13,9 @@ def main() -> None:
     # get the arguments
     args = get_args()
     # start the correct execution path
-    if args.target == "scoring":
+    if args.target == "scoring" and args.mode == "batch":
+        score_applicants_in_batch_mode(get_score_workloads(args.job, args.candidate))
+    elif args.target == "scoring":
         score_applicants(get_score_workloads(args.job, args.candidate))
     elif args.target == "anonymization":
         anonymize_applicant_documents()
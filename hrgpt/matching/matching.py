@@ -1,77 +1,413 @@
+import asyncio
 import collections
+import functools
+import typing
 
+import pydantic
+
+from hrgpt.config.config import RequirementBatchMode
+from hrgpt.logger.logger import LoggerFactory
 from hrgpt.prompting.prompting import (
     get_prompt_to_match_requirement,
+    get_prompt_to_match_requirements,
+    get_cv_chunks_to_match_requirement,
+    get_cv_chunks_to_match_requirements,
     get_prompt_to_check_if_candidate_is_promising,
 )
-from hrgpt.utils.chat_utils import get_answer_messages, get_answer_message
-from hrgpt.utils.config_utils import AppConfigFactory
-from hrgpt.utils.extraction_utils import (
-    extract_json_object_from_string,
-    get_document_text,
+from hrgpt.utils.chat_utils import (
+    get_routed_answer_message_async,
+    get_routed_answer_messages_async,
+    get_routing_policy,
 )
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.decoding_utils import decode_json_answer, TypeAdapterFactory
+from hrgpt.utils.extraction_utils import get_document_text
 from hrgpt.utils.math_utils import clamp_int
-from hrgpt.utils.score_utils import compute_total_score
+from hrgpt.utils.message_utils import get_choice_texts
+from hrgpt.utils.score_utils import (
+    compute_total_score,
+    aggregate_scores,
+    aggregate_promising_results,
+)
 from hrgpt.utils.timing_utils import TimingClock, TaskType
 from hrgpt.utils.translation_utils import translate_applicant_match
 from hrgpt.utils.type_utils import (
     Score,
+    IndexedScore,
     PromisingResult,
     RequirementMatch,
     ApplicantMatch,
     JobRequirementType,
     Requirement,
     File,
+    PromptType,
+    ChatMessage,
+    ScoreValue,
+    AnswerFormat,
 )
+from hrgpt.utils.usage_utils import UsageTracker
+
+RequirementEntry = tuple[JobRequirementType, Requirement]
+AggregatedScore = tuple[Score, ScoreValue]
 
 
-def match_job_requirements_to_cv_file(
+def get_requirement_entries(
     job_requirements: dict[JobRequirementType, list[Requirement]],
-    cv_file: File,
-) -> ApplicantMatch:
-    TimingClock.start_timer(TaskType.APPLICANT_MATCHING, cv_file.name)
-    cv_text = get_document_text(cv_file)
-    requirement_matches = collections.defaultdict(list)
+) -> tuple[RequirementEntry, ...]:
     app_config = AppConfigFactory.get_app_config()
-    prompts = []
+    requirement_entries: tuple[RequirementEntry, ...] = ()
     for requirement_type in app_config.generic_config.job_requirements_config.keys():
         if requirement_type not in job_requirements:
             continue
         for requirement in job_requirements[requirement_type]:
-            prompt = get_prompt_to_match_requirement(
-                cv_text, requirement, requirement_type
-            )
-            prompts.append((requirement_type, requirement, prompt))
-    prompt_answers = zip(
-        [x[0] for x in prompts],
-        [x[1] for x in prompts],
-        get_answer_messages(tuple([x[2] for x in prompts])),
+            requirement_entries += ((requirement_type, requirement),)
+    return requirement_entries
+
+
+def get_requirement_batches(
+    requirement_entries: tuple[RequirementEntry, ...],
+) -> tuple[tuple[RequirementEntry, ...], ...]:
+    app_config = AppConfigFactory.get_app_config()
+    match app_config.generic_config.matching_config.requirement_batch_mode:
+        case RequirementBatchMode.NONE:
+            return tuple([(x,) for x in requirement_entries])
+        case RequirementBatchMode.REQUIREMENT_TYPE:
+            requirement_type_batches: dict[
+                JobRequirementType, tuple[RequirementEntry, ...]
+            ] = collections.defaultdict(tuple)
+            for requirement_entry in requirement_entries:
+                requirement_type_batches[requirement_entry[0]] += (requirement_entry,)
+            return tuple(requirement_type_batches.values())
+        case RequirementBatchMode.JOB:
+            return (requirement_entries,) if len(requirement_entries) > 0 else ()
+        case _:
+            raise RuntimeError
+
+
+def clamp_score(score: Score) -> Score:
+    app_config = AppConfigFactory.get_app_config()
+    score.value = clamp_int(
+        score.value,
+        min_value=app_config.generic_config.score_config.minimum_score_value,
+        max_value=app_config.generic_config.score_config.maximum_score_value,
     )
-    for requirement_type, requirement, answer in prompt_answers:
-        requirement_score = Score.model_validate(
-            extract_json_object_from_string(answer.text)
+    return score
+
+
+def parse_score(text: str) -> Score:
+    return clamp_score(decode_json_answer(text, Score))
+
+
+def parse_batched_scores(text: str, requirement_amount: int) -> dict[int, Score]:
+    scores: dict[int, Score] = {}
+    try:
+        json_array = decode_json_answer(text, list[typing.Any], AnswerFormat.JSON_ARRAY)
+    except ValueError:
+        return scores
+    for element in json_array:
+        if not isinstance(element, dict):
+            # each score should be an object
+            continue
+        try:
+            indexed_score = TypeAdapterFactory.get_type_adapter(
+                IndexedScore
+            ).validate_python(element)
+        except pydantic.ValidationError:
+            continue
+        if not 0 <= indexed_score.index < requirement_amount:
+            # the index must refer to a requirement of the batch
+            continue
+        if indexed_score.index in scores:
+            # only the first score of a requirement is used
+            continue
+        scores[indexed_score.index] = clamp_score(
+            Score(value=indexed_score.value, explanation=indexed_score.explanation)
         )
-        requirement_score.value = clamp_int(
-            requirement_score.value,
-            min_value=app_config.generic_config.score_config.minimum_score_value,
-            max_value=app_config.generic_config.score_config.maximum_score_value,
+    return scores
+
+
+def parse_score_choices(texts: typing.Sequence[str]) -> AggregatedScore:
+    scores: list[Score] = []
+    for text in texts:
+        try:
+            scores.append(parse_score(text))
+        except ValueError:
+            # unparseable choices are ignored if another choice can be used
+            continue
+    if len(scores) == 0:
+        raise ValueError
+    return aggregate_scores(scores)
+
+
+def parse_score_choices_or_minimum(
+    texts: typing.Sequence[str], request_description: str
+) -> AggregatedScore:
+    try:
+        return parse_score_choices(texts)
+    except ValueError:
+        # a single unparseable answer must not abort the scoring of the whole CV
+        LoggerFactory.get_logger().warning(
+            f"The answer to {request_description} could not be parsed, using the minimum score"
         )
-        requirement_match = RequirementMatch(
-            score=requirement_score, requirement=requirement
+        app_config = AppConfigFactory.get_app_config()
+        return (
+            Score(
+                value=app_config.generic_config.score_config.minimum_score_value,
+                explanation="The answer of the model could not be parsed",
+            ),
+            0,
         )
-        requirement_matches[requirement_type].append(requirement_match)
-    answer = get_answer_message(
-        get_prompt_to_check_if_candidate_is_promising(requirement_matches)
+
+
+def parse_batched_score_choices(
+    texts: typing.Sequence[str], requirement_amount: int
+) -> dict[int, AggregatedScore]:
+    choice_scores: dict[int, list[Score]] = collections.defaultdict(list)
+    for text in texts:
+        for index, score in parse_batched_scores(text, requirement_amount).items():
+            choice_scores[index].append(score)
+    return {x: aggregate_scores(y) for x, y in choice_scores.items()}
+
+
+def parse_promising_choices(
+    texts: typing.Sequence[str],
+) -> tuple[PromisingResult, float]:
+    promising_results: list[PromisingResult] = []
+    for text in texts:
+        try:
+            promising_results.append(decode_json_answer(text, PromisingResult))
+        except ValueError:
+            continue
+    if len(promising_results) == 0:
+        raise ValueError
+    return aggregate_promising_results(promising_results)
+
+
+def parse_promising_choices_or_not_promising(
+    texts: typing.Sequence[str], request_description: str
+) -> tuple[PromisingResult, float]:
+    try:
+        return parse_promising_choices(texts)
+    except ValueError:
+        LoggerFactory.get_logger().warning(
+            f"The answer to {request_description} could not be parsed, the candidate is not promising"
+        )
+        return (
+            PromisingResult(
+                promising=False,
+                explanation="The answer of the model could not be parsed",
+            ),
+            0.0,
+        )
+
+
+def is_score_uncertain(
+    aggregated_score: AggregatedScore, prompt_type: PromptType
+) -> bool:
+    routing_policy = get_routing_policy(prompt_type)
+    score, score_spread = aggregated_score
+    if (
+        routing_policy.max_score_spread is not None
+        and score_spread > routing_policy.max_score_spread
+    ):
+        return True
+    if routing_policy.uncertain_score_range is None:
+        return False
+    return (
+        routing_policy.uncertain_score_range[0]
+        <= score.value
+        <= routing_policy.uncertain_score_range[1]
     )
-    promising_result = PromisingResult.model_validate(
-        extract_json_object_from_string(answer.text)
+
+
+def is_final_model_answer(answer: ChatMessage, prompt_type: PromptType) -> bool:
+    return answer.model == get_routing_policy(prompt_type).models[-1]
+
+
+def is_score_answer_accepted(answer: ChatMessage) -> bool:
+    try:
+        aggregated_score = parse_score_choices(get_choice_texts(answer))
+    except ValueError:
+        return False
+    return not is_score_uncertain(aggregated_score, PromptType.MATCH_REQUIREMENT)
+
+
+def is_batched_score_answer_accepted(
+    answer: ChatMessage, requirement_amount: int
+) -> bool:
+    return (
+        len(parse_batched_score_choices(get_choice_texts(answer), requirement_amount))
+        > 0
+    )
+
+
+def is_promising_answer_accepted(answer: ChatMessage) -> bool:
+    try:
+        parse_promising_choices(get_choice_texts(answer))
+    except ValueError:
+        return False
+    return True
+
+
+async def score_requirement_batch_of_cv_chunk_async(
+    cv_text: str, requirement_batch: tuple[RequirementEntry, ...]
+) -> tuple[AggregatedScore, ...]:
+    scores: dict[int, AggregatedScore] = {}
+    if len(requirement_batch) > 1:
+        answer = await get_routed_answer_message_async(
+            get_prompt_to_match_requirements(cv_text, requirement_batch),
+            PromptType.MATCH_REQUIREMENTS,
+            functools.partial(
+                is_batched_score_answer_accepted,
+                requirement_amount=len(requirement_batch),
+            ),
+        )
+        scores = parse_batched_score_choices(
+            get_choice_texts(answer), len(requirement_batch)
+        )
+        if not is_final_model_answer(answer, PromptType.MATCH_REQUIREMENTS):
+            # uncertain scores are escalated with single requirement prompts
+            scores = {
+                x: y
+                for x, y in scores.items()
+                if not is_score_uncertain(y, PromptType.MATCH_REQUIREMENTS)
+            }
+    missing_indices = [x for x in range(len(requirement_batch)) if x not in scores]
+    if len(requirement_batch) > 1 and len(missing_indices) > 0:
+        LoggerFactory.get_logger().debug(
+            f"The batched answer missed or was uncertain about {len(missing_indices)} of {len(requirement_batch)} requirements, falling back to single requirement prompts"
+        )
+    answers = await get_routed_answer_messages_async(
+        tuple(
+            [
+                get_prompt_to_match_requirement(
+                    cv_text, requirement_batch[x][1], requirement_batch[x][0]
+                )
+                for x in missing_indices
+            ]
+        ),
+        PromptType.MATCH_REQUIREMENT,
+        is_score_answer_accepted,
+    )
+    for index, answer in zip(missing_indices, answers):
+        scores[index] = parse_score_choices_or_minimum(
+            get_choice_texts(answer),
+            f'the requirement "{requirement_batch[index][1].specification}"',
+        )
+    return tuple([scores[x] for x in range(len(requirement_batch))])
+
+
+def reduce_cv_chunk_scores(
+    chunk_scores: typing.Sequence[AggregatedScore],
+) -> AggregatedScore:
+    # a requirement is covered if any chunk of the CV covers it
+    return max(chunk_scores, key=lambda x: x[0].value)
+
+
+def get_cv_chunks_to_score_requirement_batch(
+    cv_text: str, requirement_batch: tuple[RequirementEntry, ...]
+) -> tuple[str, ...]:
+    if len(requirement_batch) > 1:
+        return get_cv_chunks_to_match_requirements(cv_text, requirement_batch)
+    return get_cv_chunks_to_match_requirement(
+        cv_text, requirement_batch[0][1], requirement_batch[0][0]
+    )
+
+
+def get_requirement_type_of_batch(
+    requirement_batch: tuple[RequirementEntry, ...]
+) -> typing.Optional[str]:
+    requirement_types = set([x[0] for x in requirement_batch])
+    return requirement_types.pop() if len(requirement_types) == 1 else None
+
+
+async def score_requirement_batch_async(
+    cv_text: str, requirement_batch: tuple[RequirementEntry, ...]
+) -> tuple[AggregatedScore, ...]:
+    UsageTracker.start_requirement_type(
+        get_requirement_type_of_batch(requirement_batch)
     )
+    cv_chunks = get_cv_chunks_to_score_requirement_batch(cv_text, requirement_batch)
+    if len(cv_chunks) > 1:
+        LoggerFactory.get_logger().debug(
+            f"The CV exceeds the prompt token budget and is scored in {len(cv_chunks)} chunks"
+        )
+    chunk_scores = await asyncio.gather(
+        *[
+            score_requirement_batch_of_cv_chunk_async(x, requirement_batch)
+            for x in cv_chunks
+        ]
+    )
+    return tuple(
+        [
+            reduce_cv_chunk_scores([x[index] for x in chunk_scores])
+            for index in range(len(requirement_batch))
+        ]
+    )
+
+
+def create_requirement_matches(
+    requirement_batches: tuple[tuple[RequirementEntry, ...], ...],
+    batch_scores: typing.Sequence[tuple[AggregatedScore, ...]],
+) -> dict[JobRequirementType, list[RequirementMatch]]:
+    requirement_matches: dict[JobRequirementType, list[RequirementMatch]] = (
+        collections.defaultdict(list)
+    )
+    for requirement_batch, scores in zip(requirement_batches, batch_scores):
+        for (requirement_type, requirement), (
+            requirement_score,
+            requirement_score_spread,
+        ) in zip(requirement_batch, scores):
+            requirement_match = RequirementMatch(
+                score=requirement_score,
+                requirement=requirement,
+                score_spread=requirement_score_spread,
+            )
+            requirement_matches[requirement_type].append(requirement_match)
+    return requirement_matches
+
+
+def create_applicant_match(
+    requirement_matches: dict[JobRequirementType, list[RequirementMatch]],
+    promising_choice: tuple[PromisingResult, float],
+) -> ApplicantMatch:
+    promising_result, promising_agreement = promising_choice
     total_score = compute_total_score(requirement_matches)
-    applicant_match = ApplicantMatch(
+    return ApplicantMatch(
         total_score=total_score,
         promising_result=promising_result,
+        promising_agreement=promising_agreement,
         requirement_matches=requirement_matches,
     )
-    translated_applicant_match = translate_applicant_match(applicant_match)
+
+
+async def match_job_requirements_to_cv_file_async(
+    job_requirements: dict[JobRequirementType, list[Requirement]],
+    cv_file: File,
+) -> ApplicantMatch:
+    TimingClock.start_timer(TaskType.APPLICANT_MATCHING, cv_file.name)
+    UsageTracker.start_cv(cv_file.name)
+    cv_text = await asyncio.to_thread(get_document_text, cv_file)
+    requirement_batches = get_requirement_batches(
+        get_requirement_entries(job_requirements)
+    )
+    batch_scores = await asyncio.gather(
+        *[score_requirement_batch_async(cv_text, x) for x in requirement_batches]
+    )
+    requirement_matches = create_requirement_matches(requirement_batches, batch_scores)
+    answer = await get_routed_answer_message_async(
+        get_prompt_to_check_if_candidate_is_promising(requirement_matches),
+        PromptType.CHECK_IF_CANDIDATE_IS_PROMISING,
+        is_promising_answer_accepted,
+    )
+    applicant_match = create_applicant_match(
+        requirement_matches,
+        parse_promising_choices_or_not_promising(
+            get_choice_texts(answer), f'the promising check of CV "{cv_file.name}"'
+        ),
+    )
+    translated_applicant_match = await asyncio.to_thread(
+        translate_applicant_match, applicant_match
+    )
     TimingClock.stop_timer(TaskType.APPLICANT_MATCHING, cv_file.name)
     return translated_applicant_match
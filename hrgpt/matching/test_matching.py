@@ -0,0 +1,226 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+import hrgpt.matching.matching
+import hrgpt.utils.chat_utils
+from hrgpt.chat.chat import Chat
+from hrgpt.config.config import ModelEnum, RoutingPolicy
+from hrgpt.matching.matching import (
+    match_job_requirements_to_cv_file_async,
+    score_requirement_batch_of_cv_chunk_async,
+)
+from hrgpt.utils.chat_utils import get_routed_answer_message_async
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.rate_limit_utils import RateLimiter
+from hrgpt.utils.type_utils import (
+    AnswerFormat,
+    ApplicantMatch,
+    ChatMessage,
+    DocumentFileType,
+    File,
+    PromptType,
+    Requirement,
+    RequirementType,
+)
+
+
+def create_unparseable_answer() -> ChatMessage:
+    current_datetime = datetime.datetime.now(datetime.timezone.utc)
+    return generate_model_chat_message(
+        "I cannot answer this.", current_datetime, current_datetime, current_datetime
+    )
+
+
+def test_unparseable_final_answers_do_not_abort_the_cv(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def get_routed_answer_message_async(
+        prompt: str, prompt_type: PromptType, *arguments: object
+    ) -> ChatMessage:
+        return create_unparseable_answer()
+
+    async def get_routed_answer_messages_async(
+        prompts: tuple[str, ...], prompt_type: PromptType, *arguments: object
+    ) -> tuple[ChatMessage, ...]:
+        return tuple([create_unparseable_answer() for _ in prompts])
+
+    monkeypatch.setattr(
+        hrgpt.matching.matching,
+        "get_routed_answer_message_async",
+        get_routed_answer_message_async,
+    )
+    monkeypatch.setattr(
+        hrgpt.matching.matching,
+        "get_routed_answer_messages_async",
+        get_routed_answer_messages_async,
+    )
+    monkeypatch.setattr(
+        hrgpt.matching.matching, "get_document_text", lambda file: "Python developer"
+    )
+    monkeypatch.setattr(
+        hrgpt.matching.matching, "translate_applicant_match", lambda x: x
+    )
+    applicant_match: ApplicantMatch = asyncio.run(
+        match_job_requirements_to_cv_file_async(
+            {
+                "hard_skills": [
+                    Requirement(type=RequirementType.MANDATORY, specification=x)
+                    for x in ("Python", "Kafka")
+                ]
+            },
+            File(name="cv", type=DocumentFileType.TEXT, content=b"Python developer"),
+        )
+    )
+    # the requirements get the minimum score and the candidate is not promising
+    minimum_score_value = (
+        AppConfigFactory.get_app_config().generic_config.score_config.minimum_score_value
+    )
+    assert [
+        x.score.value for x in applicant_match.requirement_matches["hard_skills"]
+    ] == [
+        minimum_score_value,
+        minimum_score_value,
+    ]
+    assert not applicant_match.promising_result.promising
+    assert applicant_match.promising_agreement == 0.0
+
+
+class RoutingStubChat(Chat):
+    sent_prompts: list[tuple[ModelEnum, str]] = []
+    answer_batches_with_first_model = True
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        raise NotImplementedError
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        RoutingStubChat.sent_prompts.append((self.model, prompt))
+        is_first_model = self.model == ModelEnum.GPT_35_TURBO
+        if "Rust" in prompt and "Kafka" in prompt:
+            if is_first_model and not RoutingStubChat.answer_batches_with_first_model:
+                answer_text = "I cannot answer this."
+            else:
+                # the score of the second requirement is uncertain
+                answer_text = json.dumps(
+                    [
+                        {"index": 0, "value": 90, "explanation": "Rust"},
+                        {"index": 1, "value": 50, "explanation": "Kafka"},
+                    ]
+                )
+        else:
+            answer_text = json.dumps(
+                {"value": 50 if is_first_model else 55, "explanation": "Kafka"}
+            )
+        after_datetime = datetime.datetime.now(datetime.timezone.utc)
+        return generate_model_chat_message(
+            answer_text,
+            before_datetime,
+            after_datetime,
+            after_datetime,
+            model=self.model,
+        )
+
+
+@pytest.fixture
+def routing_stub_chat(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def acquire_async(model_enum: ModelEnum, prompt_token_amount: int) -> None:
+        pass
+
+    config = AppConfigFactory.get_app_config()
+    routing_policy = RoutingPolicy(
+        models=(ModelEnum.GPT_35_TURBO, ModelEnum.GPT_4O),
+        uncertain_score_range=(40, 60),
+        max_score_spread=None,
+    )
+    monkeypatch.setattr(
+        config.generic_config.routing_config,
+        "policies",
+        {
+            PromptType.MATCH_REQUIREMENTS: routing_policy,
+            PromptType.MATCH_REQUIREMENT: routing_policy,
+        },
+    )
+    monkeypatch.setattr(
+        config.generic_config.network_config.hedging_config, "enabled", False
+    )
+    monkeypatch.setattr(RateLimiter, "acquire_async", acquire_async)
+    monkeypatch.setattr(hrgpt.utils.chat_utils, "get_response_cache", lambda: None)
+    monkeypatch.setattr(
+        hrgpt.utils.chat_utils,
+        "get_chat",
+        lambda model: RoutingStubChat(model, config.llm_config.system_context),
+    )
+    monkeypatch.setattr(RoutingStubChat, "sent_prompts", [])
+
+
+@pytest.mark.usefixtures("routing_stub_chat")
+def test_routed_answers_escalate_until_the_last_model() -> None:
+    answer = asyncio.run(
+        get_routed_answer_message_async(
+            "Kafka", PromptType.MATCH_REQUIREMENT, lambda x: True
+        )
+    )
+    assert answer.model == ModelEnum.GPT_35_TURBO
+    # the answer of the last model is used although it is not accepted either
+    answer = asyncio.run(
+        get_routed_answer_message_async(
+            "Kafka", PromptType.MATCH_REQUIREMENT, lambda x: False
+        )
+    )
+    assert answer.model == ModelEnum.GPT_4O
+    assert [x for x, _ in RoutingStubChat.sent_prompts] == [
+        ModelEnum.GPT_35_TURBO,
+        ModelEnum.GPT_35_TURBO,
+        ModelEnum.GPT_4O,
+    ]
+
+
+@pytest.mark.parametrize(
+    "answer_batches_with_first_model,expected_scores,expected_models",
+    [
+        # the uncertain batched score is escalated with a single requirement prompt
+        (
+            True,
+            [90, 55],
+            [ModelEnum.GPT_35_TURBO, ModelEnum.GPT_35_TURBO, ModelEnum.GPT_4O],
+        ),
+        # the uncertain score of the last model is kept
+        (False, [90, 50], [ModelEnum.GPT_35_TURBO, ModelEnum.GPT_4O]),
+    ],
+)
+@pytest.mark.usefixtures("routing_stub_chat")
+def test_uncertain_batched_scores_are_scored_again(
+    monkeypatch: pytest.MonkeyPatch,
+    answer_batches_with_first_model: bool,
+    expected_scores: list[int],
+    expected_models: list[ModelEnum],
+) -> None:
+    monkeypatch.setattr(
+        RoutingStubChat,
+        "answer_batches_with_first_model",
+        answer_batches_with_first_model,
+    )
+    scores = asyncio.run(
+        score_requirement_batch_of_cv_chunk_async(
+            "Go developer",
+            tuple(
+                [
+                    (
+                        "hard_skills",
+                        Requirement(type=RequirementType.MANDATORY, specification=x),
+                    )
+                    for x in ("Rust", "Kafka")
+                ]
+            ),
+        )
+    )
+    assert [x[0].value for x in scores] == expected_scores
+    assert [x for x, _ in RoutingStubChat.sent_prompts] == expected_models
@@ -1,15 +1,31 @@
+import functools
+import typing
+
+from hrgpt.config.config import PromptLayout
+from hrgpt.utils.chat_utils import get_routing_policy
 from hrgpt.utils.config_utils import AppConfigFactory
 from hrgpt.utils.prompting_utils import (
     replace_placeholders,
     DynamicPlaceholder,
+    DynamicPlaceholderConfiguration,
     create_dynamic_placeholders_from_requirement_matches,
     create_dynamic_placeholders_from_requirement,
+    create_dynamic_placeholders_from_requirements,
     create_dynamic_placeholders_from_requirement_type,
 )
+from hrgpt.utils.retrieval_utils import get_relevant_cv_text
+from hrgpt.utils.token_utils import (
+    is_prompt_within_budget,
+    compress_text,
+    estimate_token_amount,
+    get_prompt_token_budget,
+    split_text_into_chunks,
+)
 from hrgpt.utils.type_utils import (
     Requirement,
     RequirementMatch,
     JobRequirementType,
+    PromptType,
 )
 
 
@@ -29,22 +45,120 @@ def get_prompt_to_extract_requirements(job_text: str) -> str:
     )
 
 
+def get_cv_prefix_prompt(cv_text: str) -> str:
+    app_config = AppConfigFactory.get_app_config()
+    return replace_placeholders(
+        app_config.generic_config.prompt_config.cv_prefix_prompt,
+        dynamic_placeholders=((DynamicPlaceholder.CV_TEXT, cv_text),),
+    )
+
+
+def create_prompt_with_cv(
+    cv_text: str,
+    template_text: str,
+    after_cv_template_text: str,
+    dynamic_placeholders: DynamicPlaceholderConfiguration,
+) -> str:
+    app_config = AppConfigFactory.get_app_config()
+    match app_config.generic_config.prompt_config.prompt_layout:
+        case PromptLayout.TEMPLATE:
+            return replace_placeholders(
+                template_text,
+                dynamic_placeholders=(
+                    (DynamicPlaceholder.CV_TEXT, cv_text),
+                    *dynamic_placeholders,
+                ),
+            )
+        case PromptLayout.CV_PREFIX:
+            # the CV comes first, so all prompts of a CV share a cacheable prefix
+            return "\n\n".join(
+                [
+                    get_cv_prefix_prompt(cv_text),
+                    replace_placeholders(
+                        after_cv_template_text,
+                        dynamic_placeholders=dynamic_placeholders,
+                    ),
+                ]
+            )
+        case _:
+            raise RuntimeError
+
+
 def get_prompt_to_match_requirement(
     cv_text: str,
     requirement: Requirement,
     requirement_type: JobRequirementType,
 ) -> str:
     app_config = AppConfigFactory.get_app_config()
-    return replace_placeholders(
+    return create_prompt_with_cv(
+        get_relevant_cv_text(cv_text, ((requirement_type, requirement),)),
         app_config.generic_config.prompt_config.match_requirement_prompt,
+        app_config.generic_config.prompt_config.match_requirement_after_cv_prompt,
         dynamic_placeholders=(
-            (DynamicPlaceholder.CV_TEXT, cv_text),
             *create_dynamic_placeholders_from_requirement(requirement),
             *create_dynamic_placeholders_from_requirement_type(requirement_type),
         ),
     )
 
 
+def get_prompt_to_match_requirements(
+    cv_text: str,
+    requirements: tuple[tuple[JobRequirementType, Requirement], ...],
+) -> str:
+    app_config = AppConfigFactory.get_app_config()
+    return create_prompt_with_cv(
+        get_relevant_cv_text(cv_text, requirements),
+        app_config.generic_config.prompt_config.match_requirements_prompt,
+        app_config.generic_config.prompt_config.match_requirements_after_cv_prompt,
+        dynamic_placeholders=(
+            *create_dynamic_placeholders_from_requirements(requirements),
+        ),
+    )
+
+
+def get_cv_chunks_within_budget(
+    cv_text: str, create_prompt: typing.Callable[[str], str], prompt_type: PromptType
+) -> tuple[str, ...]:
+    models = get_routing_policy(prompt_type).models
+    if is_prompt_within_budget(create_prompt(cv_text), models):
+        return (cv_text,)
+    compressed_cv_text = compress_text(cv_text)
+    if is_prompt_within_budget(create_prompt(compressed_cv_text), models):
+        return (compressed_cv_text,)
+    # the CV is split into chunks that fit into the prompt of every routed model
+    cv_token_budget = min(
+        [get_prompt_token_budget(x) for x in models]
+    ) - estimate_token_amount(create_prompt(""))
+    return split_text_into_chunks(compressed_cv_text, cv_token_budget)
+
+
+def get_cv_chunks_to_match_requirement(
+    cv_text: str,
+    requirement: Requirement,
+    requirement_type: JobRequirementType,
+) -> tuple[str, ...]:
+    return get_cv_chunks_within_budget(
+        cv_text,
+        functools.partial(
+            get_prompt_to_match_requirement,
+            requirement=requirement,
+            requirement_type=requirement_type,
+        ),
+        PromptType.MATCH_REQUIREMENT,
+    )
+
+
+def get_cv_chunks_to_match_requirements(
+    cv_text: str,
+    requirements: tuple[tuple[JobRequirementType, Requirement], ...],
+) -> tuple[str, ...]:
+    return get_cv_chunks_within_budget(
+        cv_text,
+        functools.partial(get_prompt_to_match_requirements, requirements=requirements),
+        PromptType.MATCH_REQUIREMENTS,
+    )
+
+
 def get_prompt_to_check_if_candidate_is_promising(
     requirement_matches: dict[JobRequirementType, list[RequirementMatch]]
 ) -> str:
@@ -1,39 +1,43 @@
+import asyncio
 import collections
-import concurrent.futures
-import functools
+import typing
 
 import polars as pl
 
-from hrgpt.extraction.extraction import get_requirements_from_job_description
-from hrgpt.matching.matching import match_job_requirements_to_cv_file
+from hrgpt.extraction.extraction import get_requirements_from_job_description_async
+from hrgpt.matching.matching import match_job_requirements_to_cv_file_async
+from hrgpt.utils.cache_utils import CacheFactory
 from hrgpt.utils.reporting_utils import create_output_files
 from hrgpt.utils.timing_utils import TimingClock, TaskType
 from hrgpt.utils.type_utils import ApplicantMatch, ScoreWorkload
+from hrgpt.utils.usage_utils import UsageTracker
 
 
-def score_applicants_for_workload(
+async def score_applicants_for_workload_async(
     score_workload: ScoreWorkload,
 ) -> tuple[ApplicantMatch, ...]:
     TimingClock.start_timer(TaskType.JOB_SCORING, score_workload.job_file.name)
+    UsageTracker.start_job(score_workload.job_file.name)
     result_tuple: tuple[ApplicantMatch, ...]
-    job_requirements = get_requirements_from_job_description(score_workload.job_file)
-    matching_function = functools.partial(
-        match_job_requirements_to_cv_file, job_requirements
+    job_requirements = await get_requirements_from_job_description_async(
+        score_workload.job_file
+    )
+    result_tuple = tuple(
+        await asyncio.gather(
+            *[
+                match_job_requirements_to_cv_file_async(job_requirements, cv_file)
+                for cv_file in score_workload.cv_files
+            ]
+        )
     )
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        result_tuple = tuple(executor.map(matching_function, score_workload.cv_files))
     TimingClock.stop_timer(TaskType.JOB_SCORING, score_workload.job_file.name)
     return result_tuple
 
 
-def score_applicants(
-    score_workloads: tuple[ScoreWorkload, ...]
+def create_score_result(
+    score_workloads: tuple[ScoreWorkload, ...],
+    mapped_arguments: typing.Sequence[tuple[ApplicantMatch, ...]],
 ) -> dict[str, tuple[pl.DataFrame, dict[str, ApplicantMatch]]]:
-    TimingClock.start_timer(TaskType.COMPLETE_SCORING, TaskType.COMPLETE_SCORING.value)
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        mapped_arguments = tuple(
-            executor.map(lambda x: score_applicants_for_workload(x), score_workloads)
-        )
     score_result: dict[str, dict[str, ApplicantMatch]] = collections.defaultdict(dict)
     for workload, match_results in zip(score_workloads, mapped_arguments):
         job_name = workload.job_file.name
@@ -43,5 +47,26 @@ def score_applicants(
     result_dict: dict[str, tuple[pl.DataFrame, dict[str, ApplicantMatch]]] = {}
     for job_name, job_result in score_result.items():
         result_dict[job_name] = (job_dfs[job_name], job_result)
+    return result_dict
+
+
+async def score_applicants_async(
+    score_workloads: tuple[ScoreWorkload, ...]
+) -> dict[str, tuple[pl.DataFrame, dict[str, ApplicantMatch]]]:
+    TimingClock.start_timer(TaskType.COMPLETE_SCORING, TaskType.COMPLETE_SCORING.value)
+    UsageTracker.start_run()
+    mapped_arguments = await asyncio.gather(
+        *[score_applicants_for_workload_async(x) for x in score_workloads]
+    )
+    result_dict = await asyncio.to_thread(
+        create_score_result, score_workloads, mapped_arguments
+    )
     TimingClock.stop_timer(TaskType.COMPLETE_SCORING, TaskType.COMPLETE_SCORING.value)
+    CacheFactory.log_statistics()
     return result_dict
+
+
+def score_applicants(
+    score_workloads: tuple[ScoreWorkload, ...]
+) -> dict[str, tuple[pl.DataFrame, dict[str, ApplicantMatch]]]:
+    return asyncio.run(score_applicants_async(score_workloads))
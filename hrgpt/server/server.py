@@ -5,11 +5,12 @@ import uvicorn
 from fastapi import FastAPI, UploadFile, HTTPException, Header
 from fastapi.responses import JSONResponse
 
-from hrgpt.scoring.scoring import score_applicants
+from hrgpt.scoring.scoring import score_applicants_async
 from hrgpt.utils.config_utils import AppConfigFactory
 from hrgpt.utils.file_utils import convert_upload_file_to_file
 from hrgpt.utils.init_utils import initialize_app
 from hrgpt.utils.type_utils import ScoreWorkload, File, ApplicantMatch, ApiMatchResult
+from hrgpt.utils.usage_utils import UsageTracker
 
 
 def get_server() -> FastAPI:
@@ -51,7 +52,8 @@ def get_server() -> FastAPI:
                 status_code=400,
                 detail="At least one CV file must be provided",
             )
-        # set configuration parameters
+        # set configuration parameters for this request only
+        AppConfigFactory.start_request()
         AppConfigFactory.set_openai_api_key(
             base64.b64decode(openai_api_key_base64).decode("utf-8")
         )
@@ -68,13 +70,19 @@ def get_server() -> FastAPI:
             cv_files_tuple += (await convert_upload_file_to_file(file),)
         # create the score workload and get the result
         score_workload = ScoreWorkload(job_file=job_file, cv_files=cv_files_tuple)
-        score_result = score_applicants((score_workload,))
-        # build the response
-        result_dict: dict[str, dict[str, typing.Any]] = {}
-        for job_name, job_result in score_result.items():
-            result_dict[job_name] = ApiMatchResult(
-                overview_result=job_result[0].to_dicts(), exact_result=job_result[1]
-            ).model_dump(mode="json")
+        try:
+            score_result = await score_applicants_async((score_workload,))
+            # build the response
+            result_dict: dict[str, dict[str, typing.Any]] = {}
+            for job_name, job_result in score_result.items():
+                result_dict[job_name] = ApiMatchResult(
+                    overview_result=job_result[0].to_dicts(),
+                    exact_result=job_result[1],
+                    usage=UsageTracker.get_job_report(job_name),
+                ).model_dump(mode="json")
+        finally:
+            # the usage of this request is not needed after the response
+            UsageTracker.finish_run()
         # send the response
         return JSONResponse(content=result_dict)
 
@@ -0,0 +1,386 @@
+import abc
+import datetime
+import enum
+import json
+import os.path
+import tempfile
+import time
+import typing
+
+from hrgpt.chat.openai_chat import (
+    OpenaiChat,
+    transform_chat_message_history_to_openai_chat_messages,
+)
+from hrgpt.config.config import BatchEndpointType, Provider
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.chat_utils import get_live_chat, get_answer_message
+from hrgpt.utils.client_utils import get_openai_client
+from hrgpt.utils.config_utils import AppConfigFactory, get_model_for_model_enum
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.path_utils import get_generated_batches_path, get_random_file_name
+from hrgpt.utils.secret_utils import get_api_key_for_provider
+from hrgpt.utils.type_utils import (
+    PromptType,
+    AnswerFormat,
+    get_answer_format,
+    ChatMessage,
+    TokenUsage,
+)
+from hrgpt.utils.usage_utils import UsageTracker, UsageScope
+
+BatchRequestBody = dict[str, typing.Any]
+
+BatchResponder = typing.Callable[[str, BatchRequestBody], ChatMessage]
+
+
+class BatchStatus(enum.StrEnum):
+    PENDING = enum.auto()
+    COMPLETED = enum.auto()
+    FAILED = enum.auto()
+
+
+def create_custom_id(prompt_type: PromptType, key: tuple[int, ...]) -> str:
+    return "-".join([prompt_type, "_".join(map(str, key))])
+
+
+def get_prompt_type_of_custom_id(custom_id: str) -> PromptType:
+    return PromptType(custom_id.split("-")[0])
+
+
+def get_chat_completions_url() -> typing.Literal["/v1/chat/completions"]:
+    return "/v1/chat/completions"
+
+
+def create_batch_request_body(
+    prompt: str, answer_format: AnswerFormat
+) -> BatchRequestBody:
+    config = AppConfigFactory.get_app_config()
+    # batches are not routed, all requests use the configured model
+    # the request body is built for the provider even if answers are replayed
+    chat = get_live_chat(config.llm_config.model)
+    chat.add_prompt_to_history(prompt)
+    if isinstance(chat, OpenaiChat):
+        # only the first choice of a batch output is used
+        return {**chat.get_completion_arguments(answer_format), "n": 1}
+    return {
+        "model": chat.get_model_name(),
+        "messages": transform_chat_message_history_to_openai_chat_messages(
+            chat.get_chat_message_history(include_context=True)
+        ),
+    }
+
+
+def create_batch_request_line(custom_id: str, prompt: str) -> str:
+    return json.dumps(
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": get_chat_completions_url(),
+            "body": create_batch_request_body(
+                prompt, get_answer_format(get_prompt_type_of_custom_id(custom_id))
+            ),
+        },
+        ensure_ascii=False,
+    )
+
+
+def get_token_usage_of_batch_response_body(body: dict[str, typing.Any]) -> TokenUsage:
+    usage = body.get("usage") or {}
+    prompt_tokens_details = usage.get("prompt_tokens_details") or {}
+    return TokenUsage(
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+        cached_prompt_tokens=prompt_tokens_details.get("cached_tokens") or 0,
+    )
+
+
+def parse_batch_output_line(line: str) -> tuple[str, typing.Optional[ChatMessage]]:
+    output = json.loads(line)
+    custom_id = str(output["custom_id"])
+    response = output.get("response")
+    if output.get("error") is not None or response is None:
+        return custom_id, None
+    if response["status_code"] != 200:
+        return custom_id, None
+    choice = response["body"]["choices"][0]
+    if choice["finish_reason"] != "stop" or choice["message"]["content"] is None:
+        return custom_id, None
+    creation_datetime = datetime.datetime.fromtimestamp(
+        response["body"]["created"], datetime.timezone.utc
+    )
+    # the generation time of a batch request is not known
+    return custom_id, generate_model_chat_message(
+        str(choice["message"]["content"]),
+        creation_datetime,
+        creation_datetime,
+        creation_datetime,
+        token_usage=get_token_usage_of_batch_response_body(response["body"]),
+        model=response["body"].get("model"),
+    )
+
+
+def get_last_user_message_content(body: BatchRequestBody) -> str:
+    return str(body["messages"][-1]["content"])
+
+
+def answer_batch_request_in_realtime(
+    custom_id: str, body: BatchRequestBody
+) -> ChatMessage:
+    config = AppConfigFactory.get_app_config()
+    # the usage is reported with the batch output, so it is not tracked twice
+    return UsageTracker.run_untracked(
+        lambda: get_answer_message(
+            get_last_user_message_content(body),
+            get_prompt_type_of_custom_id(custom_id),
+            config.llm_config.model,
+        )
+    )
+
+
+class BatchEndpoint(abc.ABC):
+    @abc.abstractmethod
+    def submit(self, input_file_path: str) -> str:
+        pass
+
+    @abc.abstractmethod
+    def get_status(self, batch_id: str) -> BatchStatus:
+        pass
+
+    @abc.abstractmethod
+    def get_output(self, batch_id: str) -> str:
+        pass
+
+
+class OpenaiBatchEndpoint(BatchEndpoint):
+    def __init__(self) -> None:
+        config = AppConfigFactory.get_app_config()
+        if (
+            get_model_for_model_enum(config.llm_config.model).provider
+            != Provider.OPENAI
+        ):
+            raise ValueError
+        self.openai = get_openai_client(get_api_key_for_provider(Provider.OPENAI))
+
+    def submit(self, input_file_path: str) -> str:
+        config = AppConfigFactory.get_app_config()
+        with open(input_file_path, "rb") as input_file:
+            uploaded_file = self.openai.files.create(file=input_file, purpose="batch")
+        batch = self.openai.batches.create(
+            input_file_id=uploaded_file.id,
+            endpoint=get_chat_completions_url(),
+            completion_window=config.generic_config.batch_config.completion_window,
+        )
+        return batch.id
+
+    def get_status(self, batch_id: str) -> BatchStatus:
+        batch = self.openai.batches.retrieve(batch_id)
+        match batch.status:
+            case "completed":
+                return BatchStatus.COMPLETED
+            case "failed" | "expired" | "cancelling" | "cancelled":
+                return BatchStatus.FAILED
+            case _:
+                return BatchStatus.PENDING
+
+    def get_output(self, batch_id: str) -> str:
+        batch = self.openai.batches.retrieve(batch_id)
+        output_parts = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is not None:
+                output_parts.append(self.openai.files.content(file_id).text)
+        return "\n".join(output_parts)
+
+
+class LocalBatchEndpoint(BatchEndpoint):
+    def __init__(
+        self,
+        directory_path: str,
+        responder: BatchResponder = answer_batch_request_in_realtime,
+    ) -> None:
+        self.directory_path = directory_path
+        self.responder = responder
+
+    def get_batch_directory_path(self, batch_id: str) -> str:
+        return os.path.join(self.directory_path, batch_id)
+
+    def write_status(self, batch_id: str, status: BatchStatus) -> None:
+        with open(
+            os.path.join(self.get_batch_directory_path(batch_id), "status.json"), "w"
+        ) as file:
+            file.write(json.dumps({"id": batch_id, "status": status}))
+
+    def submit(self, input_file_path: str) -> str:
+        batch_id = f"batch_{get_random_file_name(32)}"
+        batch_directory_path = self.get_batch_directory_path(batch_id)
+        os.makedirs(batch_directory_path)
+        self.write_status(batch_id, BatchStatus.PENDING)
+        output_lines = []
+        with open(input_file_path) as input_file:
+            for line in input_file:
+                if line.strip() == "":
+                    continue
+                request = json.loads(line)
+                output_lines.append(
+                    json.dumps(
+                        self.create_output(
+                            request["custom_id"],
+                            self.responder(request["custom_id"], request["body"]),
+                        ),
+                        ensure_ascii=False,
+                    )
+                )
+        with open(os.path.join(batch_directory_path, "output.jsonl"), "w") as file:
+            file.write("\n".join(output_lines))
+        self.write_status(batch_id, BatchStatus.COMPLETED)
+        return batch_id
+
+    def create_output(
+        self, custom_id: str, answer: ChatMessage
+    ) -> dict[str, typing.Any]:
+        return {
+            "id": f"batch_req_{get_random_file_name(32)}",
+            "custom_id": custom_id,
+            "response": {
+                "status_code": 200,
+                "request_id": get_random_file_name(32),
+                "body": {
+                    "object": "chat.completion",
+                    "created": int(datetime.datetime.now().timestamp()),
+                    "model": answer.model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": answer.text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": answer.token_usage.prompt_tokens,
+                        "completion_tokens": answer.token_usage.completion_tokens,
+                        "prompt_tokens_details": {
+                            "cached_tokens": answer.token_usage.cached_prompt_tokens
+                        },
+                    },
+                },
+            },
+            "error": None,
+        }
+
+    def get_status(self, batch_id: str) -> BatchStatus:
+        with open(
+            os.path.join(self.get_batch_directory_path(batch_id), "status.json")
+        ) as file:
+            return BatchStatus(json.load(file)["status"])
+
+    def get_output(self, batch_id: str) -> str:
+        with open(
+            os.path.join(self.get_batch_directory_path(batch_id), "output.jsonl")
+        ) as file:
+            return file.read()
+
+
+def get_batch_endpoint() -> BatchEndpoint:
+    config = AppConfigFactory.get_app_config()
+    match config.generic_config.batch_config.endpoint:
+        case BatchEndpointType.OPENAI:
+            return OpenaiBatchEndpoint()
+        case BatchEndpointType.LOCAL:
+            return LocalBatchEndpoint(get_generated_batches_path())
+        case _:
+            raise RuntimeError
+
+
+def split_batch_request_lines(lines: list[str]) -> list[list[str]]:
+    config = AppConfigFactory.get_app_config()
+    batch_config = config.generic_config.batch_config
+    # every batch must stay within the request and file size limits of the batch api
+    parts: list[list[str]] = [[]]
+    part_size = 0
+    for line in lines:
+        line_size = len(line.encode("utf-8")) + 1
+        if len(parts[-1]) > 0 and (
+            len(parts[-1]) >= batch_config.max_requests_per_batch
+            or part_size + line_size > batch_config.max_batch_file_bytes
+        ):
+            parts.append([])
+            part_size = 0
+        parts[-1].append(line)
+        part_size += line_size
+    return parts
+
+
+def submit_batch(endpoint: BatchEndpoint, lines: list[str]) -> str:
+    file_descriptor, input_file_path = tempfile.mkstemp(
+        prefix="batch_input_", suffix=".jsonl"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines))
+        return endpoint.submit(input_file_path)
+    finally:
+        # the input contains the complete documents and is not kept after the upload
+        os.remove(input_file_path)
+
+
+def get_usage_scope(
+    usage_scopes: typing.Optional[dict[str, UsageScope]], custom_id: str
+) -> UsageScope:
+    if usage_scopes is None or custom_id not in usage_scopes:
+        return UsageScope()
+    return usage_scopes[custom_id]
+
+
+def run_batch(
+    endpoint: BatchEndpoint,
+    prompts: dict[str, str],
+    usage_scopes: typing.Optional[dict[str, UsageScope]] = None,
+) -> dict[str, str]:
+    if len(prompts) == 0:
+        return {}
+    config = AppConfigFactory.get_app_config()
+    logger = LoggerFactory.get_logger()
+    batch_ids: list[str] = []
+    for lines in split_batch_request_lines(
+        [create_batch_request_line(key, value) for key, value in prompts.items()]
+    ):
+        batch_id = submit_batch(endpoint, lines)
+        logger.info(f'Submitted batch "{batch_id}" with {len(lines)} requests')
+        batch_ids.append(batch_id)
+    answers: dict[str, str] = {}
+    for batch_id in batch_ids:
+        while (status := endpoint.get_status(batch_id)) == BatchStatus.PENDING:
+            time.sleep(config.generic_config.batch_config.poll_interval_seconds)
+        if status != BatchStatus.COMPLETED:
+            logger.warning(
+                f'Batch "{batch_id}" failed, answering its requests in realtime'
+            )
+            continue
+        for line in endpoint.get_output(batch_id).split("\n"):
+            if line.strip() == "":
+                continue
+            custom_id, answer = parse_batch_output_line(line)
+            if answer is not None and custom_id in prompts:
+                UsageTracker.run_in_scope(
+                    get_usage_scope(usage_scopes, custom_id),
+                    lambda: UsageTracker.record(
+                        answer,
+                        get_prompt_type_of_custom_id(custom_id),
+                        config.llm_config.model,
+                    ),
+                )
+                answers[custom_id] = answer.text
+    for custom_id, prompt in prompts.items():
+        if custom_id not in answers:
+            # requests that failed inside a batch are answered in realtime
+            logger.warning(
+                f'Request "{custom_id}" failed in its batch, answering it in realtime'
+            )
+            answers[custom_id] = UsageTracker.run_in_scope(
+                get_usage_scope(usage_scopes, custom_id),
+                lambda: get_answer_message(
+                    prompt,
+                    get_prompt_type_of_custom_id(custom_id),
+                    config.llm_config.model,
+                ),
+            ).text
+    return answers
@@ -0,0 +1,145 @@
+import enum
+import hashlib
+import os.path
+import sqlite3
+import threading
+import time
+import typing
+
+from hrgpt.config.config import PersistentCacheConfiguration
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.path_utils import get_generated_caches_path
+from hrgpt.utils.serialization_utils import dumps
+
+
+def compute_cache_key(value: object) -> str:
+    return hashlib.sha256(dumps(value, indent=0).encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    def __init__(
+        self, database_path: str, max_entries: int, time_to_live_seconds: int
+    ) -> None:
+        self.max_entries = max_entries
+        self.time_to_live_seconds = time_to_live_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None, timeout=60
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "creation_timestamp REAL NOT NULL, "
+                "access_timestamp REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_access_timestamp "
+                "ON entries (access_timestamp)"
+            )
+            self.remove_expired_entries()
+
+    def get_expiry_timestamp(self) -> float:
+        return time.time() - self.time_to_live_seconds
+
+    def remove_expired_entries(self) -> None:
+        self.connection.execute(
+            "DELETE FROM entries WHERE creation_timestamp < ?",
+            (self.get_expiry_timestamp(),),
+        )
+
+    def get(self, key: str) -> typing.Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, creation_timestamp FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < self.get_expiry_timestamp():
+                if row is not None:
+                    self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self.connection.execute(
+                "UPDATE entries SET access_timestamp = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self.hits += 1
+            return typing.cast(str, row[0])
+
+    def set(self, key: str, value: str) -> None:
+        current_timestamp = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, creation_timestamp, access_timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, current_timestamp, current_timestamp),
+            )
+            self.connection.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY access_timestamp DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def get_entry_amount(self) -> int:
+        with self.lock:
+            row = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+            return int(row[0])
+
+    def get_hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+
+class CacheType(enum.StrEnum):
+    RESPONSE = enum.auto()
+    DOCUMENT_TEXT = enum.auto()
+    TRANSLATION = enum.auto()
+
+
+class CacheFactory:
+    cache_dict: dict[CacheType, PersistentCache] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get_cache_config(cls, cache_type: CacheType) -> PersistentCacheConfiguration:
+        app_config = AppConfigFactory.get_app_config()
+        match cache_type:
+            case CacheType.RESPONSE:
+                return app_config.generic_config.cache_config.response_cache
+            case CacheType.DOCUMENT_TEXT:
+                return app_config.generic_config.cache_config.document_text_cache
+            case CacheType.TRANSLATION:
+                return app_config.generic_config.cache_config.translation_cache
+            case _:
+                raise RuntimeError
+
+    @classmethod
+    def get_cache(cls, cache_type: CacheType) -> typing.Optional[PersistentCache]:
+        config = cls.get_cache_config(cache_type)
+        if not config.enabled:
+            return None
+        with cls.lock:
+            if cache_type not in cls.cache_dict:
+                cls.cache_dict[cache_type] = PersistentCache(
+                    os.path.join(get_generated_caches_path(), f"{cache_type}.sqlite3"),
+                    max_entries=config.max_entries,
+                    time_to_live_seconds=config.time_to_live_seconds,
+                )
+            return cls.cache_dict[cache_type]
+
+    @classmethod
+    def log_statistics(cls) -> None:
+        logger = LoggerFactory.get_logger()
+        for cache_type, cache in cls.cache_dict.items():
+            logger.info(
+                f'Cache of type "{cache_type}" had {cache.hits} hits and {cache.misses} misses '
+                f"(hit rate {cache.get_hit_rate():.2%}, {cache.get_entry_amount()} entries)"
+            )
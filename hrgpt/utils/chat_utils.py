@@ -1,32 +1,354 @@
-import concurrent.futures
+import asyncio
+import time
+import typing
+import weakref
 
 from hrgpt.chat.chat import Chat
 from hrgpt.chat.google_chat import GoogleChat
 from hrgpt.chat.openai_chat import OpenaiChat
+from hrgpt.chat.replay_chat import ReplayChat
 from hrgpt.chat.replicate_chat import ReplicateChat
-from hrgpt.config.config import Provider
-from hrgpt.utils.config_utils import get_model_for_model_enum, AppConfigFactory
-from hrgpt.utils.type_utils import ChatMessage
+from hrgpt.config.config import Provider, ModelEnum, RoutingPolicy, ReplayMode
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.cache_utils import (
+    CacheFactory,
+    CacheType,
+    PersistentCache,
+    compute_cache_key,
+)
+from hrgpt.utils.config_utils import (
+    get_model_for_model_enum,
+    AppConfigFactory,
+    get_temperature,
+    get_deterministic_seed,
+    get_top_probability,
+    get_top_tokens,
+)
+from hrgpt.utils.replay_utils import is_replay_mode
+from hrgpt.utils.retry_utils import (
+    LatencyTracker,
+    get_retry_delay_seconds,
+    is_retryable_error,
+)
+from hrgpt.utils.single_flight_utils import run_single_flight, run_single_flight_async
+from hrgpt.utils.type_utils import ChatMessage, Author, PromptType, get_answer_format
+from hrgpt.utils.usage_utils import UsageTracker
 
 
-def get_chat() -> Chat:
-    config = AppConfigFactory.get_app_config()
-    provider = get_model_for_model_enum(config.llm_config.model).provider
+class RequestLimiter:
+    semaphores: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, asyncio.Semaphore
+    ] = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_semaphore(cls) -> asyncio.Semaphore:
+        event_loop = asyncio.get_running_loop()
+        if event_loop not in cls.semaphores:
+            config = AppConfigFactory.get_app_config()
+            cls.semaphores[event_loop] = asyncio.Semaphore(
+                config.generic_config.network_config.max_concurrent_requests
+            )
+        return cls.semaphores[event_loop]
+
+
+def get_provider_of_chat(model: ModelEnum) -> Provider:
+    if not is_replay_mode(ReplayMode.OFF):
+        return Provider.REPLAY
+    return get_model_for_model_enum(model).provider
+
+
+def get_live_chat(model: ModelEnum) -> Chat:
+    provider = get_model_for_model_enum(model).provider
     if provider == Provider.OPENAI:
-        return OpenaiChat()
+        return OpenaiChat(model)
     elif provider == Provider.REPLICATE:
-        return ReplicateChat()
+        return ReplicateChat(model)
     elif provider == Provider.GOOGLE:
-        return GoogleChat()
+        return GoogleChat(model)
     else:
         raise ValueError
 
 
-def get_answer_message(prompt: str) -> ChatMessage:
-    chat = get_chat()
-    return chat.send_prompt(prompt)
+def get_chat(model: ModelEnum) -> Chat:
+    provider = get_provider_of_chat(model)
+    if provider == Provider.REPLAY:
+        return ReplayChat(
+            model,
+            get_live_chat(model) if is_replay_mode(ReplayMode.RECORD) else None,
+        )
+    else:
+        return get_live_chat(model)
+
+
+def get_routing_policy(prompt_type: PromptType) -> RoutingPolicy:
+    config = AppConfigFactory.get_app_config()
+    routing_policy = config.generic_config.routing_config.policies.get(prompt_type)
+    if routing_policy is None:
+        # prompt types without a policy are always sent to the configured model
+        return RoutingPolicy(
+            models=(config.llm_config.model,),
+            uncertain_score_range=None,
+            max_score_spread=None,
+        )
+    return routing_policy
+
+
+def get_response_cache() -> typing.Optional[PersistentCache]:
+    config = AppConfigFactory.get_app_config()
+    if not config.llm_config.deterministic:
+        # answers are only reproducible in deterministic mode
+        return None
+    return CacheFactory.get_cache(CacheType.RESPONSE)
+
+
+def get_response_cache_key(chat: Chat, prompt: str, prompt_type: PromptType) -> str:
+    config = AppConfigFactory.get_app_config()
+    llm_config = config.llm_config
+    return compute_cache_key(
+        {
+            "model": chat.model,
+            # the answer format and the native JSON mode change the request
+            "answer_format": get_answer_format(prompt_type),
+            "native_json_mode": config.generic_config.decoding_config.native_json_mode,
+            "temperature": get_temperature(
+                llm_config.deterministic, llm_config.temperature
+            ),
+            # random seeds would prevent identical prompts from sharing an answer
+            "seed": get_deterministic_seed() if llm_config.deterministic else None,
+            "top_probability": get_top_probability(
+                llm_config.deterministic, llm_config.top_probability
+            ),
+            "top_tokens": get_top_tokens(
+                llm_config.deterministic, llm_config.top_tokens
+            ),
+            "llm_config": llm_config.model_dump(
+                mode="json", exclude={"debug", "model"}
+            ),
+            "messages": [
+                *[
+                    (x.author, x.text)
+                    for x in chat.get_chat_message_history(include_context=True)
+                ],
+                (Author.USER, prompt.strip()),
+            ],
+        }
+    )
+
+
+def get_cached_answer_message(
+    cache: typing.Optional[PersistentCache], cache_key: str
+) -> typing.Optional[ChatMessage]:
+    if cache is None:
+        return None
+    cached_value = cache.get(cache_key)
+    if cached_value is None:
+        return None
+    return ChatMessage.model_validate_json(cached_value)
+
+
+def store_answer_message(
+    cache: typing.Optional[PersistentCache], cache_key: str, answer: ChatMessage
+) -> None:
+    if cache is None:
+        return
+    cache.set(cache_key, answer.model_dump_json())
+
+
+def send_prompt_attempt(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    # every attempt needs a fresh chat, as sending adds the prompt to the history
+    chat = get_chat(model)
+    chat.wait_for_rate_limit(prompt)
+    # the latency is measured from the dispatch, without the rate limiting
+    start_time = time.monotonic()
+    answer = chat.send_prompt(prompt, get_answer_format(prompt_type))
+    LatencyTracker.record(model, prompt_type, time.monotonic() - start_time)
+    return answer
+
+
+async def send_prompt_attempt_async(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    config = AppConfigFactory.get_app_config()
+    start_time = time.monotonic()
+    try:
+        answer = await asyncio.wait_for(
+            get_chat(model).send_prompt_async(prompt, get_answer_format(prompt_type)),
+            config.generic_config.network_config.attempt_timeout_seconds,
+        )
+    except asyncio.CancelledError:
+        # a cancelled attempt was slower than the hedge, leaving it out would bias
+        # the hedge delay downward
+        LatencyTracker.record(model, prompt_type, time.monotonic() - start_time)
+        raise
+    LatencyTracker.record(model, prompt_type, time.monotonic() - start_time)
+    return answer
+
+
+async def send_hedge_attempt_async(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    # a hedged request is an additional request, so it reserves its own rate limit
+    # and request slot
+    await get_chat(model).wait_for_rate_limit_async(prompt)
+    async with RequestLimiter.get_semaphore():
+        return await send_prompt_attempt_async(prompt, prompt_type, model)
+
+
+async def send_hedged_prompt_async(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    attempts = [
+        asyncio.ensure_future(send_prompt_attempt_async(prompt, prompt_type, model))
+    ]
+    try:
+        hedge_delay_seconds = LatencyTracker.get_hedge_delay_seconds(model, prompt_type)
+        if hedge_delay_seconds is not None:
+            done_attempts, _ = await asyncio.wait(attempts, timeout=hedge_delay_seconds)
+            if (
+                len(done_attempts) == 0
+                # all request slots are taken, so a hedged request would only queue
+                and not RequestLimiter.get_semaphore().locked()
+                and LatencyTracker.try_start_hedged_request()
+            ):
+                LoggerFactory.get_logger().debug(
+                    f'A prompt of type "{prompt_type}" took longer than {hedge_delay_seconds:.2f} seconds, sending a hedged request'
+                )
+                attempts.append(
+                    asyncio.ensure_future(
+                        send_hedge_attempt_async(prompt, prompt_type, model)
+                    )
+                )
+        # the first successful attempt wins
+        errors: list[BaseException] = []
+        pending_attempts = set(attempts)
+        while len(pending_attempts) > 0:
+            done_attempts, pending_attempts = await asyncio.wait(
+                pending_attempts, return_when=asyncio.FIRST_COMPLETED
+            )
+            for attempt in done_attempts:
+                error = attempt.exception()
+                if error is None:
+                    return attempt.result()
+                errors.append(error)
+        raise errors[0]
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+def send_prompt_with_retries(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    config = AppConfigFactory.get_app_config()
+    retry_amount = config.generic_config.network_config.retry_amount
+    for attempt_index in range(retry_amount + 1):
+        try:
+            return send_prompt_attempt(prompt, prompt_type, model)
+        except Exception as error:
+            if attempt_index == retry_amount or not is_retryable_error(error):
+                raise
+            LoggerFactory.get_logger().debug(
+                f'A prompt of type "{prompt_type}" failed with {type(error).__name__}, retrying it'
+            )
+        time.sleep(get_retry_delay_seconds(attempt_index))
+    raise RuntimeError
+
+
+async def send_prompt_with_retries_async(
+    prompt: str, prompt_type: PromptType, model: ModelEnum
+) -> ChatMessage:
+    config = AppConfigFactory.get_app_config()
+    retry_amount = config.generic_config.network_config.retry_amount
+    for attempt_index in range(retry_amount + 1):
+        try:
+            # the rate limit is acquired once per attempt and outside of the timeout
+            await get_chat(model).wait_for_rate_limit_async(prompt)
+            async with RequestLimiter.get_semaphore():
+                return await send_hedged_prompt_async(prompt, prompt_type, model)
+        except Exception as error:
+            if attempt_index == retry_amount or not is_retryable_error(error):
+                raise
+            LoggerFactory.get_logger().debug(
+                f'A prompt of type "{prompt_type}" failed with {type(error).__name__}, retrying it'
+            )
+        # the backoff is waited without holding a request slot
+        await asyncio.sleep(get_retry_delay_seconds(attempt_index))
+    raise RuntimeError
+
+
+def get_answer_message(
+    prompt: str, prompt_type: PromptType, model: typing.Optional[ModelEnum] = None
+) -> ChatMessage:
+    if model is None:
+        model = get_routing_policy(prompt_type).models[0]
+    chat = get_chat(model)
+    cache = get_response_cache()
+    cache_key = get_response_cache_key(chat, prompt, prompt_type)
+    cached_answer = get_cached_answer_message(cache, cache_key)
+    if cached_answer is not None:
+        UsageTracker.record(cached_answer, prompt_type, model, cached_answer=True)
+        return cached_answer
+    answer, is_shared_answer = run_single_flight(
+        cache_key, lambda: send_prompt_with_retries(prompt, prompt_type, model)
+    )
+    # an answer shared with an identical prompt in flight was only paid once
+    UsageTracker.record(answer, prompt_type, model, cached_answer=is_shared_answer)
+    if not is_shared_answer:
+        store_answer_message(cache, cache_key, answer)
+    return answer
+
+
+async def get_answer_message_async(
+    prompt: str, prompt_type: PromptType, model: typing.Optional[ModelEnum] = None
+) -> ChatMessage:
+    if model is None:
+        model = get_routing_policy(prompt_type).models[0]
+    chat = get_chat(model)
+    cache = get_response_cache()
+    cache_key = get_response_cache_key(chat, prompt, prompt_type)
+    cached_answer = get_cached_answer_message(cache, cache_key)
+    if cached_answer is not None:
+        UsageTracker.record(cached_answer, prompt_type, model, cached_answer=True)
+        return cached_answer
+    answer, is_shared_answer = await run_single_flight_async(
+        cache_key, lambda: send_prompt_with_retries_async(prompt, prompt_type, model)
+    )
+    # an answer shared with an identical prompt in flight was only paid once
+    UsageTracker.record(answer, prompt_type, model, cached_answer=is_shared_answer)
+    if not is_shared_answer:
+        store_answer_message(cache, cache_key, answer)
+    return answer
+
+
+async def get_routed_answer_message_async(
+    prompt: str,
+    prompt_type: PromptType,
+    is_answer_accepted: typing.Callable[[ChatMessage], bool] = lambda x: True,
+) -> ChatMessage:
+    models = get_routing_policy(prompt_type).models
+    for model in models[:-1]:
+        answer = await get_answer_message_async(prompt, prompt_type, model)
+        if is_answer_accepted(answer):
+            return answer
+        LoggerFactory.get_logger().debug(
+            f'The answer of model "{model}" to a prompt of type "{prompt_type}" was not accepted, escalating to the next model'
+        )
+    # the answer of the last model is always used
+    return await get_answer_message_async(prompt, prompt_type, models[-1])
 
 
-def get_answer_messages(prompts: tuple[str, ...]) -> tuple[ChatMessage, ...]:
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        return tuple(executor.map(get_answer_message, prompts))
+async def get_routed_answer_messages_async(
+    prompts: tuple[str, ...],
+    prompt_type: PromptType,
+    is_answer_accepted: typing.Callable[[ChatMessage], bool] = lambda x: True,
+) -> tuple[ChatMessage, ...]:
+    return tuple(
+        await asyncio.gather(
+            *[
+                get_routed_answer_message_async(x, prompt_type, is_answer_accepted)
+                for x in prompts
+            ]
+        )
+    )
@@ -0,0 +1,246 @@
+import asyncio
+import importlib.metadata
+import threading
+import typing
+import weakref
+
+import google.ai.generativelanguage
+import google.api_core.client_options
+import google.cloud.translate
+import google.generativeai
+import httpx
+import openai
+import replicate
+
+from hrgpt.config.config import Provider, GoogleServiceAccount
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.config_utils import AppConfigFactory
+
+T = typing.TypeVar("T")
+
+ClientKey = tuple[Provider, str, str]
+
+SUPPORTED_GOOGLE_GENERATIVEAI_VERSION = "0.5."
+
+
+def get_connection_limits() -> httpx.Limits:
+    config = AppConfigFactory.get_app_config()
+    network_config = config.generic_config.network_config
+    return httpx.Limits(
+        max_connections=network_config.max_concurrent_requests,
+        max_keepalive_connections=network_config.max_keepalive_connections,
+        keepalive_expiry=network_config.keepalive_expiry_seconds,
+    )
+
+
+class ClientPool:
+    client_dict: dict[ClientKey, typing.Any] = {}
+    async_client_dict: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, dict[ClientKey, typing.Any]
+    ] = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, key: ClientKey, factory: typing.Callable[[], T]) -> T:
+        with cls.lock:
+            if key not in cls.client_dict:
+                cls.client_dict[key] = factory()
+            return typing.cast(T, cls.client_dict[key])
+
+    @classmethod
+    def get_async_client(cls, key: ClientKey, factory: typing.Callable[[], T]) -> T:
+        # asynchronous clients are bound to the event loop they were created in
+        event_loop = asyncio.get_running_loop()
+        with cls.lock:
+            event_loop_client_dict = cls.async_client_dict.setdefault(event_loop, {})
+            if key not in event_loop_client_dict:
+                event_loop_client_dict[key] = factory()
+            return typing.cast(T, event_loop_client_dict[key])
+
+
+def create_openai_client(api_key: str) -> openai.OpenAI:
+    config = AppConfigFactory.get_app_config()
+    # retries are done by the chat utilities with jittered backoff
+    return openai.OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        timeout=config.generic_config.network_config.attempt_timeout_seconds,
+        http_client=openai.DefaultHttpxClient(limits=get_connection_limits()),
+    )
+
+
+def create_async_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    config = AppConfigFactory.get_app_config()
+    # retries are done by the chat utilities with jittered backoff
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        max_retries=0,
+        timeout=config.generic_config.network_config.attempt_timeout_seconds,
+        http_client=openai.DefaultAsyncHttpxClient(limits=get_connection_limits()),
+    )
+
+
+class ReplicateTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    # the replicate client wraps its transport with retries of these status codes,
+    # so they are raised before the wrapper sees them and retried by the chat utilities
+    retryable_status_codes = frozenset([429, 503, 504])
+
+    def __init__(
+        self, transport: httpx.BaseTransport, async_transport: httpx.AsyncBaseTransport
+    ) -> None:
+        self.transport = transport
+        self.async_transport = async_transport
+
+    def get_status_error(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.HTTPStatusError:
+        return httpx.HTTPStatusError(
+            f"The request failed with status code {response.status_code}",
+            request=request,
+            response=response,
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.transport.handle_request(request)
+        if response.status_code in self.retryable_status_codes:
+            response.read()
+            raise self.get_status_error(request, response)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.async_transport.handle_async_request(request)
+        if response.status_code in self.retryable_status_codes:
+            await response.aread()
+            raise self.get_status_error(request, response)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+    async def aclose(self) -> None:
+        await self.async_transport.aclose()
+
+
+def create_replicate_client(api_key: str) -> replicate.Client:
+    config = AppConfigFactory.get_app_config()
+    # the keyword arguments are passed to both the sync and the async http client
+    return replicate.Client(
+        api_token=api_key,
+        timeout=httpx.Timeout(
+            config.generic_config.network_config.attempt_timeout_seconds
+        ),
+        transport=ReplicateTransport(
+            httpx.HTTPTransport(limits=get_connection_limits()),
+            httpx.AsyncHTTPTransport(limits=get_connection_limits()),
+        ),
+    )
+
+
+def get_openai_client(api_key: str) -> openai.OpenAI:
+    return ClientPool.get_client(
+        (Provider.OPENAI, "sync", api_key), lambda: create_openai_client(api_key)
+    )
+
+
+def get_async_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    return ClientPool.get_async_client(
+        (Provider.OPENAI, "async", api_key),
+        lambda: create_async_openai_client(api_key),
+    )
+
+
+def get_google_client(
+    api_key: str,
+) -> google.ai.generativelanguage.GenerativeServiceClient:
+    # gRPC multiplexes all calls of a client over one long-lived HTTP/2 channel
+    return ClientPool.get_client(
+        (Provider.GOOGLE, "sync", api_key),
+        lambda: google.ai.generativelanguage.GenerativeServiceClient(
+            client_options=google.api_core.client_options.ClientOptions(api_key=api_key)
+        ),
+    )
+
+
+def get_async_google_client(
+    api_key: str,
+) -> google.ai.generativelanguage.GenerativeServiceAsyncClient:
+    return ClientPool.get_async_client(
+        (Provider.GOOGLE, "async", api_key),
+        lambda: google.ai.generativelanguage.GenerativeServiceAsyncClient(
+            client_options=google.api_core.client_options.ClientOptions(api_key=api_key)
+        ),
+    )
+
+
+def is_google_generativeai_version_supported() -> bool:
+    return importlib.metadata.version("google-generativeai").startswith(
+        SUPPORTED_GOOGLE_GENERATIVEAI_VERSION
+    )
+
+
+def bind_google_client(
+    model: google.generativeai.GenerativeModel, api_key: str, asynchronous: bool
+) -> google.generativeai.GenerativeModel:
+    # the generative model has no public argument for its client, so the pooled client
+    # replaces its private client, which is only done for the tested sdk versions
+    client_attribute = "_async_client" if asynchronous else "_client"
+    if not is_google_generativeai_version_supported() or client_attribute not in vars(
+        model
+    ):
+        raise RuntimeError
+    setattr(
+        model,
+        client_attribute,
+        (
+            get_async_google_client(api_key)
+            if asynchronous
+            else get_google_client(api_key)
+        ),
+    )
+    return model
+
+
+def cancel_google_response_stream(
+    model_response: (
+        google.generativeai.types.GenerateContentResponse
+        | google.generativeai.types.AsyncGenerateContentResponse
+    ),
+) -> None:
+    # the response does not expose its grpc call, which is needed to stop the generation,
+    # so its private iterator is cancelled, which is only done for the tested sdk versions
+    if not is_google_generativeai_version_supported() or "_iterator" not in vars(
+        model_response
+    ):
+        raise RuntimeError
+    cancel_function = getattr(model_response._iterator, "cancel", None)
+    if not callable(cancel_function):
+        LoggerFactory.get_logger().warning(
+            "The response stream cannot be cancelled, the generation is not stopped"
+        )
+        return
+    cancel_function()
+
+
+def get_replicate_client(api_key: str) -> replicate.Client:
+    return ClientPool.get_client(
+        (Provider.REPLICATE, "sync", api_key),
+        lambda: create_replicate_client(api_key),
+    )
+
+
+def get_async_replicate_client(api_key: str) -> replicate.Client:
+    return ClientPool.get_async_client(
+        (Provider.REPLICATE, "async", api_key),
+        lambda: create_replicate_client(api_key),
+    )
+
+
+def get_google_translation_client(
+    service_account: GoogleServiceAccount,
+) -> google.cloud.translate.TranslationServiceClient:
+    return ClientPool.get_client(
+        (Provider.GOOGLE, "translate", service_account.model_dump_json()),
+        lambda: google.cloud.translate.TranslationServiceClient.from_service_account_info(
+            service_account.model_dump(mode="json")
+        ),
+    )
@@ -1,3 +1,4 @@
+import contextvars
 import json
 import random
 
@@ -82,23 +83,37 @@ def get_job_requirement_weightings(
 def get_model_for_model_enum(value: ModelEnum) -> Model:
     match value:
         case ModelEnum.GPT_4_TURBO:
-            return Model(provider=Provider.OPENAI, name="gpt-4-turbo")
+            return Model(
+                provider=Provider.OPENAI, name="gpt-4-turbo", context_window=128000
+            )
         case ModelEnum.GPT_4O:
-            return Model(provider=Provider.OPENAI, name="gpt-4o")
+            return Model(provider=Provider.OPENAI, name="gpt-4o", context_window=128000)
         case ModelEnum.GPT_35_TURBO:
-            return Model(provider=Provider.OPENAI, name="gpt-3.5-turbo")
+            return Model(
+                provider=Provider.OPENAI, name="gpt-3.5-turbo", context_window=16385
+            )
         case ModelEnum.LLAMA_3_70B_INSTRUCT:
             return Model(
-                provider=Provider.REPLICATE, name="meta/meta-llama-3-70b-instruct"
+                provider=Provider.REPLICATE,
+                name="meta/meta-llama-3-70b-instruct",
+                context_window=8192,
             )
         case ModelEnum.LLAMA_3_8B_INSTRUCT:
             return Model(
-                provider=Provider.REPLICATE, name="meta/meta-llama-3-8b-instruct"
+                provider=Provider.REPLICATE,
+                name="meta/meta-llama-3-8b-instruct",
+                context_window=8192,
             )
         case ModelEnum.GEMINI_15_PRO:
-            return Model(provider=Provider.GOOGLE, name="gemini-1.5-pro")
+            return Model(
+                provider=Provider.GOOGLE, name="gemini-1.5-pro", context_window=2097152
+            )
         case ModelEnum.GEMINI_15_FLASH:
-            return Model(provider=Provider.GOOGLE, name="gemini-1.5-flash")
+            return Model(
+                provider=Provider.GOOGLE,
+                name="gemini-1.5-flash",
+                context_window=1048576,
+            )
 
 
 def get_app_config_from_json_file(
@@ -113,6 +128,12 @@ def get_app_config_from_json_file(
     return AppConfig.model_validate(app_config)
 
 
+# the configuration of a request overrides the app configuration in its context
+request_app_config: contextvars.ContextVar[AppConfig | None] = contextvars.ContextVar(
+    "request_app_config", default=None
+)
+
+
 class AppConfigFactory:
     app_config: AppConfig | None = None
 
@@ -124,12 +145,20 @@ class AppConfigFactory:
     def get_app_config(
         cls,
     ) -> AppConfig:
+        context_app_config = request_app_config.get()
+        if context_app_config is not None:
+            return context_app_config
         if cls.app_config is None and is_test_running():
             cls.initialize_app_config(get_app_config_from_json_file())
         if cls.app_config is None:
             raise RuntimeError
         return cls.app_config
 
+    @classmethod
+    def start_request(cls) -> None:
+        # the setters of a request only change a copy that is visible to its own context
+        request_app_config.set(cls.get_app_config().model_copy(deep=True))
+
     @classmethod
     def set_openai_api_key(cls, openai_api_key: str) -> None:
         app_config = cls.get_app_config()
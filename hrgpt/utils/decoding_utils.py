@@ -0,0 +1,99 @@
+import json
+import re
+import threading
+import typing
+
+import pydantic
+
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.type_utils import AnswerFormat
+
+T = typing.TypeVar("T")
+
+CODE_FENCE_PATTERN = re.compile(r"```[a-zA-Z]*\s*(.*?)```", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*[}\]]")
+
+
+class TypeAdapterFactory:
+    # the validator of every target type is only built once
+    type_adapter_dict: dict[typing.Any, pydantic.TypeAdapter[typing.Any]] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get_type_adapter(cls, target_type: type[T]) -> pydantic.TypeAdapter[T]:
+        with cls.lock:
+            if target_type not in cls.type_adapter_dict:
+                cls.type_adapter_dict[target_type] = pydantic.TypeAdapter(target_type)
+            return cls.type_adapter_dict[target_type]
+
+
+def get_json_string(text: str, answer_format: AnswerFormat) -> str:
+    match answer_format:
+        case AnswerFormat.JSON_OBJECT:
+            start_character, end_character = "{", "}"
+        case AnswerFormat.JSON_ARRAY:
+            start_character, end_character = "[", "]"
+        case _:
+            raise ValueError
+    json_start_index = text.find(start_character)
+    json_end_index = text.rfind(end_character)
+    if json_start_index == -1 or json_end_index < json_start_index:
+        raise ValueError
+    return text[json_start_index : json_end_index + 1]
+
+
+def remove_trailing_commas(json_string: str) -> str:
+    # the string is tokenized, so commas inside of JSON strings are never removed
+    repaired_characters: list[str] = []
+    in_string = False
+    escaped = False
+    for index, character in enumerate(json_string):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif character == "\\":
+                escaped = True
+            elif character == '"':
+                in_string = False
+        elif character == '"':
+            in_string = True
+        elif TRAILING_COMMA_PATTERN.match(json_string, index) is not None:
+            continue
+        repaired_characters.append(character)
+    return "".join(repaired_characters)
+
+
+def repair_json_string(text: str, answer_format: AnswerFormat) -> str:
+    # prefer the content of a code fence over the text around it
+    code_fence_match = CODE_FENCE_PATTERN.search(text)
+    if code_fence_match is not None:
+        try:
+            text = get_json_string(code_fence_match.group(1), answer_format)
+        except ValueError:
+            pass
+    json_string = get_json_string(text, answer_format)
+    return remove_trailing_commas(json_string)
+
+
+def is_json_syntax_error(error: pydantic.ValidationError) -> bool:
+    return any(x["type"] == "json_invalid" for x in error.errors())
+
+
+def decode_json_answer(
+    text: str,
+    target_type: type[T],
+    answer_format: AnswerFormat = AnswerFormat.JSON_OBJECT,
+) -> T:
+    type_adapter = TypeAdapterFactory.get_type_adapter(target_type)
+    json_string = get_json_string(text, answer_format)
+    try:
+        # the answer is parsed and validated in a single pass
+        return type_adapter.validate_json(json_string)
+    except pydantic.ValidationError as error:
+        if not is_json_syntax_error(error):
+            raise
+    config = AppConfigFactory.get_app_config()
+    if config.generic_config.decoding_config.repair_answers:
+        json_string = repair_json_string(text, answer_format)
+    # control characters in strings are allowed, as models often emit raw line breaks
+    return type_adapter.validate_python(json.loads(json_string, strict=False))
@@ -1,30 +1,39 @@
-import json
-import os.path
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
 import tempfile
+import threading
 import typing
 
-import docx
-import fitz
-
 from hrgpt.prompting.prompting import get_prompt_to_prettify_text
-from hrgpt.utils.chat_utils import get_answer_message
+from hrgpt.utils.cache_utils import CacheFactory, CacheType, compute_cache_key
+from hrgpt.utils.chat_utils import get_answer_message, get_routing_policy
 from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.layout_utils import (
+    get_text_lines_of_page_layouts,
+    get_text_quality,
+    normalize_text_lines,
+)
+from hrgpt.utils.parsing_utils import (
+    PdfSource,
+    get_pdf_page_amount,
+    parse_docx_paragraphs,
+    parse_pdf_page_layouts,
+    parse_pdf_pages,
+    parse_text_file,
+)
 from hrgpt.utils.translation_utils import (
     detect_language,
     get_native_language_of_model,
     translate_text,
 )
-from hrgpt.utils.type_utils import get_supported_file_types, DocumentFileType, File
-
-
-def extract_json_object_from_string(text: str) -> dict[str, typing.Any]:
-    json_start_string = text.find("{")
-    json_end_string = text.rfind("}")
-    if json_start_string != -1 and json_end_string != -1:
-        json_string = text[json_start_string : json_end_string + 1]
-        return typing.cast(dict[str, typing.Any], json.loads(json_string, strict=False))
-    else:
-        raise ValueError
+from hrgpt.utils.type_utils import (
+    get_supported_file_types,
+    DocumentFileType,
+    File,
+    PromptType,
+)
 
 
 def apply_replacements(text: str, replacements: tuple[tuple[str, str], ...]) -> str:
@@ -33,47 +42,195 @@ def apply_replacements(text: str, replacements: tuple[tuple[str, str], ...]) ->
     return text
 
 
+def get_document_text_cache_key(
+    file: File, replacements: tuple[tuple[str, str], ...], translate: bool
+) -> str:
+    config = AppConfigFactory.get_app_config()
+    prettify = config.generic_config.prettify_config.enable_llm_prettification
+    return compute_cache_key(
+        {
+            "content": hashlib.sha256(file.content).hexdigest(),
+            "type": file.type,
+            "replacements": replacements,
+            "prettify_config": config.generic_config.prettify_config,
+            "target_language": get_native_language_of_model() if translate else None,
+            # the prettified text depends on the prompt and the models answering it
+            "prettify_prompt": (
+                config.generic_config.prompt_config.prettify_text_prompt
+                if prettify
+                else None
+            ),
+            "prettify_models": (
+                get_routing_policy(PromptType.PRETTIFY_TEXT).models
+                if prettify
+                else None
+            ),
+        }
+    )
+
+
 def get_document_text(
     file: File,
     replacements: tuple[tuple[str, str], ...] = ((chr(160), " "), (chr(8203), " ")),
     translate: bool = True,
 ) -> str:
-    suffix = file.type.value
-    with tempfile.NamedTemporaryFile(prefix=file.name, suffix=suffix) as temp_file:
-        temp_file.write(file.content)
-        file_path = os.path.abspath(temp_file.name)
-        if suffix not in get_supported_file_types():
-            raise RuntimeError
-        text_parts: list[str] = []
-        match suffix:
-            case DocumentFileType.PDF:
-                with fitz.open(file_path) as pdf_document:
-                    for page in pdf_document:
-                        page_text = page.get_text()
-                        text_parts.append(page_text)
-            case DocumentFileType.DOCX:
-                word_document = docx.Document(file_path)
-                for paragraph in word_document.paragraphs:
-                    paragraph_text = paragraph.text
-                    text_parts.append(paragraph_text)
-            case DocumentFileType.TEXT:
-                with open(file_path) as text_file:
-                    file_text = text_file.read()
-                    text_parts.append(file_text)
-            case _:
-                raise RuntimeError
-        text = "\n".join(map(str.strip, text_parts))
-        text = apply_replacements(text, replacements)
-        if translate:
-            text_language = detect_language(text)
-            if text_language != get_native_language_of_model():
-                text = translate_text(
-                    text, target_language=get_native_language_of_model()
-                )
-        text = apply_replacements(text, replacements)
+    cache = CacheFactory.get_cache(CacheType.DOCUMENT_TEXT)
+    if cache is None:
+        return extract_document_text(file, replacements, translate)
+    cache_key = get_document_text_cache_key(file, replacements, translate)
+    cached_text = cache.get(cache_key)
+    if cached_text is not None:
+        return cached_text
+    text = extract_document_text(file, replacements, translate)
+    cache.set(cache_key, text)
+    return text
+
+
+class ParsingPoolFactory:
+    process_pool: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+    lock = threading.Lock()
+
+    @classmethod
+    def get_process_pool(
+        cls,
+    ) -> typing.Optional[concurrent.futures.ProcessPoolExecutor]:
         config = AppConfigFactory.get_app_config()
-        if config.generic_config.prettify_config.enable_llm_prettification:
-            answer = get_answer_message(get_prompt_to_prettify_text(text))
-            text = answer.text
-        text = apply_replacements(text, replacements)
-        return text
+        parsing_config = config.generic_config.parsing_config
+        if not parsing_config.use_process_pool:
+            return None
+        with cls.lock:
+            if cls.process_pool is None:
+                # spawned workers only import the parsing module and no copy of the app state
+                cls.process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=parsing_config.max_processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return cls.process_pool
+
+
+ParsingTask = tuple[typing.Callable[..., list[typing.Any]], tuple[typing.Any, ...]]
+
+
+def get_pdf_page_ranges(content: bytes) -> tuple[tuple[int, int], ...]:
+    config = AppConfigFactory.get_app_config()
+    pages_per_task = config.generic_config.parsing_config.pdf_pages_per_task
+    page_amount = get_pdf_page_amount(content)
+    # large documents are split into page ranges parsed in parallel
+    return tuple(
+        (x, min(x + pages_per_task, page_amount))
+        for x in range(0, page_amount, pages_per_task)
+    )
+
+
+def get_pdf_parsing_tasks(
+    pdf_source: PdfSource,
+    page_ranges: tuple[tuple[int, int], ...],
+    pdf_parser: typing.Callable[..., list[typing.Any]],
+) -> tuple[ParsingTask, ...]:
+    return tuple((pdf_parser, (pdf_source, *x)) for x in page_ranges)
+
+
+def get_parsing_tasks(
+    file: File, pdf_parser: typing.Callable[..., list[typing.Any]] = parse_pdf_pages
+) -> tuple[ParsingTask, ...]:
+    match file.type:
+        case DocumentFileType.PDF:
+            return get_pdf_parsing_tasks(
+                file.content, get_pdf_page_ranges(file.content), pdf_parser
+            )
+        case DocumentFileType.DOCX:
+            return ((parse_docx_paragraphs, (file.content,)),)
+        case DocumentFileType.TEXT:
+            return ((parse_text_file, (file.content,)),)
+        case _:
+            raise RuntimeError
+
+
+def run_parsing_tasks(parsing_tasks: tuple[ParsingTask, ...]) -> list[typing.Any]:
+    process_pool = ParsingPoolFactory.get_process_pool()
+    results: list[typing.Any] = []
+    if process_pool is None:
+        for function, arguments in parsing_tasks:
+            results.extend(function(*arguments))
+    else:
+        futures = [
+            process_pool.submit(function, *arguments)
+            for function, arguments in parsing_tasks
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def parse_document(
+    file: File, pdf_parser: typing.Callable[..., list[typing.Any]] = parse_pdf_pages
+) -> list[typing.Any]:
+    if file.type != DocumentFileType.PDF:
+        return run_parsing_tasks(get_parsing_tasks(file, pdf_parser))
+    config = AppConfigFactory.get_app_config()
+    page_ranges = get_pdf_page_ranges(file.content)
+    if (
+        len(page_ranges) < 2
+        or ParsingPoolFactory.get_process_pool() is None
+        or len(file.content)
+        < config.generic_config.parsing_config.min_shared_file_bytes
+    ):
+        # copying a small pdf to every task is cheaper than writing a temporary file
+        return run_parsing_tasks(
+            get_pdf_parsing_tasks(file.content, page_ranges, pdf_parser)
+        )
+    # the workers read large pdfs from a shared file instead of receiving a copy per task
+    file_descriptor, pdf_path = tempfile.mkstemp(prefix="parsing_", suffix=".pdf")
+    try:
+        with os.fdopen(file_descriptor, "wb") as pdf_file:
+            pdf_file.write(file.content)
+        return run_parsing_tasks(
+            get_pdf_parsing_tasks(pdf_path, page_ranges, pdf_parser)
+        )
+    finally:
+        os.remove(pdf_path)
+
+
+def parse_document_text(file: File) -> str:
+    if file.type not in get_supported_file_types():
+        raise RuntimeError
+    config = AppConfigFactory.get_app_config()
+    if not config.generic_config.prettify_config.enable_layout_normalization:
+        return "\n".join(parse_document(file))
+    if file.type == DocumentFileType.PDF:
+        text_lines = get_text_lines_of_page_layouts(
+            parse_document(file, parse_pdf_page_layouts)
+        )
+    else:
+        text_lines = "\n".join(parse_document(file)).splitlines()
+    return "\n".join(normalize_text_lines(text_lines))
+
+
+def is_llm_prettification_needed(text: str) -> bool:
+    config = AppConfigFactory.get_app_config()
+    prettify_config = config.generic_config.prettify_config
+    if not prettify_config.enable_llm_prettification:
+        return False
+    if not prettify_config.enable_layout_normalization:
+        return True
+    # the language model is only a fallback for texts the local normalization could not fix
+    return get_text_quality(text) < prettify_config.min_layout_quality
+
+
+def extract_document_text(
+    file: File, replacements: tuple[tuple[str, str], ...], translate: bool
+) -> str:
+    text = parse_document_text(file)
+    text = apply_replacements(text, replacements)
+    if translate:
+        text_language = detect_language(text)
+        if text_language != get_native_language_of_model():
+            text = translate_text(text, target_language=get_native_language_of_model())
+    text = apply_replacements(text, replacements)
+    if is_llm_prettification_needed(text):
+        answer = get_answer_message(
+            get_prompt_to_prettify_text(text), PromptType.PRETTIFY_TEXT
+        )
+        text = answer.text
+    text = apply_replacements(text, replacements)
+    return text
@@ -2,6 +2,7 @@ from hrgpt.logger.logger import LoggerFactory
 from hrgpt.utils.argument_utils import get_args
 from hrgpt.utils.config_utils import get_app_config_from_json_file, AppConfigFactory
 from hrgpt.utils.polars_utils import configure_polars
+from hrgpt.utils.translation_utils import LanguageDetectorFactory
 
 
 def initialize_app() -> None:
@@ -15,3 +16,5 @@ def initialize_app() -> None:
     LoggerFactory.initialize_loggers(app_config.generic_config.logging_config)
     # initialize the app config factory
     AppConfigFactory.initialize_app_config(app_config)
+    # build the language detector once instead of for every document
+    LanguageDetectorFactory.get_language_detector()
@@ -0,0 +1,179 @@
+import collections
+import re
+import typing
+import unicodedata
+
+import fitz
+import pydantic
+
+# page layouts are read in spawned worker processes,
+# so this module must not import the rest of the app
+
+BULLET_CHARACTERS = "•●○◦▪▫■□►▸‣⁃∙·"
+# dashes and asterisks also draw separators, so they only start a bullet followed by text
+BULLET_PATTERN = re.compile(rf"^(?:[{BULLET_CHARACTERS}]\s*|[-*–—]\s+)")
+BlockTuple = tuple[float, float, float, float, str, int, int]
+
+
+class PageLayout(pydantic.BaseModel):
+    header_lines: list[str]
+    body_lines: list[str]
+    footer_lines: list[str]
+
+
+def get_block_lines(block: BlockTuple) -> list[str]:
+    return [x.strip() for x in block[4].splitlines() if len(x.strip()) > 0]
+
+
+def get_column_gutter(blocks: list[BlockTuple]) -> typing.Optional[float]:
+    # the right edge that the most blocks on both sides and the fewest crossing blocks agree on
+    best_gutter: typing.Optional[float] = None
+    best_score = 0
+    for gutter in sorted(set(x[2] for x in blocks)):
+        left_amount = sum(1 for x in blocks if x[2] <= gutter)
+        right_amount = sum(1 for x in blocks if x[0] >= gutter)
+        crossing_amount = len(blocks) - left_amount - right_amount
+        score = min(left_amount, right_amount) - 2 * crossing_amount
+        if min(left_amount, right_amount) >= 3 and score > best_score:
+            best_gutter = gutter
+            best_score = score
+    return best_gutter
+
+
+def sort_blocks_by_columns(blocks: list[BlockTuple]) -> list[BlockTuple]:
+    blocks = sorted(blocks, key=lambda x: (x[1], x[0]))
+    gutter = get_column_gutter(blocks)
+    if gutter is None:
+        return blocks
+    # blocks crossing the gutter separate the sections of a two column layout
+    sorted_blocks: list[BlockTuple] = []
+    left_blocks: list[BlockTuple] = []
+    right_blocks: list[BlockTuple] = []
+    for block in blocks:
+        if block[2] <= gutter:
+            left_blocks.append(block)
+        elif block[0] >= gutter:
+            right_blocks.append(block)
+        else:
+            sorted_blocks.extend(left_blocks + right_blocks)
+            left_blocks, right_blocks = [], []
+            sorted_blocks.append(block)
+    sorted_blocks.extend(left_blocks + right_blocks)
+    return sorted_blocks
+
+
+def get_page_layout(page: fitz.Page, margin_ratio: float = 0.08) -> PageLayout:
+    page_height = page.rect.height
+    text_blocks = [
+        typing.cast(BlockTuple, tuple(x))
+        for x in page.get_text("blocks", sort=False)
+        if x[6] == 0
+    ]
+    page_layout = PageLayout(header_lines=[], body_lines=[], footer_lines=[])
+    for block in sort_blocks_by_columns(text_blocks):
+        if block[3] <= page_height * margin_ratio:
+            page_layout.header_lines.extend(get_block_lines(block))
+        elif block[1] >= page_height * (1 - margin_ratio):
+            page_layout.footer_lines.extend(get_block_lines(block))
+        else:
+            page_layout.body_lines.extend(get_block_lines(block))
+    return page_layout
+
+
+def get_repeated_line_key(line: str) -> str:
+    # page numbers differ on every page
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def get_text_lines_of_page_layouts(page_layouts: list[PageLayout]) -> list[str]:
+    margin_line_counter: collections.Counter[str] = collections.Counter()
+    for page_layout in page_layouts:
+        margin_line_counter.update(
+            {
+                get_repeated_line_key(x)
+                for x in page_layout.header_lines + page_layout.footer_lines
+            }
+        )
+    minimum_repetitions = max(2, len(page_layouts) // 2)
+    text_lines: list[str] = []
+    for page_index, page_layout in enumerate(page_layouts):
+        for line in (
+            page_layout.header_lines + page_layout.body_lines + page_layout.footer_lines
+        ):
+            if (
+                line in page_layout.body_lines
+                # the header of the first page often holds the name of the candidate
+                or (page_index == 0 and line in page_layout.header_lines)
+                or margin_line_counter[get_repeated_line_key(line)]
+                < minimum_repetitions
+            ):
+                text_lines.append(line)
+    return text_lines
+
+
+def is_bullet_line(line: str) -> bool:
+    return len(line) == 1 and line in BULLET_CHARACTERS
+
+
+def remove_bullet(line: str) -> typing.Optional[str]:
+    bullet_match = BULLET_PATTERN.match(line)
+    if bullet_match is None:
+        return None
+    bullet_text = line[bullet_match.end() :].strip()
+    if not any(x.isalnum() for x in bullet_text):
+        return None
+    return bullet_text
+
+
+def normalize_text_lines(text_lines: list[str]) -> list[str]:
+    normalized_lines: list[str] = []
+    pending_bullet = False
+    for line in (x.strip() for x in text_lines):
+        if len(line) == 0:
+            # runs of blank lines are collapsed, as they separate sections and paragraphs
+            if len(normalized_lines) > 0 and normalized_lines[-1] != "":
+                normalized_lines.append("")
+            continue
+        if is_bullet_line(line):
+            # the bullet glyph and its text are often separate lines
+            pending_bullet = True
+            continue
+        bullet_text = remove_bullet(line)
+        if bullet_text is not None:
+            line = bullet_text
+            pending_bullet = True
+        if (
+            not pending_bullet
+            and len(normalized_lines) > 0
+            and re.search(r"[^\W\d_]-$", normalized_lines[-1]) is not None
+            and line[0].islower()
+        ):
+            # repair words hyphenated at the end of a line, compound words keep their hyphen
+            last_word = normalized_lines[-1].rsplit(maxsplit=1)[-1]
+            normalized_lines[-1] = (
+                normalized_lines[-1]
+                if "-" in last_word[:-1]
+                else normalized_lines[-1][:-1]
+            ) + line
+            continue
+        normalized_lines.append(f"- {line}" if pending_bullet else line)
+        pending_bullet = False
+    if len(normalized_lines) > 0 and normalized_lines[-1] == "":
+        normalized_lines.pop()
+    return normalized_lines
+
+
+def get_text_quality(text: str) -> float:
+    # the share of characters and lines that do not look like broken extraction
+    lines = [x for x in text.splitlines() if len(x.strip()) > 0]
+    if len(lines) == 0:
+        return 0.0
+    broken_character_amount = sum(
+        1
+        for x in text
+        if x == "�" or (unicodedata.category(x) in ("Cc", "Co") and x not in "\n\t")
+    )
+    short_line_amount = sum(1 for x in lines if len(x.strip()) <= 2)
+    return (1 - broken_character_amount / len(text)) * (
+        1 - short_line_amount / len(lines)
+    )
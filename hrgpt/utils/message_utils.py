@@ -1,7 +1,8 @@
 import datetime
+import typing
 
 from hrgpt.logger.logger import LoggerFactory
-from hrgpt.utils.type_utils import ChatMessage, Author
+from hrgpt.utils.type_utils import ChatMessage, Author, TokenUsage
 
 
 def generate_user_chat_message(
@@ -23,15 +24,31 @@ def generate_model_chat_message(
     before_datetime: datetime.datetime,
     creation_datetime: datetime.datetime,
     after_datetime: datetime.datetime,
+    token_usage: typing.Optional[TokenUsage] = None,
+    time_to_first_token: typing.Optional[datetime.timedelta] = None,
+    time_to_json: typing.Optional[datetime.timedelta] = None,
+    model: typing.Optional[str] = None,
+    choice_texts: tuple[str, ...] = (),
 ) -> ChatMessage:
     return ChatMessage(
         text=prompt.strip(),
         author=Author.MODEL,
         creation_datetime=creation_datetime,
         generation_timedelta=after_datetime - before_datetime,
+        token_usage=token_usage if token_usage is not None else TokenUsage(),
+        time_to_first_token=time_to_first_token,
+        time_to_json=time_to_json,
+        model=model,
+        choice_texts=choice_texts,
     )
 
 
+def get_choice_texts(chat_message: ChatMessage) -> tuple[str, ...]:
+    if len(chat_message.choice_texts) == 0:
+        return (chat_message.text,)
+    return chat_message.choice_texts
+
+
 def generate_system_chat_message(prompt: str) -> ChatMessage:
     current_datetime = datetime.datetime.now(datetime.timezone.utc)
     return ChatMessage(
@@ -0,0 +1,54 @@
+import io
+
+import docx
+import fitz
+
+from hrgpt.utils.layout_utils import PageLayout, get_page_layout
+
+# the functions of this module are run in spawned worker processes,
+# so it must only import modules that do not load the rest of the app
+
+
+# a pdf is either passed as its content or as the path of a file holding it
+PdfSource = bytes | str
+
+
+def open_pdf_document(pdf_source: PdfSource) -> fitz.Document:
+    if isinstance(pdf_source, bytes):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source, filetype="pdf")
+
+
+def parse_pdf_pages(
+    pdf_source: PdfSource, page_start: int, page_stop: int
+) -> list[str]:
+    with open_pdf_document(pdf_source) as pdf_document:
+        return [
+            pdf_document[page_index].get_text().strip()
+            for page_index in range(page_start, page_stop)
+        ]
+
+
+def parse_pdf_page_layouts(
+    pdf_source: PdfSource, page_start: int, page_stop: int
+) -> list[PageLayout]:
+    with open_pdf_document(pdf_source) as pdf_document:
+        return [
+            get_page_layout(pdf_document[page_index])
+            for page_index in range(page_start, page_stop)
+        ]
+
+
+def parse_docx_paragraphs(content: bytes) -> list[str]:
+    word_document = docx.Document(io.BytesIO(content))
+    return [paragraph.text.strip() for paragraph in word_document.paragraphs]
+
+
+def parse_text_file(content: bytes) -> list[str]:
+    with io.TextIOWrapper(io.BytesIO(content), encoding="utf-8") as text_file:
+        return [text_file.read().strip()]
+
+
+def get_pdf_page_amount(pdf_source: PdfSource) -> int:
+    with open_pdf_document(pdf_source) as pdf_document:
+        return int(pdf_document.page_count)
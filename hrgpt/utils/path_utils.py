@@ -37,6 +37,32 @@ def get_generated_pdfs_path() -> str:
     return os.path.join(get_repo_root_path(), "generated_pdfs")
 
 
+def get_generated_caches_path() -> str:
+    generated_caches_path = os.path.join(get_repo_root_path(), "generated_caches")
+    os.makedirs(generated_caches_path, exist_ok=True)
+    return generated_caches_path
+
+
+def get_generated_batches_path() -> str:
+    generated_batches_path = os.path.join(get_repo_root_path(), "generated_batches")
+    os.makedirs(generated_batches_path, exist_ok=True)
+    return generated_batches_path
+
+
+def get_generated_requirements_path() -> str:
+    generated_requirements_path = os.path.join(
+        get_repo_root_path(), "generated_requirements"
+    )
+    os.makedirs(generated_requirements_path, exist_ok=True)
+    return generated_requirements_path
+
+
+def get_generated_cassettes_path() -> str:
+    generated_cassettes_path = os.path.join(get_repo_root_path(), "generated_cassettes")
+    os.makedirs(generated_cassettes_path, exist_ok=True)
+    return generated_cassettes_path
+
+
 def get_module_root_path() -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 
@@ -4,6 +4,7 @@ import typing
 from hrgpt.utils.config_utils import get_job_requirement_definitions, AppConfigFactory
 from hrgpt.utils.sample_utils import (
     get_empty_score,
+    get_empty_indexed_score,
     get_empty_promising_result,
     get_empty_requirements,
     get_sample_requirement,
@@ -19,6 +20,7 @@ from hrgpt.utils.type_utils import (
 
 class StaticPlaceholder(enum.StrEnum):
     EMPTY_SCORE = enum.auto()
+    EMPTY_INDEXED_SCORE = enum.auto()
     EMPTY_PROMISING_RESULT = enum.auto()
     EMPTY_REQUIREMENTS = enum.auto()
     SAMPLE_REQUIREMENT = enum.auto()
@@ -37,6 +39,8 @@ class DynamicPlaceholder(enum.StrEnum):
     REQUIREMENT_TYPE_NAME = enum.auto()
     REQUIREMENT_TYPE_DEFINITION = enum.auto()
     REQUIREMENT_MATCHES = enum.auto()
+    REQUIREMENTS = enum.auto()
+    REQUIREMENTS_TYPE_DEFINITIONS = enum.auto()
 
 
 Placeholder = typing.Union[StaticPlaceholder, DynamicPlaceholder]
@@ -55,6 +59,8 @@ def get_static_placeholder_configuration() -> StaticPlaceholderConfiguration:
         match placeholder:
             case StaticPlaceholder.EMPTY_SCORE:
                 value = dumps(get_empty_score())
+            case StaticPlaceholder.EMPTY_INDEXED_SCORE:
+                value = dumps(get_empty_indexed_score())
             case StaticPlaceholder.EMPTY_PROMISING_RESULT:
                 value = dumps(get_empty_promising_result())
             case StaticPlaceholder.EMPTY_REQUIREMENTS:
@@ -105,10 +111,59 @@ def create_dynamic_placeholders_from_requirement_type(
     )
 
 
+def create_dynamic_placeholders_from_requirements(
+    requirements: tuple[tuple[JobRequirementType, Requirement], ...],
+) -> DynamicPlaceholderConfiguration:
+    app_config = AppConfigFactory.get_app_config()
+    job_requirement_definitions = get_job_requirement_definitions(
+        app_config.generic_config.job_requirements_config
+    )
+    return (
+        (
+            DynamicPlaceholder.REQUIREMENTS,
+            dumps(
+                [
+                    {
+                        "index": index,
+                        "requirement_type": requirement_type,
+                        "specification": requirement.specification,
+                    }
+                    for index, (requirement_type, requirement) in enumerate(
+                        requirements
+                    )
+                ]
+            ),
+        ),
+        (
+            DynamicPlaceholder.REQUIREMENTS_TYPE_DEFINITIONS,
+            dumps(
+                {
+                    requirement_type: job_requirement_definitions[requirement_type]
+                    for requirement_type, _ in requirements
+                }
+            ),
+        ),
+    )
+
+
 def create_dynamic_placeholders_from_requirement_matches(
     requirement_matches: dict[JobRequirementType, list[RequirementMatch]]
 ) -> DynamicPlaceholderConfiguration:
-    return ((DynamicPlaceholder.REQUIREMENT_MATCHES, dumps(requirement_matches)),)
+    # the score spread is internal and not shown to the model
+    return (
+        (
+            DynamicPlaceholder.REQUIREMENT_MATCHES,
+            dumps(
+                {
+                    key: [
+                        x.model_dump(mode="json", exclude={"score_spread"})
+                        for x in value
+                    ]
+                    for key, value in requirement_matches.items()
+                }
+            ),
+        ),
+    )
 
 
 def replace_placeholders(
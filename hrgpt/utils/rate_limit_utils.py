@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+from hrgpt.config.config import ModelEnum, Provider, RateLimitConfiguration
+from hrgpt.utils.config_utils import AppConfigFactory, get_model_for_model_enum
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst_seconds: float) -> None:
+        self.refill_rate = rate_per_minute / 60
+        self.capacity = self.refill_rate * burst_seconds
+        self.level = self.capacity
+        self.timestamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        # the amount is taken immediately and may leave the bucket in debt,
+        # the returned waiting time is needed until the debt is paid off
+        with self.lock:
+            current_timestamp = time.monotonic()
+            self.level = min(
+                self.capacity,
+                self.level + (current_timestamp - self.timestamp) * self.refill_rate,
+            )
+            self.timestamp = current_timestamp
+            self.level -= amount
+            if self.level >= 0:
+                return 0.0
+            return -self.level / self.refill_rate
+
+
+BucketKey = tuple[Provider | ModelEnum, str]
+
+
+class RateLimiter:
+    bucket_dict: dict[BucketKey, TokenBucket] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get_bucket(cls, key: BucketKey, rate_per_minute: float) -> TokenBucket:
+        network_config = AppConfigFactory.get_app_config().generic_config.network_config
+        with cls.lock:
+            if key not in cls.bucket_dict:
+                cls.bucket_dict[key] = TokenBucket(
+                    rate_per_minute * network_config.rate_limit_utilization,
+                    network_config.rate_limit_burst_seconds,
+                )
+            return cls.bucket_dict[key]
+
+    @classmethod
+    def get_rate_limits(
+        cls, model_enum: ModelEnum
+    ) -> tuple[tuple[Provider | ModelEnum, RateLimitConfiguration], ...]:
+        network_config = AppConfigFactory.get_app_config().generic_config.network_config
+        provider = get_model_for_model_enum(model_enum).provider
+        rate_limits: tuple[
+            tuple[Provider | ModelEnum, RateLimitConfiguration], ...
+        ] = ()
+        if provider in network_config.provider_rate_limits:
+            rate_limits += ((provider, network_config.provider_rate_limits[provider]),)
+        if model_enum in network_config.model_rate_limits:
+            rate_limits += ((model_enum, network_config.model_rate_limits[model_enum]),)
+        return rate_limits
+
+    @classmethod
+    def get_reserved_token_amount(
+        cls, model_enum: ModelEnum, prompt_token_amount: int
+    ) -> int:
+        config = AppConfigFactory.get_app_config()
+        if get_model_for_model_enum(model_enum).provider == Provider.OPENAI:
+            # openai counts the maximum completion length against the token quota
+            return prompt_token_amount + config.llm_config.max_tokens
+        return prompt_token_amount
+
+    @classmethod
+    def reserve(cls, model_enum: ModelEnum, prompt_token_amount: int) -> float:
+        token_amount = cls.get_reserved_token_amount(model_enum, prompt_token_amount)
+        waiting_seconds = 0.0
+        for key, rate_limit in cls.get_rate_limits(model_enum):
+            request_bucket = cls.get_bucket(
+                (key, "requests"), rate_limit.requests_per_minute
+            )
+            token_bucket = cls.get_bucket((key, "tokens"), rate_limit.tokens_per_minute)
+            waiting_seconds = max(
+                waiting_seconds,
+                request_bucket.reserve(1),
+                token_bucket.reserve(token_amount),
+            )
+        return waiting_seconds
+
+    @classmethod
+    def acquire(cls, model_enum: ModelEnum, prompt_token_amount: int) -> None:
+        time.sleep(cls.reserve(model_enum, prompt_token_amount))
+
+    @classmethod
+    async def acquire_async(
+        cls, model_enum: ModelEnum, prompt_token_amount: int
+    ) -> None:
+        await asyncio.sleep(cls.reserve(model_enum, prompt_token_amount))
@@ -0,0 +1,113 @@
+import asyncio
+import collections
+import os.path
+import threading
+import time
+import typing
+
+import pydantic
+
+from hrgpt.config.config import ModelEnum, ReplayMode, ReplayConfiguration
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.cache_utils import compute_cache_key
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.path_utils import get_generated_cassettes_path
+from hrgpt.utils.type_utils import AnswerFormat, Author, ChatMessage
+
+
+class CassetteEntry(pydantic.BaseModel):
+    key: str
+    value: str
+    latency_seconds: typing.Annotated[float, pydantic.Field(ge=0)]
+
+
+class Cassette:
+    def __init__(self, cassette_path: str) -> None:
+        self.cassette_path = cassette_path
+        self.lock = threading.Lock()
+        self.entries: collections.defaultdict[str, list[CassetteEntry]] = (
+            collections.defaultdict(list)
+        )
+        self.replay_counts: collections.Counter[str] = collections.Counter()
+        if os.path.exists(cassette_path):
+            with open(cassette_path) as cassette_file:
+                for line in cassette_file:
+                    if len(line.strip()) == 0:
+                        continue
+                    entry = CassetteEntry.model_validate_json(line)
+                    self.entries[entry.key].append(entry)
+
+    def record(self, key: str, value: str, latency_seconds: float) -> None:
+        entry = CassetteEntry(key=key, value=value, latency_seconds=latency_seconds)
+        with self.lock:
+            self.entries[key].append(entry)
+            with open(self.cassette_path, "a") as cassette_file:
+                cassette_file.write(f"{entry.model_dump_json()}\n")
+
+    def replay(self, key: str) -> CassetteEntry:
+        with self.lock:
+            entries = self.entries.get(key)
+            if entries is None:
+                LoggerFactory.get_logger().error(
+                    f'The cassette "{self.cassette_path}" has no entry for key "{key}"'
+                )
+                raise RuntimeError
+            # repeated requests cycle through all recorded answers of the request
+            entry = entries[self.replay_counts[key] % len(entries)]
+            self.replay_counts[key] += 1
+            return entry
+
+
+class CassetteFactory:
+    cassette_dict: dict[str, Cassette] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get_cassette(cls) -> Cassette:
+        replay_config = get_replay_config()
+        cassette_path = os.path.join(
+            get_generated_cassettes_path(), f"{replay_config.cassette_name}.jsonl"
+        )
+        with cls.lock:
+            if cassette_path not in cls.cassette_dict:
+                cls.cassette_dict[cassette_path] = Cassette(cassette_path)
+            return cls.cassette_dict[cassette_path]
+
+
+def get_replay_config() -> ReplayConfiguration:
+    config = AppConfigFactory.get_app_config()
+    return config.generic_config.replay_config
+
+
+def is_replay_mode(replay_mode: ReplayMode) -> bool:
+    return get_replay_config().mode == replay_mode
+
+
+def get_chat_cassette_key(
+    model: ModelEnum,
+    answer_format: AnswerFormat,
+    chat_message_history: tuple[ChatMessage, ...],
+    prompt: str,
+) -> str:
+    config = AppConfigFactory.get_app_config()
+    return compute_cache_key(
+        {
+            "model": model,
+            "answer_format": answer_format,
+            "choices": config.llm_config.choices,
+            "messages": [
+                *[(x.author, x.text) for x in chat_message_history],
+                (Author.USER, prompt.strip()),
+            ],
+        }
+    )
+
+
+def wait_for_recorded_latency(entry: CassetteEntry) -> None:
+    if get_replay_config().inject_latency:
+        time.sleep(entry.latency_seconds)
+
+
+async def wait_for_recorded_latency_async(entry: CassetteEntry) -> None:
+    if get_replay_config().inject_latency:
+        await asyncio.sleep(entry.latency_seconds)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import typing
+
+import pydantic
+
+from hrgpt.logger.logger import LoggerFactory
+from hrgpt.utils.cache_utils import compute_cache_key
+from hrgpt.utils.chat_utils import get_routing_policy
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.path_utils import get_generated_requirements_path
+from hrgpt.utils.type_utils import JobRequirementType, Requirement, PromptType
+
+
+class CachedRequirements(pydantic.BaseModel):
+    # pinned requirements were checked or edited by hand and are never replaced
+    pinned: bool = False
+    job_name: str
+    extraction_key: str
+    requirements: dict[JobRequirementType, list[Requirement]]
+
+
+def get_job_text_key(job_text: str) -> str:
+    return hashlib.sha256(job_text.encode("utf-8")).hexdigest()
+
+
+def get_extraction_key() -> str:
+    app_config = AppConfigFactory.get_app_config()
+    return compute_cache_key(
+        {
+            "extract_requirements_prompt": app_config.generic_config.prompt_config.extract_requirements_prompt,
+            "system_context": app_config.llm_config.system_context,
+            "job_requirements_config": app_config.generic_config.job_requirements_config,
+            # other models extract other requirements from the same job text
+            "routing_policy": get_routing_policy(PromptType.EXTRACT_REQUIREMENTS),
+        }
+    )
+
+
+class RequirementCache:
+    # the requirements of every job text are a JSON file that can be pinned and edited
+    lock = threading.Lock()
+
+    @classmethod
+    def get_file_path(cls, job_text: str) -> str:
+        return os.path.join(
+            get_generated_requirements_path(), f"{get_job_text_key(job_text)}.json"
+        )
+
+    @classmethod
+    def is_expired(cls, file_path: str) -> bool:
+        app_config = AppConfigFactory.get_app_config()
+        cache_config = app_config.generic_config.cache_config.requirement_cache
+        return (
+            os.path.getmtime(file_path)
+            < time.time() - cache_config.time_to_live_seconds
+        )
+
+    @classmethod
+    def read_file(cls, file_path: str) -> typing.Optional[CachedRequirements]:
+        try:
+            with open(file_path, encoding="utf-8") as cache_file:
+                return CachedRequirements.model_validate_json(cache_file.read())
+        except FileNotFoundError:
+            return None
+        except pydantic.ValidationError:
+            LoggerFactory.get_logger().warning(
+                f'The cached requirements in "{file_path}" are invalid and are ignored'
+            )
+            return None
+
+    @classmethod
+    def get(
+        cls, job_text: str
+    ) -> typing.Optional[dict[JobRequirementType, list[Requirement]]]:
+        app_config = AppConfigFactory.get_app_config()
+        if not app_config.generic_config.cache_config.requirement_cache.enabled:
+            return None
+        file_path = cls.get_file_path(job_text)
+        cached_requirements = cls.read_file(file_path)
+        if cached_requirements is None:
+            return None
+        if not cached_requirements.pinned and (
+            cached_requirements.extraction_key != get_extraction_key()
+            or cls.is_expired(file_path)
+        ):
+            return None
+        return cached_requirements.requirements
+
+    @classmethod
+    def set(
+        cls,
+        job_text: str,
+        job_name: str,
+        requirements: dict[JobRequirementType, list[Requirement]],
+    ) -> None:
+        app_config = AppConfigFactory.get_app_config()
+        if not app_config.generic_config.cache_config.requirement_cache.enabled:
+            return
+        file_path = cls.get_file_path(job_text)
+        with cls.lock:
+            existing_requirements = cls.read_file(file_path)
+            if existing_requirements is not None and existing_requirements.pinned:
+                return
+            cached_requirements = CachedRequirements(
+                job_name=job_name,
+                extraction_key=get_extraction_key(),
+                requirements=requirements,
+            )
+            # the file is replaced atomically, as other processes may read it at the same time
+            file_descriptor, temporary_path = tempfile.mkstemp(
+                dir=os.path.dirname(file_path), suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as temporary_file:
+                temporary_file.write(cached_requirements.model_dump_json(indent=4))
+            os.replace(temporary_path, file_path)
+            cls.remove_surplus_files()
+
+    @classmethod
+    def remove_surplus_files(cls) -> None:
+        app_config = AppConfigFactory.get_app_config()
+        cache_config = app_config.generic_config.cache_config.requirement_cache
+        file_paths = sorted(
+            [
+                os.path.join(get_generated_requirements_path(), x)
+                for x in os.listdir(get_generated_requirements_path())
+                if x.endswith(".json")
+            ],
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for file_path in file_paths[cache_config.max_entries :]:
+            cached_requirements = cls.read_file(file_path)
+            if cached_requirements is None or not cached_requirements.pinned:
+                os.remove(file_path)
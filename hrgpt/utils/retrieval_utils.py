@@ -0,0 +1,159 @@
+import collections
+import functools
+import math
+import re
+import typing
+
+import pydantic
+
+from hrgpt.config.config import PromptLayout
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.text_utils import is_section_heading
+from hrgpt.utils.type_utils import JobRequirementType, Requirement
+
+
+STOP_WORDS = frozenset(
+    [
+        "and",
+        "are",
+        "for",
+        "from",
+        "has",
+        "have",
+        "least",
+        "the",
+        "with",
+        "und",
+        "der",
+        "die",
+        "das",
+        "mit",
+        "von",
+    ]
+)
+
+
+class CvSection(pydantic.BaseModel):
+    title: str
+    text: str
+
+
+def segment_cv_text(cv_text: str) -> tuple[CvSection, ...]:
+    sections: list[CvSection] = [CvSection(title="", text="")]
+    for line in cv_text.splitlines():
+        if is_section_heading(line):
+            sections.append(CvSection(title=line.strip(), text=""))
+        else:
+            sections[-1].text += f"{line}\n"
+    return tuple(x for x in sections if len(x.text.strip()) > 0 or len(x.title) > 0)
+
+
+def tokenize_text(text: str) -> list[str]:
+    # a crude plural stemming lets "language" match "languages"
+    return [
+        x[:-1] if len(x) > 3 and x.endswith("s") else x
+        for x in re.findall(r"\w+", text.lower())
+        if len(x) > 2 and x not in STOP_WORDS
+    ]
+
+
+class Bm25Index:
+    def __init__(
+        self, documents: typing.Sequence[str], k1: float = 1.5, b: float = 0.75
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.term_counters = [collections.Counter(tokenize_text(x)) for x in documents]
+        self.document_lengths = [sum(x.values()) for x in self.term_counters]
+        self.average_document_length = max(
+            1.0, sum(self.document_lengths) / max(1, len(documents))
+        )
+        document_frequencies: collections.Counter[str] = collections.Counter()
+        for term_counter in self.term_counters:
+            document_frequencies.update(term_counter.keys())
+        self.inverse_document_frequencies = {
+            term: math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequencies.items()
+        }
+
+    def get_scores(self, query: str) -> list[float]:
+        query_terms = set(tokenize_text(query))
+        scores: list[float] = []
+        for term_counter, document_length in zip(
+            self.term_counters, self.document_lengths
+        ):
+            score = 0.0
+            for term in query_terms:
+                term_frequency = term_counter.get(term, 0)
+                if term_frequency == 0:
+                    continue
+                score += (
+                    self.inverse_document_frequencies[term]
+                    * term_frequency
+                    * (self.k1 + 1)
+                    / (
+                        term_frequency
+                        + self.k1
+                        * (
+                            1
+                            - self.b
+                            + self.b * document_length / self.average_document_length
+                        )
+                    )
+                )
+            scores.append(score)
+        return scores
+
+
+class CvIndex:
+    def __init__(self, cv_text: str) -> None:
+        self.sections = segment_cv_text(cv_text)
+        self.index = Bm25Index([f"{x.title}\n{x.text}" for x in self.sections])
+
+    def get_top_section_indices(self, query: str, amount: int) -> list[int]:
+        scores = self.index.get_scores(query)
+        return sorted(
+            [x for x in range(len(self.sections)) if scores[x] > 0],
+            key=lambda x: -scores[x],
+        )[:amount]
+
+
+@functools.lru_cache(maxsize=256)
+def get_cv_index(cv_text: str) -> CvIndex:
+    # every CV is segmented and indexed once for all of its requirement prompts
+    return CvIndex(cv_text)
+
+
+def get_relevant_cv_text(
+    cv_text: str, requirements: tuple[tuple[JobRequirementType, Requirement], ...]
+) -> str:
+    config = AppConfigFactory.get_app_config()
+    retrieval_config = config.generic_config.retrieval_config
+    if (
+        not retrieval_config.enabled
+        # the prompts of a CV only share a cached prefix if they all contain the full CV
+        or config.generic_config.prompt_config.prompt_layout == PromptLayout.CV_PREFIX
+        or len(cv_text) < retrieval_config.min_cv_characters
+        or any(x in retrieval_config.full_cv_requirement_types for x, _ in requirements)
+    ):
+        return cv_text
+    cv_index = get_cv_index(cv_text)
+    if len(cv_index.sections) < 2:
+        return cv_text
+    section_indices: set[int] = set()
+    for requirement_type, requirement in requirements:
+        top_section_indices = cv_index.get_top_section_indices(
+            f"{requirement_type.replace('_', ' ')} {requirement.specification}",
+            retrieval_config.top_sections,
+        )
+        if len(top_section_indices) == 0:
+            # without any lexical evidence the model has to read the complete CV
+            return cv_text
+        section_indices.update(top_section_indices)
+    if cv_index.sections[0].title == "":
+        # the text before the first heading usually names the candidate and the current role
+        section_indices.add(0)
+    return "\n\n".join(
+        f"{cv_index.sections[x].title}\n{cv_index.sections[x].text}".strip()
+        for x in sorted(section_indices)
+    )
@@ -0,0 +1,104 @@
+import collections
+import math
+import random
+import threading
+import typing
+
+import google.api_core.exceptions
+import httpx
+import openai
+import replicate.exceptions
+
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.type_utils import PromptType
+
+LatencyKey = tuple[ModelEnum, PromptType]
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    if isinstance(
+        error,
+        (
+            TimeoutError,
+            httpx.TransportError,
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError,
+            google.api_core.exceptions.TooManyRequests,
+            google.api_core.exceptions.ResourceExhausted,
+            google.api_core.exceptions.ServerError,
+            google.api_core.exceptions.DeadlineExceeded,
+        ),
+    ):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    if isinstance(error, replicate.exceptions.ReplicateError):
+        return error.status is None or error.status == 429 or error.status >= 500
+    return False
+
+
+def get_retry_delay_seconds(attempt_index: int) -> float:
+    config = AppConfigFactory.get_app_config()
+    network_config = config.generic_config.network_config
+    # full jitter spreads out the retries of requests that failed together
+    return random.uniform(
+        0.0,
+        min(
+            network_config.retry_max_delay_seconds,
+            network_config.retry_base_delay_seconds * 2 ** min(attempt_index, 32),
+        ),
+    )
+
+
+class LatencyTracker:
+    latency_dict: dict[LatencyKey, collections.deque[float]] = {}
+    request_amount = 0
+    hedged_request_amount = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def record(
+        cls, model: ModelEnum, prompt_type: PromptType, latency_seconds: float
+    ) -> None:
+        config = AppConfigFactory.get_app_config()
+        hedging_config = config.generic_config.network_config.hedging_config
+        with cls.lock:
+            latencies = cls.latency_dict.setdefault(
+                (model, prompt_type),
+                collections.deque(maxlen=hedging_config.latency_window_size),
+            )
+            latencies.append(latency_seconds)
+
+    @classmethod
+    def get_hedge_delay_seconds(
+        cls, model: ModelEnum, prompt_type: PromptType
+    ) -> typing.Optional[float]:
+        config = AppConfigFactory.get_app_config()
+        hedging_config = config.generic_config.network_config.hedging_config
+        if not hedging_config.enabled:
+            return None
+        with cls.lock:
+            cls.request_amount += 1
+            latencies = sorted(cls.latency_dict.get((model, prompt_type), ()))
+        if len(latencies) < hedging_config.min_latency_samples:
+            return None
+        percentile_index = (
+            math.ceil(hedging_config.latency_percentile * len(latencies)) - 1
+        )
+        return max(hedging_config.min_delay_seconds, latencies[percentile_index])
+
+    @classmethod
+    def try_start_hedged_request(cls) -> bool:
+        config = AppConfigFactory.get_app_config()
+        hedging_config = config.generic_config.network_config.hedging_config
+        with cls.lock:
+            # the budget keeps the duplicated requests from multiplying the cost
+            if (
+                cls.hedged_request_amount + 1
+                > hedging_config.max_hedged_request_ratio * cls.request_amount
+            ):
+                return False
+            cls.hedged_request_amount += 1
+            return True
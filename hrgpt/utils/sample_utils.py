@@ -3,6 +3,7 @@ from hrgpt.utils.type_utils import (
     Requirement,
     RequirementType,
     Score,
+    IndexedScore,
     PromisingResult,
     JobRequirementType,
 )
@@ -31,6 +32,10 @@ def get_empty_score() -> Score:
     )
 
 
+def get_empty_indexed_score() -> IndexedScore:
+    return IndexedScore(index=0, **get_empty_score().model_dump())
+
+
 def get_empty_promising_result() -> PromisingResult:
     return PromisingResult(
         promising=False,
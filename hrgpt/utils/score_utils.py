@@ -1,8 +1,16 @@
 import statistics
+import typing
 
 from hrgpt.utils.config_utils import get_job_requirement_weightings, AppConfigFactory
 from hrgpt.utils.math_utils import clamp_int
-from hrgpt.utils.type_utils import RequirementMatch, TotalScoreValue, JobRequirementType
+from hrgpt.utils.type_utils import (
+    RequirementMatch,
+    TotalScoreValue,
+    JobRequirementType,
+    Score,
+    ScoreValue,
+    PromisingResult,
+)
 
 
 def compute_total_score(
@@ -41,3 +49,31 @@ def compute_total_score(
             / present_requirement_types_maximum
         )
     return total_score
+
+
+def aggregate_scores(scores: typing.Sequence[Score]) -> tuple[Score, ScoreValue]:
+    if len(scores) == 0:
+        raise ValueError
+    score_values = [x.value for x in scores]
+    # the low median is the value of a choice, so its explanation can be kept
+    median_score_value = statistics.median_low(score_values)
+    median_score = next(x for x in scores if x.value == median_score_value)
+    return median_score.model_copy(), max(score_values) - min(score_values)
+
+
+def aggregate_promising_results(
+    promising_results: typing.Sequence[PromisingResult],
+) -> tuple[PromisingResult, float]:
+    if len(promising_results) == 0:
+        raise ValueError
+    promising_amount = len([x for x in promising_results if x.promising])
+    not_promising_amount = len(promising_results) - promising_amount
+    if promising_amount == not_promising_amount:
+        # a tie is decided by the first choice
+        promising = promising_results[0].promising
+    else:
+        promising = promising_amount > not_promising_amount
+    majority_result = next(x for x in promising_results if x.promising == promising)
+    return majority_result.model_copy(), max(
+        promising_amount, not_promising_amount
+    ) / len(promising_results)
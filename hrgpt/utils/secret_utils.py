@@ -1,13 +1,12 @@
 import typing
 
 from hrgpt.config.config import Provider
-from hrgpt.utils.config_utils import get_model_for_model_enum, AppConfigFactory
+from hrgpt.utils.config_utils import AppConfigFactory
 
 
-def get_api_key_for_provider() -> str:
+def get_api_key_for_provider(provider: Provider) -> str:
     app_config = AppConfigFactory.get_app_config()
     api_key: typing.Optional[str] = None
-    provider = get_model_for_model_enum(app_config.llm_config.model).provider
     if provider == Provider.OPENAI:
         api_key = app_config.secrets.openai_api_key
     elif provider == Provider.REPLICATE:
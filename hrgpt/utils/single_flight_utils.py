@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+import threading
+import typing
+
+T = typing.TypeVar("T")
+
+
+class SingleFlight:
+    # identical requests in flight share the future of the first request
+    futures: dict[str, concurrent.futures.Future[typing.Any]] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def claim(cls, key: str) -> tuple[concurrent.futures.Future[typing.Any], bool]:
+        with cls.lock:
+            future = cls.futures.get(key)
+            if future is not None:
+                return future, False
+            future = concurrent.futures.Future()
+            cls.futures[key] = future
+            return future, True
+
+    @classmethod
+    def release(cls, key: str, future: concurrent.futures.Future[typing.Any]) -> None:
+        with cls.lock:
+            if cls.futures.get(key) is future:
+                del cls.futures[key]
+
+    @classmethod
+    def get_in_flight_amount(cls) -> int:
+        with cls.lock:
+            return len(cls.futures)
+
+
+def run_single_flight(key: str, function: typing.Callable[[], T]) -> tuple[T, bool]:
+    # the flag tells if the result was shared by another request
+    while True:
+        future, is_leader = SingleFlight.claim(key)
+        if is_leader:
+            break
+        try:
+            return future.result(), True
+        except concurrent.futures.CancelledError:
+            # the first request was cancelled, so this request takes over
+            continue
+    try:
+        result = function()
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    else:
+        future.set_result(result)
+        return result, False
+    finally:
+        SingleFlight.release(key, future)
+
+
+async def run_single_flight_async(
+    key: str, function: typing.Callable[[], typing.Awaitable[T]]
+) -> tuple[T, bool]:
+    while True:
+        future, is_leader = SingleFlight.claim(key)
+        if is_leader:
+            break
+        try:
+            # cancelling a waiting request must not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future)), True
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+    try:
+        result = await function()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    else:
+        future.set_result(result)
+        return result, False
+    finally:
+        SingleFlight.release(key, future)
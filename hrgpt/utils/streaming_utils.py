@@ -0,0 +1,103 @@
+import datetime
+import json
+import typing
+
+from hrgpt.utils.type_utils import AnswerFormat, TokenUsage
+
+
+class JsonStreamScanner:
+    def __init__(self, opening_character: str) -> None:
+        self.opening_character = opening_character
+        self.closing_character = {"{": "}", "[": "]"}[opening_character]
+        self.text = ""
+        self.scan_index = 0
+        self.start_index: typing.Optional[int] = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.json_text: typing.Optional[str] = None
+
+    def reset(self) -> None:
+        self.start_index = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> bool:
+        # returns true as soon as a balanced top level json value was received
+        self.text += text
+        while self.json_text is None and self.scan_index < len(self.text):
+            character = self.text[self.scan_index]
+            self.scan_index += 1
+            if self.start_index is None:
+                if character == self.opening_character:
+                    self.start_index = self.scan_index - 1
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif character == "\\":
+                    self.escaped = True
+                elif character == '"':
+                    self.in_string = False
+            elif character == '"':
+                self.in_string = True
+            elif character == self.opening_character:
+                self.depth += 1
+            elif character == self.closing_character:
+                self.depth -= 1
+                if self.depth == 0:
+                    candidate_text = self.text[self.start_index : self.scan_index]
+                    try:
+                        json.loads(candidate_text, strict=False)
+                    except json.JSONDecodeError:
+                        # continue with the next opening character
+                        self.scan_index = self.start_index + 1
+                        self.reset()
+                        continue
+                    self.json_text = candidate_text
+        return self.json_text is not None
+
+
+class AnswerStream:
+    def __init__(
+        self, answer_format: AnswerFormat, before_datetime: datetime.datetime
+    ) -> None:
+        self.before_datetime = before_datetime
+        self.text_parts: list[str] = []
+        self.scanner: typing.Optional[JsonStreamScanner] = None
+        match answer_format:
+            case AnswerFormat.JSON_OBJECT:
+                self.scanner = JsonStreamScanner("{")
+            case AnswerFormat.JSON_ARRAY:
+                self.scanner = JsonStreamScanner("[")
+        self.time_to_first_token: typing.Optional[datetime.timedelta] = None
+        self.time_to_json: typing.Optional[datetime.timedelta] = None
+        # filled in by the chat while consuming the stream of the provider
+        self.stopped = False
+        self.token_usage: typing.Optional[TokenUsage] = None
+        self.creation_datetime: typing.Optional[datetime.datetime] = None
+
+    def get_elapsed_timedelta(self) -> datetime.timedelta:
+        return datetime.datetime.now(datetime.timezone.utc) - self.before_datetime
+
+    def add_text(self, text: typing.Optional[str]) -> bool:
+        # returns true if the rest of the stream is not needed anymore
+        if text is None or len(text) == 0:
+            return False
+        if self.time_to_first_token is None:
+            self.time_to_first_token = self.get_elapsed_timedelta()
+        self.text_parts.append(text)
+        if self.scanner is None or not self.scanner.feed(text):
+            return False
+        self.time_to_json = self.get_elapsed_timedelta()
+        return True
+
+    def is_terminated_early(self) -> bool:
+        return self.time_to_json is not None
+
+    def get_text(self) -> str:
+        if self.scanner is not None and self.scanner.json_text is not None:
+            return self.scanner.json_text
+        return "".join(self.text_parts)
@@ -0,0 +1,67 @@
+import datetime
+import json
+import pathlib
+import tempfile
+
+import pytest
+
+from hrgpt.utils.batch_utils import (
+    BatchRequestBody,
+    BatchStatus,
+    LocalBatchEndpoint,
+    create_custom_id,
+    get_last_user_message_content,
+    get_prompt_type_of_custom_id,
+    run_batch,
+)
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.type_utils import ChatMessage, PromptType, TokenUsage
+from hrgpt.utils.usage_utils import UsageScope, UsageTracker
+
+
+def test_run_batch_with_local_endpoint(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def respond(custom_id: str, body: BatchRequestBody) -> ChatMessage:
+        assert get_prompt_type_of_custom_id(custom_id) == PromptType.MATCH_REQUIREMENT
+        current_datetime = datetime.datetime.now(datetime.timezone.utc)
+        return generate_model_chat_message(
+            json.dumps({"echo": get_last_user_message_content(body)}),
+            current_datetime,
+            current_datetime,
+            current_datetime,
+            token_usage=TokenUsage(prompt_tokens=10, completion_tokens=5),
+        )
+
+    batch_config = AppConfigFactory.get_app_config().generic_config.batch_config
+    monkeypatch.setattr(batch_config, "max_requests_per_batch", 1)
+    temporary_path = tmp_path / "temporary"
+    temporary_path.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temporary_path))
+    batches_path = tmp_path / "batches"
+    endpoint = LocalBatchEndpoint(str(batches_path), responder=respond)
+    first_custom_id = create_custom_id(PromptType.MATCH_REQUIREMENT, (0, 1))
+    second_custom_id = create_custom_id(PromptType.MATCH_REQUIREMENT, (1, 0))
+    UsageTracker.start_run()
+    answers = run_batch(
+        endpoint,
+        {first_custom_id: "first prompt", second_custom_id: "second prompt"},
+        {first_custom_id: UsageScope(job_name="job", cv_name="cv")},
+    )
+    assert answers == {
+        first_custom_id: json.dumps({"echo": "first prompt"}),
+        second_custom_id: json.dumps({"echo": "second prompt"}),
+    }
+    # every request is sent in its own batch and no input file is left behind
+    batch_ids = [x.name for x in batches_path.iterdir()]
+    assert len(batch_ids) == 2
+    assert all(endpoint.get_status(x) == BatchStatus.COMPLETED for x in batch_ids)
+    assert list(temporary_path.iterdir()) == []
+    # the usage of the batch output is attributed to the given scopes
+    usage_report = UsageTracker.get_run_report()
+    UsageTracker.finish_run()
+    assert usage_report.total.request_amount == 2
+    assert usage_report.total.prompt_tokens == 20
+    assert usage_report.per_job["job"].completion_tokens == 5
+    assert usage_report.per_cv["cv"].request_amount == 1
@@ -0,0 +1,33 @@
+import os.path
+import pathlib
+
+from hrgpt.utils.cache_utils import PersistentCache, compute_cache_key
+
+
+def test_persistent_cache_evicts_least_recently_used_entry(
+    tmp_path: pathlib.Path,
+) -> None:
+    cache = PersistentCache(
+        os.path.join(tmp_path, "cache.sqlite3"),
+        max_entries=2,
+        time_to_live_seconds=3600,
+    )
+    cache.set("first", "1")
+    cache.set("second", "2")
+    assert cache.get("first") == "1"
+    cache.set("third", "3")
+    assert cache.get("second") is None
+    assert cache.get("first") == "1"
+    assert cache.get("third") == "3"
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_persistent_cache_survives_reopening(tmp_path: pathlib.Path) -> None:
+    database_path = os.path.join(tmp_path, "cache.sqlite3")
+    cache_key = compute_cache_key({"prompt": "text"})
+    PersistentCache(database_path, max_entries=1, time_to_live_seconds=3600).set(
+        cache_key, "answer"
+    )
+    cache = PersistentCache(database_path, max_entries=1, time_to_live_seconds=3600)
+    assert cache.get(cache_key) == "answer"
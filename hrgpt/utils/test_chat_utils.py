@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+
+import pytest
+
+import hrgpt.utils.chat_utils
+from hrgpt.chat.chat import Chat
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.chat_utils import RequestLimiter, send_prompt_with_retries_async
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.rate_limit_utils import RateLimiter
+from hrgpt.utils.retry_utils import LatencyTracker
+from hrgpt.utils.type_utils import AnswerFormat, ChatMessage, PromptType
+
+
+class FastChat(Chat):
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        raise NotImplementedError
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        await asyncio.sleep(0.01)
+        after_datetime = datetime.datetime.now(datetime.timezone.utc)
+        return generate_model_chat_message(
+            "answer", before_datetime, after_datetime, after_datetime
+        )
+
+
+def test_rate_limiting_is_not_part_of_the_timed_attempt(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    acquired_token_amounts: list[int] = []
+
+    async def acquire_async(model_enum: ModelEnum, prompt_token_amount: int) -> None:
+        acquired_token_amounts.append(prompt_token_amount)
+        await asyncio.sleep(0.3)
+
+    config = AppConfigFactory.get_app_config()
+    network_config = config.generic_config.network_config
+    monkeypatch.setattr(network_config, "attempt_timeout_seconds", 0.2)
+    monkeypatch.setattr(network_config.hedging_config, "enabled", False)
+    monkeypatch.setattr(RateLimiter, "acquire_async", acquire_async)
+    monkeypatch.setattr(LatencyTracker, "latency_dict", {})
+    monkeypatch.setattr(
+        hrgpt.utils.chat_utils,
+        "get_chat",
+        lambda model: FastChat(model, config.llm_config.system_context),
+    )
+    answer = asyncio.run(
+        send_prompt_with_retries_async(
+            "prompt", PromptType.MATCH_REQUIREMENT, ModelEnum.GPT_4O
+        )
+    )
+    assert answer.text == "answer"
+    # waiting for the rate limit neither times out the attempt nor counts as latency
+    assert len(acquired_token_amounts) == 1
+    latencies = LatencyTracker.latency_dict[
+        (ModelEnum.GPT_4O, PromptType.MATCH_REQUIREMENT)
+    ]
+    assert list(latencies)[0] < 0.2
+
+
+class SlowFirstChat(Chat):
+    send_amount = 0
+    request_slots_taken: list[bool] = []
+
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        raise NotImplementedError
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        SlowFirstChat.send_amount += 1
+        SlowFirstChat.request_slots_taken.append(
+            RequestLimiter.get_semaphore().locked()
+        )
+        # only the first request is slow, so the hedged request wins
+        await asyncio.sleep(1.0 if SlowFirstChat.send_amount == 1 else 0.01)
+        after_datetime = datetime.datetime.now(datetime.timezone.utc)
+        return generate_model_chat_message(
+            f"answer {SlowFirstChat.send_amount}",
+            before_datetime,
+            after_datetime,
+            after_datetime,
+        )
+
+
+def test_hedged_requests_are_rate_limited_and_take_a_request_slot(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    acquired_token_amounts: list[int] = []
+
+    async def acquire_async(model_enum: ModelEnum, prompt_token_amount: int) -> None:
+        acquired_token_amounts.append(prompt_token_amount)
+
+    config = AppConfigFactory.get_app_config()
+    network_config = config.generic_config.network_config
+    hedging_config = network_config.hedging_config
+    monkeypatch.setattr(network_config, "max_concurrent_requests", 2)
+    monkeypatch.setattr(hedging_config, "enabled", True)
+    monkeypatch.setattr(hedging_config, "min_latency_samples", 1)
+    monkeypatch.setattr(hedging_config, "min_delay_seconds", 0.05)
+    monkeypatch.setattr(hedging_config, "max_hedged_request_ratio", 1.0)
+    monkeypatch.setattr(RateLimiter, "acquire_async", acquire_async)
+    latency_key = (ModelEnum.GPT_4O, PromptType.MATCH_REQUIREMENT)
+    monkeypatch.setattr(LatencyTracker, "latency_dict", {})
+    monkeypatch.setattr(LatencyTracker, "request_amount", 0)
+    monkeypatch.setattr(LatencyTracker, "hedged_request_amount", 0)
+    LatencyTracker.record(*latency_key, 0.01)
+    monkeypatch.setattr(SlowFirstChat, "send_amount", 0)
+    monkeypatch.setattr(SlowFirstChat, "request_slots_taken", [])
+    monkeypatch.setattr(
+        hrgpt.utils.chat_utils,
+        "get_chat",
+        lambda model: SlowFirstChat(model, config.llm_config.system_context),
+    )
+
+    async def send_prompt() -> ChatMessage:
+        answer = await send_prompt_with_retries_async(
+            "prompt", PromptType.MATCH_REQUIREMENT, ModelEnum.GPT_4O
+        )
+        # the cancelled attempt records its latency once it handles the cancellation
+        await asyncio.sleep(0.01)
+        return answer
+
+    assert asyncio.run(send_prompt()).text == "answer 2"
+    # the hedged request reserved its own rate limit and request slot
+    assert len(acquired_token_amounts) == 2
+    assert SlowFirstChat.request_slots_taken == [False, True]
+    # the cancelled slow attempt is recorded at its elapsed time
+    latencies = sorted(LatencyTracker.latency_dict[latency_key])
+    assert len(latencies) == 3
+    assert latencies[-1] >= hedging_config.min_delay_seconds
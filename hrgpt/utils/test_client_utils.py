@@ -0,0 +1,97 @@
+import asyncio
+
+import google.ai.generativelanguage
+import google.generativeai
+import httpx
+import pytest
+
+import hrgpt.utils.client_utils
+from hrgpt.utils.client_utils import (
+    ReplicateTransport,
+    bind_google_client,
+    cancel_google_response_stream,
+    get_async_google_client,
+    get_google_client,
+)
+from hrgpt.utils.retry_utils import is_retryable_error
+
+
+def test_replicate_transport_raises_retryable_status_codes() -> None:
+    def handle_request(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429 if request.url.path == "/limited" else 200)
+
+    transport = ReplicateTransport(
+        httpx.MockTransport(handle_request), httpx.MockTransport(handle_request)
+    )
+    with httpx.Client(transport=transport, base_url="https://replicate") as client:
+        assert client.get("/ok").status_code == 200
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            client.get("/limited")
+    assert is_retryable_error(error.value)
+
+    async def send_request() -> int:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="https://replicate"
+        ) as async_client:
+            return (await async_client.get("/ok")).status_code
+
+    assert asyncio.run(send_request()) == 200
+
+
+def test_bind_google_client_uses_the_pooled_client() -> None:
+    model = bind_google_client(
+        google.generativeai.GenerativeModel("gemini-1.5-flash"), "key", False
+    )
+    assert model._client is get_google_client("key")
+
+    async def bind_async_client() -> bool:
+        async_model = bind_google_client(
+            google.generativeai.GenerativeModel("gemini-1.5-flash"), "key", True
+        )
+        return async_model._async_client is get_async_google_client("key")
+
+    assert asyncio.run(bind_async_client())
+
+
+class CancellableResponseIterator:
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    def __iter__(self) -> "CancellableResponseIterator":
+        return self
+
+    def __next__(self) -> google.ai.generativelanguage.GenerateContentResponse:
+        if self.cancelled:
+            raise StopIteration
+        return google.ai.generativelanguage.GenerateContentResponse()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+def test_cancel_google_response_stream_cancels_the_grpc_call(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    response_iterator = CancellableResponseIterator()
+    cancel_google_response_stream(
+        google.generativeai.types.GenerateContentResponse.from_iterator(
+            response_iterator
+        )
+    )
+    assert response_iterator.cancelled
+    # responses without a cancellable call are not cancelled silently
+    cancel_google_response_stream(
+        google.generativeai.types.GenerateContentResponse.from_iterator(
+            iter([google.ai.generativelanguage.GenerateContentResponse()])
+        )
+    )
+    # the private iterator is only used for the tested sdk versions
+    monkeypatch.setattr(
+        hrgpt.utils.client_utils, "SUPPORTED_GOOGLE_GENERATIVEAI_VERSION", "0.0."
+    )
+    with pytest.raises(RuntimeError):
+        cancel_google_response_stream(
+            google.generativeai.types.GenerateContentResponse.from_iterator(
+                CancellableResponseIterator()
+            )
+        )
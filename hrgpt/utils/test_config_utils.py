@@ -0,0 +1,25 @@
+import asyncio
+
+from hrgpt.utils.config_utils import AppConfigFactory
+
+
+def test_concurrent_requests_keep_their_own_configuration() -> None:
+    async def handle_request(output_language: str) -> str:
+        AppConfigFactory.start_request()
+        AppConfigFactory.set_output_language(output_language)
+        await asyncio.sleep(0.01)
+        return (
+            AppConfigFactory.get_app_config().generic_config.language_config.output_language
+        )
+
+    async def handle_requests() -> list[str]:
+        return list(await asyncio.gather(handle_request("de"), handle_request("fr")))
+
+    global_output_language = (
+        AppConfigFactory.get_app_config().generic_config.language_config.output_language
+    )
+    assert asyncio.run(handle_requests()) == ["de", "fr"]
+    assert (
+        AppConfigFactory.get_app_config().generic_config.language_config.output_language
+        == global_output_language
+    )
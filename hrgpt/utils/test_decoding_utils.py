@@ -0,0 +1,40 @@
+from hrgpt.utils.decoding_utils import (
+    decode_json_answer,
+    remove_trailing_commas,
+    repair_json_string,
+)
+from hrgpt.utils.type_utils import AnswerFormat, Score
+
+
+def test_decode_json_answer_parses_and_repairs_answers() -> None:
+    score = decode_json_answer(
+        'Here is the result:\n```json\n{"value": 70, "explanation": " fits "}\n```',
+        Score,
+    )
+    assert score == Score(value=70, explanation="fits")
+    repaired_score = decode_json_answer(
+        '{"value": 30, "explanation": "first line\nsecond line",}', Score
+    )
+    assert repaired_score == Score(value=30, explanation="first line\nsecond line")
+
+
+def test_repair_json_string_removes_trailing_commas_and_code_fences() -> None:
+    repaired_json_string = repair_json_string(
+        'Scores for [the] requirements:\n```json\n[{"index": 0, "value": 10,},]\n```',
+        AnswerFormat.JSON_ARRAY,
+    )
+    assert repaired_json_string == '[{"index": 0, "value": 10}]'
+
+
+def test_remove_trailing_commas_keeps_the_contents_of_strings() -> None:
+    assert (
+        remove_trailing_commas('{"explanation": "Python, ]} and \\"C++, }\\"",}')
+        == '{"explanation": "Python, ]} and \\"C++, }\\""}'
+    )
+    # valid answers are parsed without any repair
+    score = decode_json_answer('{"value": 50, "explanation": "knows [a, ] b,}"}', Score)
+    assert score == Score(value=50, explanation="knows [a, ] b,}")
+    repaired_score = decode_json_answer(
+        '{"value": 50, "explanation": "knows [a, ] b,}",\n}', Score
+    )
+    assert repaired_score == score
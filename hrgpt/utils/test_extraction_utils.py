@@ -0,0 +1,67 @@
+import pathlib
+import tempfile
+
+import typing
+
+import fitz
+import pytest
+
+import hrgpt.utils.extraction_utils
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.extraction_utils import (
+    ParsingPoolFactory,
+    ParsingTask,
+    parse_document,
+    run_parsing_tasks,
+)
+from hrgpt.utils.type_utils import DocumentFileType, File
+
+
+def create_pdf_file(page_texts: list[str]) -> File:
+    with fitz.open() as pdf_document:
+        for page_text in page_texts:
+            pdf_document.new_page().insert_text((72, 72), page_text)
+        return File(
+            name="cv", type=DocumentFileType.PDF, content=pdf_document.tobytes()
+        )
+
+
+def test_only_large_pdfs_are_parsed_from_a_shared_file(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    parsing_config = AppConfigFactory.get_app_config().generic_config.parsing_config
+    monkeypatch.setattr(parsing_config, "use_process_pool", True)
+    monkeypatch.setattr(parsing_config, "max_processes", 2)
+    monkeypatch.setattr(parsing_config, "pdf_pages_per_task", 1)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    parsing_tasks: list[ParsingTask] = []
+
+    def run_recorded_parsing_tasks(tasks: tuple[ParsingTask, ...]) -> list[typing.Any]:
+        parsing_tasks.extend(tasks)
+        return run_parsing_tasks(tasks)
+
+    monkeypatch.setattr(
+        hrgpt.utils.extraction_utils, "run_parsing_tasks", run_recorded_parsing_tasks
+    )
+    page_texts = [f"Page {x}" for x in range(3)]
+    pdf_file = create_pdf_file(page_texts)
+    try:
+        # small pdfs are sent to every task without a temporary file
+        assert parse_document(pdf_file) == page_texts
+        assert len(parsing_tasks) == 3
+        assert all(isinstance(x[1][0], bytes) for x in parsing_tasks)
+        parsing_tasks.clear()
+        monkeypatch.setattr(
+            parsing_config, "min_shared_file_bytes", len(pdf_file.content)
+        )
+        assert parse_document(pdf_file) == page_texts
+    finally:
+        process_pool = ParsingPoolFactory.get_process_pool()
+        if process_pool is not None:
+            process_pool.shutdown()
+        ParsingPoolFactory.process_pool = None
+    # every task only receives the path of the shared file and not the pdf itself
+    assert len(parsing_tasks) == 3
+    assert all(isinstance(x[1][0], str) for x in parsing_tasks)
+    # the shared file is removed once the pages are parsed
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,84 @@
+import fitz
+
+from hrgpt.utils.layout_utils import (
+    get_page_layout,
+    get_text_lines_of_page_layouts,
+    normalize_text_lines,
+)
+
+
+def test_normalize_text_lines_repairs_bullets_and_hyphenation() -> None:
+    assert normalize_text_lines(
+        [
+            "Experienced in manage-",
+            "ment of teams",
+            "•",
+            "Python",
+            "* C++",
+            "order-to-",
+            "cash",
+        ]
+    ) == ["Experienced in management of teams", "- Python", "- C++", "order-to-cash"]
+
+
+def test_normalize_text_lines_keeps_separators_and_paragraphs() -> None:
+    assert normalize_text_lines(
+        [
+            "",
+            "EXPERIENCE",
+            "----",
+            "***",
+            "-",
+            "Data engineer",
+            "",
+            "",
+            "",
+            "-3 years of Python",
+            "– Led a team",
+            "",
+        ]
+    ) == [
+        "EXPERIENCE",
+        "----",
+        "***",
+        "-",
+        "Data engineer",
+        "",
+        "-3 years of Python",
+        "- Led a team",
+    ]
+
+
+def test_page_layouts_strip_repeated_headers_and_read_columns_in_order() -> None:
+    pdf_document = fitz.open()
+    for page_index in range(3):
+        page = pdf_document.new_page()
+        page.insert_text((72, 30), "Curriculum Vitae")
+        for line_index in range(3):
+            page.insert_text((72, 200 + 20 * line_index), f"Left {line_index}")
+            page.insert_text((350, 180 + 20 * line_index), f"Right {line_index}")
+        page.insert_text((280, 820), f"Page {page_index + 1}")
+    page_layouts = [get_page_layout(x) for x in pdf_document]
+    # the header of the first page is kept, as it often holds the name of the candidate
+    assert get_text_lines_of_page_layouts(page_layouts) == ["Curriculum Vitae"] + 3 * [
+        "Left 0",
+        "Left 1",
+        "Left 2",
+        "Right 0",
+        "Right 1",
+        "Right 2",
+    ]
+
+
+def test_page_layouts_keep_a_repeated_name_in_the_first_header() -> None:
+    pdf_document = fitz.open()
+    for page_text in ("Data engineer", "Python developer"):
+        page = pdf_document.new_page()
+        page.insert_text((72, 30), "Jane Doe")
+        page.insert_text((72, 200), page_text)
+    page_layouts = [get_page_layout(x) for x in pdf_document]
+    assert get_text_lines_of_page_layouts(page_layouts) == [
+        "Jane Doe",
+        "Data engineer",
+        "Python developer",
+    ]
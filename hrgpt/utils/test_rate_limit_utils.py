@@ -0,0 +1,113 @@
+import pytest
+
+import hrgpt.utils.rate_limit_utils
+from hrgpt.config.config import ModelEnum, Provider, RateLimitConfiguration
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.rate_limit_utils import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.timestamp = 0.0
+        self.sleep_durations: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.timestamp
+
+    def sleep(self, seconds: float) -> None:
+        self.sleep_durations.append(seconds)
+        self.timestamp += seconds
+
+
+@pytest.fixture
+def fake_clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(hrgpt.utils.rate_limit_utils, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def rate_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    config = AppConfigFactory.get_app_config()
+    network_config = config.generic_config.network_config
+    monkeypatch.setattr(network_config, "rate_limit_utilization", 1.0)
+    monkeypatch.setattr(network_config, "rate_limit_burst_seconds", 1.0)
+    monkeypatch.setattr(
+        network_config,
+        "provider_rate_limits",
+        {
+            Provider.OPENAI: RateLimitConfiguration(
+                requests_per_minute=60, tokens_per_minute=60000
+            )
+        },
+    )
+    monkeypatch.setattr(
+        network_config,
+        "model_rate_limits",
+        {
+            ModelEnum.GPT_4O: RateLimitConfiguration(
+                requests_per_minute=600, tokens_per_minute=600
+            )
+        },
+    )
+    monkeypatch.setattr(config.llm_config, "max_tokens", 100)
+    monkeypatch.setattr(RateLimiter, "bucket_dict", {})
+
+
+def test_token_bucket_reserves_into_debt(fake_clock: FakeClock) -> None:
+    bucket = TokenBucket(rate_per_minute=60, burst_seconds=2)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    # the amount is taken although the bucket is empty and its debt is waited for
+    assert bucket.reserve(1) == 1.0
+    assert bucket.reserve(2) == 3.0
+    fake_clock.timestamp += 3
+    assert bucket.reserve(0) == 0.0
+    # the bucket does not refill beyond its burst capacity
+    fake_clock.timestamp += 10
+    assert bucket.reserve(2) == 0.0
+    assert bucket.reserve(1) == 1.0
+
+
+@pytest.mark.usefixtures("rate_limits")
+def test_rate_limits_are_selected_per_provider_and_model(
+    fake_clock: FakeClock,
+) -> None:
+    assert [x for x, _ in RateLimiter.get_rate_limits(ModelEnum.GPT_4O)] == [
+        Provider.OPENAI,
+        ModelEnum.GPT_4O,
+    ]
+    assert [x for x, _ in RateLimiter.get_rate_limits(ModelEnum.GPT_35_TURBO)] == [
+        Provider.OPENAI
+    ]
+    # models without a configured rate limit are never delayed
+    assert RateLimiter.get_rate_limits(ModelEnum.GEMINI_15_FLASH) == ()
+    assert RateLimiter.reserve(ModelEnum.GEMINI_15_FLASH, 10**9) == 0.0
+    assert RateLimiter.bucket_dict == {}
+    # the tokens of the model bucket are exceeded and its debt is waited for
+    assert RateLimiter.reserve(ModelEnum.GPT_4O, 50) == 14.0
+    assert set(RateLimiter.bucket_dict.keys()) == {
+        (Provider.OPENAI, "requests"),
+        (Provider.OPENAI, "tokens"),
+        (ModelEnum.GPT_4O, "requests"),
+        (ModelEnum.GPT_4O, "tokens"),
+    }
+    # the other models of the provider only share its bucket of one request per second
+    assert RateLimiter.reserve(ModelEnum.GPT_35_TURBO, 50) == 1.0
+    assert RateLimiter.reserve(ModelEnum.GPT_35_TURBO, 50) == 2.0
+
+
+@pytest.mark.usefixtures("rate_limits")
+def test_openai_reserves_the_maximum_completion_length(
+    fake_clock: FakeClock,
+) -> None:
+    assert RateLimiter.get_reserved_token_amount(ModelEnum.GPT_4O, 50) == 150
+    assert RateLimiter.get_reserved_token_amount(ModelEnum.GEMINI_15_FLASH, 50) == 50
+
+
+@pytest.mark.usefixtures("rate_limits")
+def test_acquire_sleeps_until_the_debt_is_paid_off(fake_clock: FakeClock) -> None:
+    # the maximum completion length of every request exceeds the model token bucket
+    for _ in range(3):
+        RateLimiter.acquire(ModelEnum.GPT_4O, 0)
+    assert fake_clock.sleep_durations == [9.0, 10.0, 10.0]
@@ -0,0 +1,93 @@
+import datetime
+import pathlib
+
+import pytest
+
+import hrgpt.utils.chat_utils
+import hrgpt.utils.replay_utils
+from hrgpt.chat.chat import Chat
+from hrgpt.config.config import ModelEnum, ReplayMode
+from hrgpt.utils.chat_utils import get_chat
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.replay_utils import CassetteFactory
+from hrgpt.utils.type_utils import AnswerFormat, ChatMessage, TokenUsage
+
+
+class EchoChat(Chat):
+    def send_prompt(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        before_datetime = self.add_prompt_to_history(prompt)
+        after_datetime = datetime.datetime.now(datetime.timezone.utc)
+        answer = generate_model_chat_message(
+            f"answer to {prompt}",
+            before_datetime,
+            after_datetime,
+            after_datetime,
+            token_usage=TokenUsage(prompt_tokens=10, completion_tokens=3),
+            model=self.get_model_name(),
+        )
+        self.add_chat_message_to_history(answer)
+        return answer
+
+    async def send_prompt_async(
+        self, prompt: str, answer_format: AnswerFormat = AnswerFormat.TEXT
+    ) -> ChatMessage:
+        return self.send_prompt(prompt, answer_format)
+
+
+def get_echo_chat(model: ModelEnum) -> Chat:
+    config = AppConfigFactory.get_app_config()
+    if config.generic_config.replay_config.mode == ReplayMode.REPLAY:
+        raise RuntimeError
+    return EchoChat(model, config.llm_config.system_context)
+
+
+@pytest.fixture
+def replay_config(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    replay_config = AppConfigFactory.get_app_config().generic_config.replay_config
+    monkeypatch.setattr(replay_config, "cassette_name", "test")
+    monkeypatch.setattr(replay_config, "inject_latency", False)
+    monkeypatch.setattr(CassetteFactory, "cassette_dict", {})
+    monkeypatch.setattr(
+        hrgpt.utils.replay_utils, "get_generated_cassettes_path", lambda: str(tmp_path)
+    )
+    monkeypatch.setattr(hrgpt.utils.chat_utils, "get_live_chat", get_echo_chat)
+
+
+def set_replay_mode(monkeypatch: pytest.MonkeyPatch, replay_mode: ReplayMode) -> None:
+    replay_config = AppConfigFactory.get_app_config().generic_config.replay_config
+    monkeypatch.setattr(replay_config, "mode", replay_mode)
+    # the cassette is read again from the disk
+    monkeypatch.setattr(CassetteFactory, "cassette_dict", {})
+
+
+@pytest.mark.usefixtures("replay_config")
+def test_recorded_answers_are_replayed_without_the_live_chat(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_replay_mode(monkeypatch, ReplayMode.RECORD)
+    recorded_answer = get_chat(ModelEnum.GPT_4O).send_prompt(
+        "prompt", AnswerFormat.JSON_OBJECT
+    )
+    assert (tmp_path / "test.jsonl").exists()
+    set_replay_mode(monkeypatch, ReplayMode.REPLAY)
+    replayed_answer = get_chat(ModelEnum.GPT_4O).send_prompt(
+        "prompt", AnswerFormat.JSON_OBJECT
+    )
+    assert replayed_answer == recorded_answer
+
+
+@pytest.mark.usefixtures("replay_config")
+def test_replaying_a_request_missing_from_the_cassette_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    set_replay_mode(monkeypatch, ReplayMode.RECORD)
+    get_chat(ModelEnum.GPT_4O).send_prompt("prompt", AnswerFormat.JSON_OBJECT)
+    set_replay_mode(monkeypatch, ReplayMode.REPLAY)
+    # the cassette key covers the prompt and the answer format
+    with pytest.raises(RuntimeError):
+        get_chat(ModelEnum.GPT_4O).send_prompt("other prompt", AnswerFormat.JSON_OBJECT)
+    with pytest.raises(RuntimeError):
+        get_chat(ModelEnum.GPT_4O).send_prompt("prompt", AnswerFormat.TEXT)
@@ -0,0 +1,54 @@
+import pathlib
+
+import pytest
+
+import hrgpt.utils.requirement_cache_utils
+from hrgpt.config.config import ModelEnum, RoutingPolicy
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.requirement_cache_utils import RequirementCache
+from hrgpt.utils.type_utils import (
+    JobRequirementType,
+    PromptType,
+    Requirement,
+    RequirementType,
+)
+
+
+def test_cached_requirements_depend_on_the_extraction_setup(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        hrgpt.utils.requirement_cache_utils,
+        "get_generated_requirements_path",
+        lambda: str(tmp_path),
+    )
+    requirements: dict[JobRequirementType, list[Requirement]] = {
+        "hard_skills": [
+            Requirement(type=RequirementType.MANDATORY, specification="Python")
+        ]
+    }
+    RequirementCache.set("job text", "job", requirements)
+    assert RequirementCache.get("job text") == requirements
+    config = AppConfigFactory.get_app_config()
+    # requirements extracted by other models are extracted again
+    monkeypatch.setattr(
+        config.generic_config.routing_config,
+        "policies",
+        {
+            PromptType.EXTRACT_REQUIREMENTS: RoutingPolicy(
+                models=(ModelEnum.GEMINI_15_FLASH,),
+                uncertain_score_range=None,
+                max_score_spread=None,
+            )
+        },
+    )
+    assert RequirementCache.get("job text") is None
+    monkeypatch.setattr(config.generic_config.routing_config, "policies", {})
+    assert RequirementCache.get("job text") == requirements
+    # and so are requirements extracted with another prompt
+    monkeypatch.setattr(
+        config.generic_config.prompt_config,
+        "extract_requirements_prompt",
+        "Extract the requirements of this job: {JOB_TEXT}",
+    )
+    assert RequirementCache.get("job text") is None
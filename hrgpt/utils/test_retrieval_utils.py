@@ -0,0 +1,49 @@
+import pytest
+
+from hrgpt.config.config import PromptLayout
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.retrieval_utils import CvIndex, get_relevant_cv_text
+from hrgpt.utils.type_utils import JobRequirementType, Requirement, RequirementType
+
+CV_TEXT = (
+    "Jane Doe\nSoftware Engineer\n"
+    "EXPERIENCE\nBackend development with Python and Kafka\n"
+    "Education\nMaster of Science in Computer Engineering\n"
+    "Languages:\nGerman (native), English (fluent)\n"
+)
+
+
+def test_cv_index_ranks_the_matching_section_first() -> None:
+    cv_index = CvIndex(CV_TEXT)
+    assert [x.title for x in cv_index.sections] == [
+        "",
+        "EXPERIENCE",
+        "Education",
+        "Languages:",
+    ]
+    assert cv_index.get_top_section_indices("languages English", 1) == [3]
+    assert cv_index.get_top_section_indices("education computer science", 1) == [2]
+
+
+def test_retrieval_keeps_the_full_cv_for_the_cv_prefix_layout(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    config = AppConfigFactory.get_app_config()
+    retrieval_config = config.generic_config.retrieval_config
+    monkeypatch.setattr(retrieval_config, "enabled", True)
+    monkeypatch.setattr(retrieval_config, "top_sections", 1)
+    monkeypatch.setattr(retrieval_config, "min_cv_characters", 1)
+    requirements: tuple[tuple[JobRequirementType, Requirement], ...] = (
+        (
+            "languages",
+            Requirement(type=RequirementType.MANDATORY, specification="English"),
+        ),
+    )
+    prompt_config = config.generic_config.prompt_config
+    monkeypatch.setattr(prompt_config, "prompt_layout", PromptLayout.TEMPLATE)
+    assert get_relevant_cv_text(CV_TEXT, requirements) == (
+        "Jane Doe\nSoftware Engineer\n\nLanguages:\nGerman (native), English (fluent)"
+    )
+    # the full CV keeps the prefix shared by all prompts of the CV
+    monkeypatch.setattr(prompt_config, "prompt_layout", PromptLayout.CV_PREFIX)
+    assert get_relevant_cv_text(CV_TEXT, requirements) == CV_TEXT
@@ -1,10 +1,15 @@
-from hrgpt.utils.score_utils import compute_total_score
+from hrgpt.utils.score_utils import (
+    compute_total_score,
+    aggregate_scores,
+    aggregate_promising_results,
+)
 from hrgpt.utils.type_utils import (
     JobRequirementType,
     RequirementMatch,
     Score,
     Requirement,
     RequirementType,
+    PromisingResult,
 )
 
 
@@ -36,3 +41,27 @@ def test_compute_total_score() -> None:
     computed_total_score_value = compute_total_score(sample_requirement_matches)
     expected_total_score_value = 57.5
     assert computed_total_score_value == expected_total_score_value
+
+
+def test_aggregate_scores_uses_median_choice() -> None:
+    scores = [
+        Score(value=80, explanation="high"),
+        Score(value=20, explanation="low"),
+        Score(value=60, explanation="middle"),
+    ]
+    median_score, score_spread = aggregate_scores(scores)
+    assert median_score == Score(value=60, explanation="middle")
+    assert score_spread == 60
+
+
+def test_aggregate_promising_results_uses_majority() -> None:
+    promising_results = [
+        PromisingResult(promising=False, explanation="no"),
+        PromisingResult(promising=True, explanation="yes"),
+        PromisingResult(promising=True, explanation="also yes"),
+    ]
+    promising_result, promising_agreement = aggregate_promising_results(
+        promising_results
+    )
+    assert promising_result == PromisingResult(promising=True, explanation="yes")
+    assert promising_agreement == 2 / 3
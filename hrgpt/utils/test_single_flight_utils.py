@@ -0,0 +1,26 @@
+import asyncio
+
+from hrgpt.utils.single_flight_utils import SingleFlight, run_single_flight_async
+
+
+def test_identical_requests_in_flight_share_one_call() -> None:
+    call_amount = 0
+
+    async def send_request() -> str:
+        nonlocal call_amount
+        call_amount += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def send_requests() -> list[tuple[str, bool]]:
+        return list(
+            await asyncio.gather(
+                *[run_single_flight_async("key", send_request) for _ in range(5)]
+            )
+        )
+
+    results = asyncio.run(send_requests())
+    assert call_amount == 1
+    assert [x[0] for x in results] == ["answer"] * 5
+    assert [x[1] for x in results].count(False) == 1
+    assert SingleFlight.get_in_flight_amount() == 0
@@ -0,0 +1,20 @@
+import datetime
+
+from hrgpt.utils.streaming_utils import AnswerStream
+from hrgpt.utils.type_utils import AnswerFormat
+
+
+def test_answer_stream_terminates_after_json_object() -> None:
+    answer_stream = AnswerStream(
+        AnswerFormat.JSON_OBJECT, datetime.datetime.now(datetime.timezone.utc)
+    )
+    chunks = (
+        "Sure, {not json} ",
+        '{"value": 7, "explanation": "a',
+        ' \\"}\\" b"}',
+        " done",
+    )
+    assert [answer_stream.add_text(x) for x in chunks[:3]] == [False, False, True]
+    assert answer_stream.get_text() == '{"value": 7, "explanation": "a \\"}\\" b"}'
+    assert answer_stream.time_to_first_token is not None
+    assert answer_stream.time_to_json is not None
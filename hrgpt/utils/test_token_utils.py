@@ -0,0 +1,26 @@
+from hrgpt.utils.token_utils import (
+    compress_text,
+    estimate_token_amount,
+    split_text_into_chunks,
+)
+
+
+def test_compress_text_removes_low_value_lines() -> None:
+    compressed_text = compress_text(
+        "Jane   Doe\n\n\n---------\nPage 1\n•\nPython\nJane Doe\npython\n"
+    )
+    assert compressed_text == "Jane Doe\n\nPage 1\nPython"
+
+
+def test_split_text_into_chunks_respects_the_token_amount() -> None:
+    text = "\n".join(
+        [
+            f"EXPERIENCE {x}\n" + " ".join(["Built data pipelines with Python."] * 20)
+            for x in range(6)
+        ]
+    )
+    chunks = split_text_into_chunks(text, 300)
+    assert len(chunks) > 1
+    assert all(estimate_token_amount(x) <= 300 for x in chunks)
+    assert all(x.startswith("EXPERIENCE") for x in chunks)
+    assert "\n".join(chunks) == text
@@ -0,0 +1,114 @@
+import google.cloud.translate
+import pytest
+
+import hrgpt.utils.translation_utils
+from hrgpt.utils.cache_utils import CacheFactory
+from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.translation_utils import translate_applicant_match, translate_texts
+from hrgpt.utils.type_utils import (
+    ApplicantMatch,
+    PromisingResult,
+    Requirement,
+    RequirementMatch,
+    RequirementType,
+    Score,
+)
+
+
+class FakeTranslationClient:
+    def __init__(self) -> None:
+        self.requests: list[google.cloud.translate.TranslateTextRequest] = []
+
+    def translate_text(
+        self, request: google.cloud.translate.TranslateTextRequest
+    ) -> google.cloud.translate.TranslateTextResponse:
+        self.requests.append(request)
+        return google.cloud.translate.TranslateTextResponse(
+            translations=[
+                google.cloud.translate.Translation(
+                    translated_text=f"{request.target_language_code}: {x}"
+                )
+                for x in request.contents
+            ]
+        )
+
+
+@pytest.fixture
+def translation_client(monkeypatch: pytest.MonkeyPatch) -> FakeTranslationClient:
+    client = FakeTranslationClient()
+    monkeypatch.setattr(
+        hrgpt.utils.translation_utils, "get_translation_client", lambda: client
+    )
+    monkeypatch.setattr(hrgpt.utils.translation_utils, "get_project_id", lambda: "hr")
+    monkeypatch.setattr(CacheFactory, "get_cache", lambda cache_type: None)
+    return client
+
+
+def test_translate_texts_deduplicates_and_chunks_the_texts(
+    translation_client: FakeTranslationClient,
+) -> None:
+    texts = tuple([f"text {x}" for x in range(1030)])
+    translated_texts = translate_texts(
+        ("", *texts, "text 3", " "), target_language="de"
+    )
+    # empty texts are kept and duplicated texts are only translated once
+    assert translated_texts == ("", *[f"de: {x}" for x in texts], "de: text 3", " ")
+    assert [len(x.contents) for x in translation_client.requests] == [1024, 6]
+    assert all(x.parent == "projects/hr" for x in translation_client.requests)
+
+
+def test_translate_texts_limits_the_characters_per_request(
+    translation_client: FakeTranslationClient,
+) -> None:
+    texts = tuple([x * 12000 for x in "abc"])
+    assert translate_texts(texts, target_language="de") == tuple(
+        [f"de: {x}" for x in texts]
+    )
+    assert [list(x.contents) for x in translation_client.requests] == [
+        list(texts[:2]),
+        list(texts[2:]),
+    ]
+
+
+def test_translate_applicant_match_keeps_the_collection_order(
+    translation_client: FakeTranslationClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config = AppConfigFactory.get_app_config()
+    monkeypatch.setattr(config.generic_config.language_config, "output_language", "de")
+
+    def create_requirement_match(specification: str) -> RequirementMatch:
+        return RequirementMatch(
+            score=Score(value=50, explanation="Mentioned in the CV"),
+            requirement=Requirement(
+                type=RequirementType.MANDATORY, specification=specification
+            ),
+        )
+
+    applicant_match = translate_applicant_match(
+        ApplicantMatch(
+            total_score=50,
+            promising_result=PromisingResult(promising=True, explanation="Good fit"),
+            promising_agreement=1.0,
+            requirement_matches={
+                "hard_skills": [
+                    create_requirement_match("Python"),
+                    create_requirement_match("SQL"),
+                ],
+                "languages": [create_requirement_match("English")],
+            },
+        )
+    )
+    assert applicant_match.promising_result.explanation == "de: Good fit"
+    assert [
+        (x.requirement.specification, x.score.explanation)
+        for y in applicant_match.requirement_matches.values()
+        for x in y
+    ] == [
+        ("de: Python", "de: Mentioned in the CV"),
+        ("de: SQL", "de: Mentioned in the CV"),
+        ("de: English", "de: Mentioned in the CV"),
+    ]
+    # the repeated explanation is translated once in a single request
+    assert [list(x.contents) for x in translation_client.requests] == [
+        ["Good fit", "Python", "Mentioned in the CV", "SQL", "English"]
+    ]
@@ -0,0 +1,65 @@
+import asyncio
+import datetime
+
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.message_utils import generate_model_chat_message
+from hrgpt.utils.type_utils import PromptType, TokenUsage, UsageReport
+from hrgpt.utils.usage_utils import UsageScope, UsageTracker
+
+
+def record_usage(prompt_tokens: int) -> None:
+    current_datetime = datetime.datetime.now(datetime.timezone.utc)
+    UsageTracker.record(
+        generate_model_chat_message(
+            "answer",
+            current_datetime,
+            current_datetime,
+            current_datetime,
+            token_usage=TokenUsage(prompt_tokens=prompt_tokens),
+        ),
+        PromptType.MATCH_REQUIREMENT,
+        ModelEnum.GPT_4O,
+    )
+
+
+async def run_async(
+    job_name: str, prompt_tokens: int, other_run_started: asyncio.Event
+) -> tuple[UsageReport, UsageReport]:
+    UsageTracker.start_run()
+    UsageTracker.start_job(job_name)
+    record_usage(prompt_tokens)
+    other_run_started.set()
+    # the other run starts and records its usage while this run is still active
+    await asyncio.sleep(0.01)
+    UsageTracker.run_in_scope(
+        UsageScope(job_name=job_name, cv_name="cv"), lambda: record_usage(prompt_tokens)
+    )
+    run_report = UsageTracker.get_run_report()
+    job_report = UsageTracker.get_job_report(job_name)
+    UsageTracker.finish_run()
+    return run_report, job_report
+
+
+async def run_overlapping_runs_async() -> list[tuple[UsageReport, UsageReport]]:
+    first_run_started = asyncio.Event()
+    first_run = asyncio.ensure_future(run_async("job", 10, first_run_started))
+    await first_run_started.wait()
+    # the second run uses the same job name as the first one
+    second_run = asyncio.ensure_future(run_async("job", 100, asyncio.Event()))
+    return list(await asyncio.gather(first_run, second_run))
+
+
+def test_usage_of_overlapping_runs_is_kept_apart() -> None:
+    (first_run_report, first_job_report), (second_run_report, second_job_report) = (
+        asyncio.run(run_overlapping_runs_async())
+    )
+    assert first_run_report.total.request_amount == 2
+    assert first_run_report.total.prompt_tokens == 20
+    assert first_job_report == first_run_report
+    assert first_run_report.per_cv["cv"].prompt_tokens == 10
+    assert second_run_report.total.request_amount == 2
+    assert second_run_report.total.prompt_tokens == 200
+    assert second_job_report == second_run_report
+    # finished runs and usage outside of a run are not kept
+    record_usage(1000)
+    assert UsageTracker.run_usage_records == {}
@@ -0,0 +1,50 @@
+SECTION_HEADINGS = frozenset(
+    [
+        "about me",
+        "achievements",
+        "awards",
+        "certificates",
+        "certifications",
+        "contact",
+        "courses",
+        "education",
+        "experience",
+        "hobbies",
+        "honors-awards",
+        "interests",
+        "languages",
+        "objective",
+        "personal information",
+        "profile",
+        "projects",
+        "publications",
+        "qualifications",
+        "references",
+        "skills",
+        "summary",
+        "top skills",
+        "trainings",
+        "volunteer experience",
+        "work experience",
+        "ausbildung",
+        "berufserfahrung",
+        "fähigkeiten",
+        "kenntnisse",
+        "persönliche daten",
+        "projekte",
+        "sprachen",
+        "sprachkenntnisse",
+        "weiterbildung",
+        "zertifikate",
+    ]
+)
+
+
+def is_section_heading(line: str) -> bool:
+    heading = line.strip().rstrip(":").strip()
+    if len(heading) == 0 or len(heading.split()) > 4:
+        return False
+    if heading.lower() in SECTION_HEADINGS:
+        return True
+    # short lines in capital letters are headings in many CV templates
+    return heading.isupper() and any(x.isalpha() for x in heading)
@@ -7,6 +7,7 @@ import time
 
 from hrgpt.logger.logger import LoggerFactory
 from hrgpt.utils.path_utils import get_result_directory_path
+from hrgpt.utils.usage_utils import UsageTracker
 
 
 class TaskType(enum.StrEnum):
@@ -54,5 +55,15 @@ class TimingClock:
                     file.write(
                         json.dumps({"seconds_taken": rounded_up_elapsed_seconds})
                     )
+                with open(
+                    os.path.join(result_directory, "usage_info.json"), "w"
+                ) as file:
+                    file.write(
+                        UsageTracker.get_job_report(timing_id).model_dump_json(indent=4)
+                    )
             case TaskType.COMPLETE_SCORING:
                 logger.info(message)
+                run_usage = UsageTracker.get_run_report().total
+                logger.info(
+                    f"The run used {run_usage.prompt_tokens} prompt tokens ({run_usage.cached_prompt_tokens} cached) and {run_usage.completion_tokens} completion tokens in {run_usage.request_amount} requests ({run_usage.cached_answer_amount} answered from the cache)"
+                )
@@ -0,0 +1,108 @@
+import math
+import typing
+
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.config_utils import AppConfigFactory, get_model_for_model_enum
+from hrgpt.utils.text_utils import is_section_heading
+from hrgpt.utils.type_utils import ChatMessage
+
+
+# the providers only count tokens remotely, so the token amounts of all models are
+# estimated with the heuristic of four characters per token
+CHARACTERS_PER_TOKEN = 4.0
+
+
+def estimate_token_amount(
+    text: str, characters_per_token: float = CHARACTERS_PER_TOKEN
+) -> int:
+    return math.ceil(len(text) / characters_per_token)
+
+
+def estimate_prompt_token_amount(
+    chat_messages: tuple[ChatMessage, ...], prompt: str
+) -> int:
+    return sum(
+        [estimate_token_amount(x.text) for x in chat_messages],
+        estimate_token_amount(prompt),
+    )
+
+
+def get_prompt_token_budget(model: ModelEnum) -> int:
+    config = AppConfigFactory.get_app_config()
+    token_budget_config = config.generic_config.token_budget_config
+    prompt_token_budget = (
+        get_model_for_model_enum(model).context_window
+        - config.llm_config.max_tokens
+        - estimate_token_amount(config.llm_config.system_context)
+        - token_budget_config.reserved_tokens
+    )
+    if token_budget_config.max_prompt_tokens is not None:
+        prompt_token_budget = min(
+            prompt_token_budget, token_budget_config.max_prompt_tokens
+        )
+    return max(0, prompt_token_budget)
+
+
+def is_prompt_within_budget(prompt: str, models: typing.Iterable[ModelEnum]) -> bool:
+    config = AppConfigFactory.get_app_config()
+    if not config.generic_config.token_budget_config.enabled:
+        return True
+    return all(
+        estimate_token_amount(prompt) <= get_prompt_token_budget(x) for x in models
+    )
+
+
+def compress_text(text: str) -> str:
+    compressed_lines: list[str] = []
+    seen_lines: set[str] = set()
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if len(line) == 0:
+            if len(compressed_lines) > 0 and compressed_lines[-1] != "":
+                compressed_lines.append("")
+            continue
+        if not any(x.isalnum() for x in line):
+            # separators and lone bullets do not carry any information
+            continue
+        if line.lower() in seen_lines:
+            # repeated lines are usually headers, footers or duplicated skills
+            continue
+        seen_lines.add(line.lower())
+        compressed_lines.append(line)
+    return "\n".join(compressed_lines).strip()
+
+
+def split_line_to_token_amount(line: str, max_token_amount: int) -> list[str]:
+    if estimate_token_amount(line) <= max_token_amount:
+        return [line]
+    middle_index = len(line) // 2
+    split_index = line.rfind(" ", 0, middle_index)
+    if split_index <= 0:
+        split_index = middle_index
+    return split_line_to_token_amount(
+        line[:split_index], max_token_amount
+    ) + split_line_to_token_amount(line[split_index:].strip(), max_token_amount)
+
+
+def split_text_into_chunks(text: str, max_token_amount: int) -> tuple[str, ...]:
+    if max_token_amount < 1:
+        raise ValueError
+    chunks: list[list[str]] = [[]]
+    chunk_token_amount = 0
+    for line in text.splitlines():
+        for line_part in split_line_to_token_amount(line, max_token_amount):
+            # the line break is counted as a token of its own
+            line_token_amount = estimate_token_amount(line_part) + 1
+            if (
+                chunk_token_amount + line_token_amount > max_token_amount
+                or (
+                    # prefer to start a chunk at a section heading
+                    is_section_heading(line_part)
+                    and chunk_token_amount > max_token_amount // 2
+                )
+            ) and len(chunks[-1]) > 0:
+                chunks.append([])
+                chunk_token_amount = 0
+            chunks[-1].append(line_part)
+            chunk_token_amount += line_token_amount
+    return tuple("\n".join(x).strip() for x in chunks if len(x) > 0)
@@ -1,10 +1,21 @@
+import threading
+import time
 import typing
 
 import google.auth.credentials
 import google.cloud.translate
 import lingua
 
+from hrgpt.config.config import ReplayMode
+from hrgpt.utils.cache_utils import CacheFactory, CacheType, compute_cache_key
+from hrgpt.utils.client_utils import get_google_translation_client
 from hrgpt.utils.config_utils import AppConfigFactory
+from hrgpt.utils.replay_utils import (
+    CassetteFactory,
+    is_replay_mode,
+    wait_for_recorded_latency,
+)
+from hrgpt.utils.single_flight_utils import run_single_flight
 from hrgpt.utils.type_utils import ApplicantMatch
 
 
@@ -14,39 +25,216 @@ def get_native_language_of_model() -> str:
 
 def get_translation_client() -> google.cloud.translate.TranslationServiceClient:
     app_config = AppConfigFactory.get_app_config()
-    info = app_config.secrets.google_translate_service_account.model_dump(mode="json")
-    return google.cloud.translate.TranslationServiceClient.from_service_account_info(
-        info
+    return get_google_translation_client(
+        app_config.secrets.google_translate_service_account
     )
 
 
+def get_max_translation_request_texts() -> int:
+    return 1024
+
+
+def get_max_translation_request_characters() -> int:
+    return 30000
+
+
 def get_project_id() -> str:
     app_config = AppConfigFactory.get_app_config()
     return app_config.secrets.google_translate_service_account.project_id
 
 
+def get_translation_key(
+    text: str, target_language: str, source_language: typing.Optional[str]
+) -> str:
+    return compute_cache_key(
+        {
+            "text": text,
+            "target_language": target_language,
+            "source_language": source_language,
+        }
+    )
+
+
 def translate_text(
     text: str, target_language: str, source_language: typing.Optional[str] = None
 ) -> str:
-    translation: google.cloud.translate.Translation = (
-        get_translation_client()
-        .translate_text(
+    cache = CacheFactory.get_cache(CacheType.TRANSLATION)
+    translation_key = get_translation_key(text, target_language, source_language)
+    cached_text = cache.get(translation_key) if cache is not None else None
+    if cached_text is not None:
+        return cached_text
+    translated_text, is_shared_text = run_single_flight(
+        translation_key,
+        lambda: get_translated_text(
+            translation_key, text, target_language, source_language
+        ),
+    )
+    if cache is not None and not is_shared_text:
+        cache.set(translation_key, translated_text)
+    return translated_text
+
+
+def get_translated_text(
+    translation_key: str,
+    text: str,
+    target_language: str,
+    source_language: typing.Optional[str],
+) -> str:
+    if is_replay_mode(ReplayMode.OFF):
+        return translate_text_with_client(text, target_language, source_language)
+    cassette = CassetteFactory.get_cassette()
+    if is_replay_mode(ReplayMode.RECORD):
+        start_time = time.monotonic()
+        translated_text = translate_text_with_client(
+            text, target_language, source_language
+        )
+        cassette.record(translation_key, translated_text, time.monotonic() - start_time)
+        return translated_text
+    entry = cassette.replay(translation_key)
+    wait_for_recorded_latency(entry)
+    return entry.value
+
+
+def translate_text_with_client(
+    text: str, target_language: str, source_language: typing.Optional[str]
+) -> str:
+    return translate_texts_with_client((text,), target_language, source_language)[0]
+
+
+def chunk_translation_texts(texts: tuple[str, ...]) -> tuple[tuple[str, ...], ...]:
+    chunks: tuple[tuple[str, ...], ...] = ()
+    chunk: tuple[str, ...] = ()
+    chunk_characters = 0
+    for text in texts:
+        if len(chunk) > 0 and (
+            len(chunk) == get_max_translation_request_texts()
+            or chunk_characters + len(text) > get_max_translation_request_characters()
+        ):
+            chunks += (chunk,)
+            chunk = ()
+            chunk_characters = 0
+        chunk += (text,)
+        chunk_characters += len(text)
+    if len(chunk) > 0:
+        chunks += (chunk,)
+    return chunks
+
+
+def translate_texts_with_client(
+    texts: tuple[str, ...], target_language: str, source_language: typing.Optional[str]
+) -> tuple[str, ...]:
+    translated_texts: tuple[str, ...] = ()
+    for chunk in chunk_translation_texts(texts):
+        response = get_translation_client().translate_text(
             google.cloud.translate.TranslateTextRequest(
-                contents=[text],
+                contents=list(chunk),
                 mime_type="text/plain",
                 source_language_code=source_language,
                 target_language_code=target_language,
                 parent=f"projects/{get_project_id()}",
             )
         )
-        .translations[0]
+        translated_texts += tuple(
+            str(translation.translated_text) for translation in response.translations
+        )
+    return translated_texts
+
+
+def translate_texts(
+    texts: tuple[str, ...],
+    target_language: str,
+    source_language: typing.Optional[str] = None,
+) -> tuple[str, ...]:
+    # every distinct non empty text is only translated once
+    unique_texts = tuple(dict.fromkeys(x for x in texts if len(x.strip()) > 0))
+    translation_keys = {
+        x: get_translation_key(x, target_language, source_language)
+        for x in unique_texts
+    }
+    cache = CacheFactory.get_cache(CacheType.TRANSLATION)
+    translations: dict[str, str] = {}
+    if cache is not None:
+        for text, translation_key in translation_keys.items():
+            cached_text = cache.get(translation_key)
+            if cached_text is not None:
+                translations[text] = cached_text
+    missing_texts = tuple(x for x in unique_texts if x not in translations)
+    if is_replay_mode(ReplayMode.OFF):
+        translated_texts = translate_texts_with_client(
+            missing_texts, target_language, source_language
+        )
+    else:
+        # cassettes contain the translations of single texts
+        translated_texts = tuple(
+            get_translated_text(
+                translation_keys[x], x, target_language, source_language
+            )
+            for x in missing_texts
+        )
+    for text, translated_text in zip(missing_texts, translated_texts):
+        translations[text] = translated_text
+        if cache is not None:
+            cache.set(translation_keys[text], translated_text)
+    return tuple(translations.get(x, x) for x in texts)
+
+
+def get_iso_code(language: str) -> lingua.IsoCode639_1:
+    if not hasattr(lingua.IsoCode639_1, language.upper()):
+        raise ValueError
+    return typing.cast(
+        lingua.IsoCode639_1, getattr(lingua.IsoCode639_1, language.upper())
     )
-    return str(translation.translated_text)
+
+
+class LanguageDetectorFactory:
+    language_detector: typing.Optional[lingua.LanguageDetector] = None
+    lock = threading.Lock()
+
+    @classmethod
+    def get_language_detector(cls) -> lingua.LanguageDetector:
+        with cls.lock:
+            if cls.language_detector is None:
+                app_config = AppConfigFactory.get_app_config()
+                detection_config = (
+                    app_config.generic_config.language_config.language_detection_config
+                )
+                if len(detection_config.candidate_languages) == 0:
+                    builder = lingua.LanguageDetectorBuilder.from_all_languages()
+                else:
+                    builder = lingua.LanguageDetectorBuilder.from_iso_codes_639_1(
+                        *map(get_iso_code, detection_config.candidate_languages)
+                    )
+                if detection_config.preload_language_models:
+                    builder = builder.with_preloaded_language_models()
+                cls.language_detector = builder.build()
+            return cls.language_detector
+
+
+def get_text_sample(text: str, sample_length: int) -> str:
+    if len(text) <= sample_length:
+        return text
+    # the middle of a document is less dominated by names and addresses
+    sample_start = (len(text) - sample_length) // 2
+    return text[sample_start : sample_start + sample_length]
 
 
 def detect_language(text: str) -> str:
-    detector = lingua.LanguageDetectorBuilder.from_all_languages().build()
-    detected_language = detector.detect_language_of(text)
+    app_config = AppConfigFactory.get_app_config()
+    detection_config = (
+        app_config.generic_config.language_config.language_detection_config
+    )
+    detector = LanguageDetectorFactory.get_language_detector()
+    confidence_values = detector.compute_language_confidence_values(
+        get_text_sample(text, detection_config.sample_length)
+    )
+    detected_language: typing.Optional[lingua.Language] = None
+    if (
+        len(confidence_values) > 0
+        and confidence_values[0].value >= detection_config.min_sample_confidence
+    ):
+        detected_language = confidence_values[0].language
+    else:
+        detected_language = detector.detect_language_of(text)
     if detected_language is None:
         raise RuntimeError
     return detected_language.iso_code_639_1.name.lower()
@@ -57,19 +245,18 @@ def translate_applicant_match(applicant_match: ApplicantMatch) -> ApplicantMatch
     target_language = app_config.generic_config.language_config.output_language
     if target_language == get_native_language_of_model():
         return applicant_match
-    else:
-        applicant_match.promising_result.explanation = translate_text(
-            applicant_match.promising_result.explanation,
-            target_language=target_language,
-        )
-        for requirement_match_list in applicant_match.requirement_matches.values():
-            for requirement_match in requirement_match_list:
-                requirement_match.requirement.specification = translate_text(
-                    requirement_match.requirement.specification,
-                    target_language=target_language,
-                )
-                requirement_match.score.explanation = translate_text(
-                    requirement_match.score.explanation,
-                    target_language=target_language,
-                )
+    texts: tuple[str, ...] = (applicant_match.promising_result.explanation,)
+    for requirement_match_list in applicant_match.requirement_matches.values():
+        for requirement_match in requirement_match_list:
+            texts += (
+                requirement_match.requirement.specification,
+                requirement_match.score.explanation,
+            )
+    # the translated texts are assigned in the order they were collected
+    translated_texts = iter(translate_texts(texts, target_language=target_language))
+    applicant_match.promising_result.explanation = next(translated_texts)
+    for requirement_match_list in applicant_match.requirement_matches.values():
+        for requirement_match in requirement_match_list:
+            requirement_match.requirement.specification = next(translated_texts)
+            requirement_match.score.explanation = next(translated_texts)
     return applicant_match
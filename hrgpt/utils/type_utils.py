@@ -55,9 +55,14 @@ class Score(pydantic.BaseModel):
     explanation: StrippedString
 
 
+class IndexedScore(Score):
+    index: int
+
+
 class RequirementMatch(pydantic.BaseModel):
     score: Score
     requirement: Requirement
+    score_spread: ScoreValue = 0
 
 
 class PromisingResult(pydantic.BaseModel):
@@ -68,6 +73,7 @@ class PromisingResult(pydantic.BaseModel):
 class ApplicantMatch(pydantic.BaseModel):
     total_score: TotalScoreValue
     promising_result: PromisingResult
+    promising_agreement: float = 1.0
     requirement_matches: dict[JobRequirementType, list[RequirementMatch]]
 
 
@@ -77,11 +83,66 @@ class Author(enum.StrEnum):
     SYSTEM = enum.auto()
 
 
+class PromptType(enum.StrEnum):
+    PRETTIFY_TEXT = enum.auto()
+    EXTRACT_REQUIREMENTS = enum.auto()
+    MATCH_REQUIREMENT = enum.auto()
+    MATCH_REQUIREMENTS = enum.auto()
+    CHECK_IF_CANDIDATE_IS_PROMISING = enum.auto()
+
+
+class AnswerFormat(enum.StrEnum):
+    TEXT = enum.auto()
+    JSON_OBJECT = enum.auto()
+    JSON_ARRAY = enum.auto()
+
+
+def get_answer_format(prompt_type: PromptType) -> AnswerFormat:
+    match prompt_type:
+        case PromptType.PRETTIFY_TEXT:
+            return AnswerFormat.TEXT
+        case PromptType.MATCH_REQUIREMENTS:
+            return AnswerFormat.JSON_ARRAY
+        case _:
+            return AnswerFormat.JSON_OBJECT
+
+
+class TokenUsage(pydantic.BaseModel):
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+
+
+class UsageSummary(pydantic.BaseModel):
+    request_amount: int = 0
+    cached_answer_amount: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    generation_seconds: float = 0.0
+    max_generation_seconds: float = 0.0
+    time_to_first_token_seconds: float = 0.0
+
+
+class UsageReport(pydantic.BaseModel):
+    total: UsageSummary
+    per_job: dict[str, UsageSummary]
+    per_cv: dict[str, UsageSummary]
+    per_prompt_type: dict[str, UsageSummary]
+    per_requirement_type: dict[str, UsageSummary]
+    per_model: dict[str, UsageSummary]
+
+
 class ChatMessage(pydantic.BaseModel):
     text: StrippedString
     author: Author
     creation_datetime: datetime.datetime
     generation_timedelta: datetime.timedelta
+    token_usage: TokenUsage = pydantic.Field(default_factory=TokenUsage)
+    time_to_first_token: typing.Optional[datetime.timedelta] = None
+    time_to_json: typing.Optional[datetime.timedelta] = None
+    model: typing.Optional[str] = None
+    choice_texts: tuple[StrippedString, ...] = ()
 
 
 class DocumentFileType(enum.StrEnum):
@@ -257,3 +318,4 @@ class ScoreWorkload(pydantic.BaseModel):
 class ApiMatchResult(pydantic.BaseModel):
     overview_result: list[dict[str, typing.Any]]
     exact_result: dict[str, ApplicantMatch]
+    usage: UsageReport
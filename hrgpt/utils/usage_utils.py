@@ -0,0 +1,196 @@
+import collections
+import contextvars
+import threading
+import typing
+import uuid
+
+import pydantic
+
+from hrgpt.config.config import ModelEnum
+from hrgpt.utils.type_utils import (
+    ChatMessage,
+    PromptType,
+    UsageReport,
+    UsageSummary,
+)
+
+T = typing.TypeVar("T")
+
+current_run_id: contextvars.ContextVar[typing.Optional[str]] = contextvars.ContextVar(
+    "current_run_id", default=None
+)
+current_job_name: contextvars.ContextVar[typing.Optional[str]] = contextvars.ContextVar(
+    "current_job_name", default=None
+)
+current_cv_name: contextvars.ContextVar[typing.Optional[str]] = contextvars.ContextVar(
+    "current_cv_name", default=None
+)
+current_requirement_type: contextvars.ContextVar[typing.Optional[str]] = (
+    contextvars.ContextVar("current_requirement_type", default=None)
+)
+
+
+class UsageScope(pydantic.BaseModel):
+    job_name: typing.Optional[str] = None
+    cv_name: typing.Optional[str] = None
+    requirement_type: typing.Optional[str] = None
+
+
+class UsageRecord(pydantic.BaseModel):
+    job_name: typing.Optional[str]
+    cv_name: typing.Optional[str]
+    requirement_type: typing.Optional[str]
+    prompt_type: PromptType
+    model: ModelEnum
+    cached_answer: bool
+    chat_message: ChatMessage
+
+
+def add_usage_record_to_summary(
+    usage_summary: UsageSummary, usage_record: UsageRecord
+) -> None:
+    usage_summary.request_amount += 1
+    if usage_record.cached_answer:
+        # cached answers are free and their usage was already counted once
+        usage_summary.cached_answer_amount += 1
+        return
+    chat_message = usage_record.chat_message
+    usage_summary.prompt_tokens += chat_message.token_usage.prompt_tokens
+    usage_summary.completion_tokens += chat_message.token_usage.completion_tokens
+    usage_summary.cached_prompt_tokens += chat_message.token_usage.cached_prompt_tokens
+    generation_seconds = chat_message.generation_timedelta.total_seconds()
+    usage_summary.generation_seconds += generation_seconds
+    usage_summary.max_generation_seconds = max(
+        usage_summary.max_generation_seconds, generation_seconds
+    )
+    if chat_message.time_to_first_token is not None:
+        usage_summary.time_to_first_token_seconds += (
+            chat_message.time_to_first_token.total_seconds()
+        )
+
+
+def get_unknown_key() -> str:
+    return "unknown"
+
+
+def create_usage_report(usage_records: typing.Iterable[UsageRecord]) -> UsageReport:
+    total = UsageSummary()
+    dimension_dicts: dict[str, dict[str, UsageSummary]] = {
+        x: collections.defaultdict(UsageSummary)
+        for x in (
+            "per_job",
+            "per_cv",
+            "per_prompt_type",
+            "per_requirement_type",
+            "per_model",
+        )
+    }
+    for usage_record in usage_records:
+        add_usage_record_to_summary(total, usage_record)
+        for dimension, key in (
+            ("per_job", usage_record.job_name),
+            ("per_cv", usage_record.cv_name),
+            ("per_prompt_type", usage_record.prompt_type),
+            ("per_requirement_type", usage_record.requirement_type),
+            ("per_model", usage_record.model),
+        ):
+            if key is None:
+                key = get_unknown_key()
+            add_usage_record_to_summary(dimension_dicts[dimension][key], usage_record)
+    return UsageReport(total=total, **{x: dict(y) for x, y in dimension_dicts.items()})
+
+
+class UsageTracker:
+    # the records are kept per run, as runs of the server overlap
+    run_usage_records: dict[str, list[UsageRecord]] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def start_run(cls) -> str:
+        run_id = uuid.uuid4().hex
+        current_run_id.set(run_id)
+        with cls.lock:
+            cls.run_usage_records[run_id] = []
+        return run_id
+
+    @classmethod
+    def finish_run(cls) -> None:
+        run_id = current_run_id.get()
+        with cls.lock:
+            cls.run_usage_records.pop(run_id or "", None)
+        current_run_id.set(None)
+
+    @classmethod
+    def start_job(cls, job_name: str) -> None:
+        current_job_name.set(job_name)
+
+    @classmethod
+    def start_cv(cls, cv_name: str) -> None:
+        current_cv_name.set(cv_name)
+
+    @classmethod
+    def start_requirement_type(cls, requirement_type: typing.Optional[str]) -> None:
+        # none is used for prompts covering several requirement types
+        current_requirement_type.set(requirement_type)
+
+    @classmethod
+    def run_in_scope(
+        cls, usage_scope: UsageScope, function: typing.Callable[[], T]
+    ) -> T:
+        def run_function() -> T:
+            current_job_name.set(usage_scope.job_name)
+            current_cv_name.set(usage_scope.cv_name)
+            current_requirement_type.set(usage_scope.requirement_type)
+            return function()
+
+        # the scope only applies to the function and not to the caller
+        return contextvars.copy_context().run(run_function)
+
+    @classmethod
+    def run_untracked(cls, function: typing.Callable[[], T]) -> T:
+        def run_function() -> T:
+            current_run_id.set(None)
+            return function()
+
+        return contextvars.copy_context().run(run_function)
+
+    @classmethod
+    def record(
+        cls,
+        chat_message: ChatMessage,
+        prompt_type: PromptType,
+        model: ModelEnum,
+        cached_answer: bool = False,
+    ) -> None:
+        run_id = current_run_id.get()
+        if run_id is None:
+            # usage outside of a run is not reported anywhere
+            return
+        usage_record = UsageRecord(
+            job_name=current_job_name.get(),
+            cv_name=current_cv_name.get(),
+            requirement_type=current_requirement_type.get(),
+            prompt_type=prompt_type,
+            model=model,
+            cached_answer=cached_answer,
+            chat_message=chat_message,
+        )
+        with cls.lock:
+            if run_id in cls.run_usage_records:
+                cls.run_usage_records[run_id].append(usage_record)
+
+    @classmethod
+    def get_run_usage_records(cls) -> list[UsageRecord]:
+        run_id = current_run_id.get()
+        with cls.lock:
+            return list(cls.run_usage_records.get(run_id or "", []))
+
+    @classmethod
+    def get_job_report(cls, job_name: str) -> UsageReport:
+        return create_usage_report(
+            [x for x in cls.get_run_usage_records() if x.job_name == job_name]
+        )
+
+    @classmethod
+    def get_run_report(cls) -> UsageReport:
+        return create_usage_report(cls.get_run_usage_records())